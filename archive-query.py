@@ -0,0 +1,53 @@
+"""
+Module containing the main function for searching the archive of the saints.
+
+The archive is updated every time a saint is generated; run with --rebuild
+to load again the saints from the TOML files (e.g. after copying them from
+another machine).
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+
+from modules.saint_factory import SaintFactory
+
+
+def main() -> None:
+    """Script entry point."""
+    parser = argparse.ArgumentParser(description="Search the generated saints.")
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="load again all the saints from the TOML files",
+    )
+    parser.add_argument(
+        "--patronage", help="thing protected by the saints, in Italian or English"
+    )
+    parser.add_argument("--city", help="city the saints are the patrons of")
+    parser.add_argument("--name", help="name of the saints")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    f = SaintFactory()
+    f.rebuildArchive(full=args.rebuild)
+    archive = f.archive
+
+    if args.patronage is not None:
+        results = archive.byPatronage(args.patronage)
+    elif args.city is not None:
+        results = archive.byCity(args.city)
+    elif args.name is not None:
+        results = archive.byName(args.name)
+    else:
+        logging.info(f"{len(archive)} saints in the archive")
+        return
+
+    for day, saint in results:
+        print(f"{day.isoformat()}: {saint.bio}")
+    logging.info(f"{len(results)} saints found")
+
+
+if __name__ == "__main__":
+    main()
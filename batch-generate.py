@@ -0,0 +1,69 @@
+"""
+Module containing the main function for generating the saints of many days.
+
+Days that were already generated are skipped, so an interrupted run can be
+resumed by launching it again.
+By default only a placeholder image is generated instead of one made by the
+AI; run with --online to use the AI.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+from datetime import date
+
+from modules.saint_factory import SaintFactory
+
+
+def main() -> None:
+    """Script entry point."""
+    parser = argparse.ArgumentParser(
+        description="Generate the saints for a range of days."
+    )
+    parser.add_argument(
+        "start",
+        type=date.fromisoformat,
+        help="first day of the range, in format YYYY-MM-DD",
+    )
+    parser.add_argument(
+        "end",
+        type=date.fromisoformat,
+        help="last day of the range (included), in format YYYY-MM-DD",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of worker processes (defaults to the number of cores)",
+    )
+    parser.add_argument(
+        "--online", action="store_true", help="use the AI to create the images"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="regenerate the existing saints"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format=(
+            "%(asctime)s - %(levelname)s - %(process)d - %(module)s - "
+            "%(funcName)s (%(lineno)d) - %(message)s"
+        ),
+    )
+
+    f = SaintFactory()
+    saints = f.generateRange(
+        args.start,
+        args.end,
+        workers=args.workers,
+        offline=not args.online,
+        force_generation=args.force,
+    )
+    logging.info(f"{len(saints)} saints available")
+
+
+if __name__ == "__main__":
+    main()
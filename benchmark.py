@@ -0,0 +1,82 @@
+"""
+Module containing the main function for benchmarking the generation of the saints.
+
+The whole pipeline is run in offline mode, measuring each stage separately:
+cold runs generate a single saint in a new process, the warm run generates
+many saints with the same factory. Save a report with --save and compare a
+later run to it with --compare to spot the regressions of the warm run;
+the cold runs are too few to be reliable, so they are only reported.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+
+from modules.render_benchmark import RenderBenchmark, RenderBenchmarkException
+
+
+def main() -> None:
+    """Script entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the generation of the saints in offline mode."
+    )
+    parser.add_argument(
+        "-n", "--saints", type=int, default=1000, help="saints in the warm run"
+    )
+    parser.add_argument("--cold-runs", type=int, default=5, help="number of cold runs")
+    parser.add_argument(
+        "--warmup", type=int, default=20, help="untimed saints before the warm run"
+    )
+    parser.add_argument("--save", help="save the report as a JSON baseline")
+    parser.add_argument("--compare", help="JSON baseline to compare the report to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown counted as a regression (defaults to 0.1)",
+    )
+    parser.add_argument(
+        "--min-difference",
+        type=float,
+        default=0.25,
+        help="slowdowns smaller than this many ms are ignored (defaults to 0.25)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    benchmark = RenderBenchmark(
+        saints=args.saints, cold_runs=args.cold_runs, warmup=args.warmup
+    )
+    report = benchmark.run()
+    print(RenderBenchmark.format(report))
+
+    if args.save:
+        RenderBenchmark.save(report, args.save)
+        print(f"Report saved to {args.save}")
+
+    if args.compare:
+        baseline = RenderBenchmark.load(args.compare)
+        try:
+            # the cold phase has too few samples to be used as a gate
+            for r in RenderBenchmark.compare(
+                report, baseline, args.threshold, args.min_difference, "cold"
+            ):
+                print(f"slower (not gated) {r}")
+            regressions = RenderBenchmark.compare(
+                report, baseline, args.threshold, args.min_difference
+            )
+        except RenderBenchmarkException as e:
+            logging.error(f"Can't compare to {args.compare}: {e}")
+            sys.exit(2)
+
+        for r in regressions:
+            print(f"REGRESSION {r}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions compared to {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Module containing the main function for compiling the resource pack.
+
+The corpora in the resources folder are compiled into a single binary pack,
+which is memory mapped by the SaintFactory instead of reading the text files.
+The text files remain the source of truth: run this script again after
+editing them, or the factory will ignore the outdated pack.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+
+import toml
+
+from modules.resource_pack import ResourcePack, ResourcePackException
+from modules.saint_factory import CORPUS_SOURCES, PARALLEL_CORPORA
+
+
+def main() -> None:
+    """Script entry point."""
+    parser = argparse.ArgumentParser(description="Compile the resource pack.")
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="only check the integrity of the existing pack",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    with open("settings.toml") as f:
+        settings = toml.load(f)["SaintFactory"]
+    path = settings.get("resource_pack_path", "")
+    if not path:
+        logging.error("resource_pack_path is not set")
+        sys.exit(1)
+
+    try:
+        if not args.verify:
+            ResourcePack.build(path, CORPUS_SOURCES, PARALLEL_CORPORA)
+
+        pack = ResourcePack.open(path)
+        pack.verify(CORPUS_SOURCES, PARALLEL_CORPORA)
+    except (OSError, ResourcePackException) as e:
+        logging.error(f"Resource pack {path} is not valid: {e}")
+        sys.exit(1)
+
+    if not pack.isCurrent(CORPUS_SOURCES):
+        logging.warning(f"Resource pack {path} is older than the text files")
+    logging.info(f"Resource pack {path} verified")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,8 @@ from modules.email_client import EmailClient
 def main():
     """Script entry point."""
     logging.basicConfig(level=logging.INFO)
-    e = EmailClient()
-    security_code = e.getInstagramSecurityCode()
+    with EmailClient() as e:
+        security_code = e.getInstagramSecurityCode()
     logging.info(f"Security code: {security_code}")
 
 
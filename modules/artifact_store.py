@@ -0,0 +1,230 @@
+"""Module containing the ArtifactStore class."""
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from typing import IO, Iterator
+
+from .saint import Saint
+from .saint_factory import SaintFactory
+
+
+class ArtifactStoreException(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class ArtifactStore:
+    """Class handling the saints shared between the generator and the posters.
+
+    A single producer (the saint creator) publishes the saint of each day,
+    while the consumers (the Instagram poster and the Telegram bot) only
+    read it. The saint of each day is guarded by a lock file until it's
+    published: the producer holds it exclusively while rendering, and the
+    consumers take it shared while waiting, so that they don't read partial
+    files or render the same saint again. Once the saint is published, the
+    lock file is removed and the consumers read the saint without it.
+
+    If a consumer finds no saint at all (e.g. the producer is not running),
+    it publishes the saint itself, under the same exclusive lock.
+
+    Asynchronous consumers use loadAsync, which runs the loading in a worker
+    thread and shares a single loading among the concurrent requests of the
+    same day.
+    """
+
+    _factory: SaintFactory
+    _poll_interval: float = 1
+    _executor: ThreadPoolExecutor
+    _in_flight: dict[date, asyncio.Future]
+
+    def __init__(
+        self, factory: SaintFactory = None, max_workers: int = 2
+    ) -> ArtifactStore:
+        """Initialize the store.
+
+        Args:
+            factory (SaintFactory, optional): Factory used to render the
+                saints. Defaults to a new factory.
+            max_workers (int, optional): Number of threads used by loadAsync.
+                Defaults to 2.
+
+        Returns:
+            ArtifactStore
+        """
+        self._factory = factory if factory is not None else SaintFactory()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ArtifactStore"
+        )
+        self._in_flight = {}
+
+    @property
+    def factory(self) -> SaintFactory:
+        """Factory used to render the saints."""
+        return self._factory
+
+    @contextmanager
+    def _lock(self, day: date, exclusive: bool, timeout: float) -> Iterator[None]:
+        """Hold the lock of the saint of a day.
+
+        The lock file can be removed by its holder (see _removeLock), so
+        after taking the lock it's checked to be still the one at its path,
+        otherwise the lock is taken again on the new file.
+
+        Args:
+            day (date): day of the saint
+            exclusive (bool): whether to take the lock exclusively
+            timeout (float): maximum time (in seconds) to wait for the lock.
+                If None, wait forever.
+
+        Raises:
+            ArtifactStoreException: if the lock can't be taken in time.
+        """
+        operation = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        path = self._factory.lockFilename(day)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with open(path, "a") as lock:
+                if deadline is None:
+                    fcntl.flock(lock, operation)
+                else:
+                    while True:
+                        try:
+                            fcntl.flock(lock, operation | fcntl.LOCK_NB)
+                            break
+                        except BlockingIOError:
+                            if time.monotonic() >= deadline:
+                                raise ArtifactStoreException(
+                                    f"Timed out waiting for the saint of {day}"
+                                )
+                            time.sleep(self._poll_interval)
+                try:
+                    if self._isCurrentLock(lock, path):
+                        yield
+                        return
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _isCurrentLock(lock: IO, path: str) -> bool:
+        """Check that a lock file was not removed while waiting for it.
+
+        Args:
+            lock (IO): open lock file
+            path (str): path of the lock file
+
+        Returns:
+            bool
+        """
+        try:
+            return os.fstat(lock.fileno()).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _removeLock(self, day: date) -> None:
+        """Remove the lock file of a published saint, while holding the lock.
+
+        The lock is only needed until the saint is published, so the lock
+        files don't pile up in the TOML folder.
+
+        Args:
+            day (date): day of the saint
+        """
+        try:
+            os.remove(self._factory.lockFilename(day))
+        except FileNotFoundError:
+            pass
+
+    def publish(
+        self, day: date = None, offline: bool = False, force: bool = False
+    ) -> Saint:
+        """Render and publish the saint of a day, if not already published.
+
+        Args:
+            day (date, optional): Day of the saint. Defaults to today.
+            offline (bool, optional): If True, the AI won't be used
+                and a placeholder image will be used instead.
+                Defaults to False.
+            force (bool, optional): If True, the saint will be rendered
+                even if already published. Defaults to False.
+
+        Returns:
+            Saint
+        """
+        if day is None:
+            day = date.today()
+
+        with self._lock(day, exclusive=True, timeout=None):
+            if self._factory.isGenerated(day) and not force:
+                logging.info(f"Saint of {day} already published")
+                saint = self._factory.loadSaint(day)
+            else:
+                logging.info(f"Publishing saint of {day}")
+                saint = self._factory.generateSaint(
+                    offline=offline, force_generation=True, day=day
+                )
+            self._removeLock(day)
+
+        return saint
+
+    def load(self, day: date = None, timeout: float = None) -> Saint:
+        """Load the saint of a day, waiting for a render in progress.
+
+        Args:
+            day (date, optional): Day of the saint. Defaults to today.
+            timeout (float, optional): Maximum time (in seconds) to wait for
+                a render in progress. Defaults to waiting forever.
+
+        Returns:
+            Saint
+        """
+        if day is None:
+            day = date.today()
+
+        # the TOML file is published last, so a published saint is complete
+        # and can be read without the lock
+        if self._factory.isGenerated(day):
+            return self._factory.loadSaint(day)
+
+        with self._lock(day, exclusive=False, timeout=timeout):
+            if self._factory.isGenerated(day):
+                self._removeLock(day)
+                return self._factory.loadSaint(day)
+
+        logging.warning(f"Saint of {day} not published yet, publishing it")
+        return self.publish(day)
+
+    async def loadAsync(self, day: date = None, timeout: float = None) -> Saint:
+        """Load the saint of a day without blocking the event loop.
+
+        Concurrent calls for the same day share the same loading.
+
+        Args:
+            day (date, optional): Day of the saint. Defaults to today.
+            timeout (float, optional): Maximum time (in seconds) to wait for
+                a render in progress. Defaults to waiting forever.
+
+        Returns:
+            Saint
+        """
+        if day is None:
+            day = date.today()
+
+        future = self._in_flight.get(day)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, self.load, day, timeout)
+            self._in_flight[day] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(day, None))
+        else:
+            logging.info(f"Waiting for the saint of {day} already being loaded")
+
+        # a cancelled caller must not cancel the loading shared with the others
+        return await asyncio.shield(future)
@@ -0,0 +1,269 @@
+"""Module containing the templates used to compose the images of the saints."""
+from __future__ import annotations
+
+import math
+from collections import OrderedDict
+from typing import Callable
+
+from PIL import Image
+
+from .font_metrics import FontMetrics
+
+
+class TextSlot:
+    """Class describing a line of text in the caption of a card."""
+
+    position: float
+    width_scale: float
+    max_font_size: int
+    color: tuple[int, int, int, int]
+
+    def __init__(
+        self,
+        position: float,
+        width_scale: float,
+        max_font_size: int = 100,
+        color: tuple[int, int, int, int] = (0, 0, 0, 255),
+    ) -> TextSlot:
+        """Initialize the slot.
+
+        Args:
+            position (float): Vertical position of the centre of the line,
+                as a fraction of the caption height measured from the bottom
+                of the card.
+            width_scale (float): Maximum width of the line, as a fraction of
+                the width of the portrait.
+            max_font_size (int, optional): Maximum size of the font.
+                Defaults to 100.
+            color (tuple[int, int, int, int], optional): RGBA colour of the
+                text. Defaults to black.
+
+        Returns:
+            TextSlot
+        """
+        self.position = position
+        self.width_scale = width_scale
+        self.max_font_size = max_font_size
+        self.color = color
+
+
+class CardGeometry:
+    """Class containing the layout of a card, computed for a portrait size."""
+
+    size: tuple[int, int]
+    portrait_position: tuple[int, int]
+    anchors: list[tuple[float, float, float]]
+
+    def __init__(
+        self,
+        size: tuple[int, int],
+        portrait_position: tuple[int, int],
+        anchors: list[tuple[float, float, float]],
+    ) -> CardGeometry:
+        """Initialize the geometry.
+
+        Args:
+            size (tuple[int, int]): Size of the card.
+            portrait_position (tuple[int, int]): Top left corner of the portrait.
+            anchors (list[tuple[float, float, float]]): Centre (x, y) and
+                maximum width of each text slot.
+
+        Returns:
+            CardGeometry
+        """
+        self.size = size
+        self.portrait_position = portrait_position
+        self.anchors = anchors
+
+
+class CardTemplate:
+    """Class handling the composition of the image of a saint.
+
+    The card is made of a portrait, surrounded by a border, and a caption
+    below it containing the lines of text. The geometry of the card is
+    computed once per portrait size and the rasterised lines of text are
+    cached, so that rendering a card only means pasting the portrait and the
+    text layers on a plain background.
+    """
+
+    border: int
+    caption_height: int
+    slots: list[TextSlot]
+
+    _geometries: dict[tuple[int, int], CardGeometry]
+    _text_layers: OrderedDict[tuple, tuple[Image.Image, tuple[int, int]]]
+    _cache_size: int = 16
+
+    def __init__(
+        self, border: int, caption_height: int, slots: list[TextSlot]
+    ) -> CardTemplate:
+        """Initialize the template.
+
+        Args:
+            border (int): Width of the border around the portrait.
+            caption_height (int): Height of the caption below the portrait.
+            slots (list[TextSlot]): Lines of text of the caption.
+
+        Returns:
+            CardTemplate
+        """
+        self.border = border
+        self.caption_height = caption_height
+        self.slots = slots
+
+        self._geometries = {}
+        self._text_layers = OrderedDict()
+
+    def geometry(self, portrait_size: tuple[int, int]) -> CardGeometry:
+        """Get the layout of a card.
+
+        Args:
+            portrait_size (tuple[int, int]): Size of the portrait.
+
+        Returns:
+            CardGeometry
+        """
+        if portrait_size not in self._geometries:
+            width = portrait_size[0] + self.border * 2
+            height = portrait_size[1] + self.border + self.caption_height
+            anchors = [
+                (
+                    width / 2,
+                    height - self.caption_height * slot.position,
+                    portrait_size[0] * slot.width_scale,
+                )
+                for slot in self.slots
+            ]
+            self._geometries[portrait_size] = CardGeometry(
+                size=(width, height),
+                portrait_position=(self.border, self.border),
+                anchors=anchors,
+            )
+
+        return self._geometries[portrait_size]
+
+    def _cached(self, cache: OrderedDict, key: tuple, factory: Callable) -> object:
+        """Get an item from a LRU cache, creating it if needed.
+
+        Args:
+            cache (OrderedDict): cache to look into
+            key (tuple): key of the item
+            factory (Callable): function creating the item
+
+        Returns:
+            object
+        """
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        cache[key] = factory()
+        if len(cache) > self._cache_size:
+            cache.popitem(last=False)
+
+        return cache[key]
+
+    def _textLayer(
+        self,
+        text: str,
+        font_path: str,
+        font_size: int,
+        start: tuple,
+        metrics: FontMetrics,
+    ) -> tuple[Image.Image, tuple[int, int]]:
+        """Get a rasterised line of text.
+
+        Args:
+            text (str): text to rasterise
+            font_path (str): path to the font file
+            font_size (int): size of the font
+            start (tuple): sub-pixel offset of the text
+            metrics (FontMetrics): engine used to load the font
+
+        Returns:
+            tuple[Image.Image, tuple[int, int]]: mask of the text and its
+                offset from the drawing position
+        """
+
+        def rasterise() -> tuple[Image.Image, tuple[int, int]]:
+            font = metrics.getFont(font_path, font_size)
+            mask, offset = font.getmask2(text, "L", start=start)
+            return Image.frombytes("L", mask.size, bytes(mask)), offset
+
+        return self._cached(
+            self._text_layers, (text, font_path, font_size, start), rasterise
+        )
+
+    def render(
+        self,
+        portrait: Image.Image,
+        texts: list[str],
+        font_path: str,
+        metrics: FontMetrics,
+        background_color: tuple[int, int, int, int],
+    ) -> Image.Image:
+        """Compose a card.
+
+        Args:
+            portrait (Image.Image): Portrait of the saint.
+            texts (list[str]): Lines of text, one for each slot.
+            font_path (str): Path to the font file.
+            metrics (FontMetrics): Engine used to fit the text.
+            background_color (tuple[int, int, int, int]): RGBA colour of
+                the background.
+
+        Returns:
+            Image.Image
+        """
+        geometry = self.geometry(portrait.size)
+        # the colour changes with every saint, so the background is not cached
+        card = Image.new("RGBA", geometry.size, color=background_color)
+        card.paste(portrait, geometry.portrait_position)
+
+        for slot, (x, y, max_width), text in zip(self.slots, geometry.anchors, texts):
+            # fit the font to the slot width
+            font_size = metrics.fitFont(
+                text=text,
+                path=font_path,
+                max_width=max_width,
+                max_size=slot.max_font_size,
+            )
+            _, __, w, h = metrics.getFont(font_path, font_size).getbbox(text=text)
+
+            # centre the text on the anchor
+            text_x = x - w / 2
+            text_y = y - h / 2
+            start = (math.modf(text_x)[0], math.modf(text_y)[0])
+            layer, offset = self._textLayer(text, font_path, font_size, start, metrics)
+
+            left = int(text_x) + offset[0]
+            top = int(text_y) + offset[1]
+            card.paste(
+                slot.color,
+                (left, top, left + layer.width, top + layer.height),
+                layer,
+            )
+
+        return card
+
+
+TEMPLATES: dict[str, CardTemplate] = {
+    # portrait with a thin border, name and patronage in the caption
+    "classic": CardTemplate(
+        border=32,
+        caption_height=160,
+        slots=[
+            TextSlot(position=0.66, width_scale=0.8),
+            TextSlot(position=0.33, width_scale=0.4),
+        ],
+    ),
+    # smaller caption, for previews and chat messages
+    "compact": CardTemplate(
+        border=16,
+        caption_height=112,
+        slots=[
+            TextSlot(position=0.66, width_scale=0.9),
+            TextSlot(position=0.28, width_scale=0.5),
+        ],
+    ),
+}
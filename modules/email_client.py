@@ -4,13 +4,19 @@ from __future__ import annotations
 import imaplib
 import logging
 import re
+import select
+import ssl
+import time
 from datetime import datetime
 from email.message import EmailMessage
 from email.parser import BytesParser
 from email.policy import default
+from typing import Any
 
 import toml
 
+from .retry import RetryException, RetryPolicy
+
 
 class EmailClientException(Exception):
     """Base class for exceptions in this module."""
@@ -19,12 +25,19 @@ class EmailClientException(Exception):
 
 
 class EmailClient:
-    """Class handling the logic of the email client."""
+    """Class handling the logic of the email client.
+
+    The connection to the server is opened on first use and kept open until
+    the client is closed, so it can be used as a context manager.
+    """
 
     _client: imaplib.IMAP4_SSL
     _settings: dict
     _security_code: str
 
+    # time (in seconds) between two searches if the server doesn't support IDLE
+    _poll_interval: float = 5
+
     def __init__(self) -> EmailClient:
         """Initialize the bot.
 
@@ -33,6 +46,34 @@ class EmailClient:
         """
         logging.info("Initializing Email")
         self._settings = self._loadSettings("settings.toml")
+        self._client = None
+
+    def __enter__(self) -> EmailClient:
+        """Use the client as a context manager, closing it on exit."""
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        """Close the connection."""
+        self.close()
+
+    def _open(self) -> None:
+        """Open a new connection, login and select the inbox.
+
+        Raises:
+            imaplib.IMAP4.error: if the server refuses the login.
+            OSError: if the server can't be reached.
+        """
+        logging.info("Logging in to email")
+        self._security_code = None
+        self._client = imaplib.IMAP4_SSL(
+            self._settings["imap_server"],
+            timeout=self._settings.get("imap_timeout", 30),
+        )
+        self._client.login(self._settings["username"], self._settings["password"])
+        logging.info(f"Logged in to email with username {self._settings['username']}")
+
+        logging.info("Selecting INBOX")
+        self._client.select("INBOX")
 
     def _login(self) -> bool:
         """Login to the email account.
@@ -40,23 +81,68 @@ class EmailClient:
         Returns:
             bool: True if the login was successful, False otherwise.
         """
-        logging.info("Logging in to email")
-        self._security_code = None
         try:
-            self._client = imaplib.IMAP4_SSL(self._settings["imap_server"])
-            self._client.login(self._settings["username"], self._settings["password"])
-            logging.info(
-                f"Logged in to email with username {self._settings['username']}"
-            )
+            self._open()
         except Exception as e:
             logging.error(f"Error logging in to email: {e}")
+            self.close()
             return False
 
-        logging.info("Selecting INBOX")
-        self._client.select("INBOX")
-
         return True
 
+    def _isAlive(self) -> bool:
+        """Check whether the open connection still works.
+
+        Returns:
+            bool: True if the client is connected, False otherwise.
+        """
+        if self._client is None:
+            return False
+
+        try:
+            self._client.noop()
+            return True
+        except (imaplib.IMAP4.error, OSError) as e:
+            logging.warning(f"Email connection lost: {e}")
+            self.close()
+            return False
+
+    def _connect(self) -> bool:
+        """Make sure that the client is connected, reusing the open connection.
+
+        Returns:
+            bool: True if the client is connected, False otherwise.
+        """
+        return self._isAlive() or self._login()
+
+    def _reconnect(self) -> None:
+        """Make sure that the client is connected, raising on failure.
+
+        Raises:
+            imaplib.IMAP4.error: if the server refuses the login.
+            OSError: if the server can't be reached.
+        """
+        if self._isAlive():
+            return
+
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        """Log out and close the connection, if open."""
+        if self._client is None:
+            return
+
+        logging.info("Logging out from email")
+        try:
+            self._client.logout()
+        except (imaplib.IMAP4.error, OSError) as e:
+            logging.warning(f"Error logging out from email: {e}")
+        self._client = None
+
     def _loadSettings(self, path: str) -> dict:
         """Load settings from a TOML file.
 
@@ -69,33 +155,70 @@ class EmailClient:
         with open(path, "r") as f:
             return toml.load(f)[self.__class__.__name__]
 
-    def _fetchRelevantEmails(self) -> list[EmailMessage]:
-        """Fetch relevant emails.
+    def _searchRelevantEmails(self) -> list[bytes]:
+        """Search the relevant emails.
 
         Returns:
-            list[EmailMessage]: List of relevant emails.
+            list[bytes]: UIDs of the relevant emails.
         """
-        if not self._client:
-            logging.error("Client not initialized")
-            return 0
+        logging.info("Searching emails from today")
+        query = f"({self._today_query} {self._sender_query})"
+        logging.info(f"Query: {query}")
+        _, data = self._client.uid("SEARCH", None, query)
+        uids = data[0].split()
+        logging.info(f"Found {len(uids)} emails")
+        return uids
 
-        logging.info("Loading emails from today")
-        logging.info(f"Query: ({self._today_query} {self._sender_query})")
-        _, data = self._client.search(
-            None, f"({self._today_query} {self._sender_query})"
+    def _fetchHeaders(self, uids: list[bytes]) -> list[tuple[float, bytes, bytes]]:
+        """Fetch the arrival time and the headers of many emails at once.
+
+        Args:
+            uids (list[bytes]): UIDs of the emails.
+
+        Returns:
+            list[tuple[float, bytes, bytes]]: arrival timestamp, UID and
+                headers of each email, newest first.
+        """
+        message_set = b",".join(uids).decode("ascii")
+        _, data = self._client.uid(
+            "FETCH", message_set, "(UID INTERNALDATE BODY.PEEK[HEADER])"
         )
-        loaded_emails = data[0].split()
-        logging.info(f"Found {len(loaded_emails)} emails")
 
-        relevant_emails = []
+        headers = []
+        # each message is a (envelope, literal) tuple, followed by a b")"
+        for item in data:
+            if not isinstance(item, tuple):
+                continue
+
+            envelope, header = item
+            uid = re.search(rb"UID (\d+)", envelope)
+            internal_date = imaplib.Internaldate2tuple(envelope)
+            if uid is None or internal_date is None:
+                logging.warning(f"Skipping malformed FETCH response: {envelope}")
+                continue
+
+            headers.append((time.mktime(internal_date), uid.group(1), header))
 
-        for msg_id in loaded_emails:
-            _, data = self._client.fetch(msg_id, "(RFC822)")
-            msg = BytesParser(policy=default).parsebytes(data[0][1])
-            relevant_emails.append(msg)
+        headers.sort(reverse=True)
+        return headers
 
-        logging.info(f"Loaded {len(relevant_emails)} emails")
-        return relevant_emails
+    def _fetchText(self, uid: bytes) -> bytes:
+        """Fetch the text of an email, without its headers.
+
+        The email is not marked as read.
+
+        Args:
+            uid (bytes): UID of the email.
+
+        Returns:
+            bytes: Text of the email.
+        """
+        _, data = self._client.uid("FETCH", uid.decode("ascii"), "(BODY.PEEK[TEXT])")
+        for item in data:
+            if isinstance(item, tuple):
+                return item[1]
+
+        return b""
 
     def _extractEmailContent(self, email: EmailMessage) -> str:
         """Extract the content of an email.
@@ -114,6 +237,112 @@ class EmailClient:
         else:
             return email.get_payload(None, True).decode("utf-8")
 
+    def _findSecurityCode(self, uids: list[bytes], since: float = None) -> str:
+        """Look for the security code in some emails.
+
+        The headers of all the emails are fetched at once, then the text of
+        the emails is downloaded one at a time, newest first, until a code
+        is found.
+
+        Args:
+            uids (list[bytes]): UIDs of the emails.
+            since (float, optional): Timestamp before which the emails are
+                ignored. Defaults to None (no email is ignored).
+
+        Returns:
+            str: Security code found in the most recent email, or None.
+        """
+        for arrival, uid, header in self._fetchHeaders(uids):
+            if since is not None and arrival < since:
+                break
+
+            email = BytesParser(policy=default).parsebytes(
+                header + self._fetchText(uid)
+            )
+            content = self._extractEmailContent(email)
+            if m := re.findall(r">(\d{6})<", content, flags=re.MULTILINE):
+                logging.info(f"Found security code {m[0]}, date {email['Date']}")
+                return m[0]
+
+        logging.info("No security code found")
+        return None
+
+    def _buffered(self) -> bool:
+        """Check, without blocking, whether the server already sent something.
+
+        imaplib reads through a buffered file, so lines that arrived in the
+        same packet as the previous ones are already in the buffer, where
+        select can't see them. The buffer is peeked with the socket in non
+        blocking mode, which also pulls in the data decrypted by the SSL
+        layer but not yet read.
+
+        Returns:
+            bool: True if there's something to read.
+        """
+        sock = self._client.socket()
+        timeout = sock.gettimeout()
+        sock.setblocking(False)
+        try:
+            return len(self._client.file.peek(1)) > 0
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            sock.settimeout(timeout)
+
+    def _readable(self, timeout: float) -> bool:
+        """Wait until the server sends something.
+
+        Args:
+            timeout (float): maximum time to wait (in seconds)
+
+        Returns:
+            bool: True if there's something to read.
+        """
+        if self._buffered():
+            return True
+
+        readable, _, _ = select.select([self._client.socket()], [], [], timeout)
+        return bool(readable)
+
+    def _idle(self, timeout: float) -> bool:
+        """Wait for new emails with the IDLE command (RFC 2177).
+
+        imaplib doesn't implement IDLE, so the command is sent by hand.
+        If the server doesn't support it, this just waits a bit.
+
+        Args:
+            timeout (float): maximum time to wait (in seconds)
+
+        Raises:
+            EmailClientException: if the server refuses the command.
+
+        Returns:
+            bool: True if new emails arrived.
+        """
+        if "IDLE" not in self._client.capabilities:
+            time.sleep(min(timeout, self._poll_interval))
+            return False
+
+        tag = self._client._new_tag()
+        self._client.send(tag + b" IDLE\r\n")
+        line = self._client._get_line()
+        if not line.startswith(b"+"):
+            raise EmailClientException(f"IDLE refused by the server: {line}")
+
+        logging.info(f"Waiting up to {timeout:.0f} seconds for new emails")
+        arrived = False
+        deadline = time.monotonic() + timeout
+        while not arrived and (remaining := deadline - time.monotonic()) > 0:
+            if not self._readable(remaining):
+                break
+            arrived = self._client._get_line().endswith(b"EXISTS")
+
+        self._client.send(b"DONE\r\n")
+        while not (line := self._client._get_line()).startswith(tag):
+            arrived = arrived or line.endswith(b"EXISTS")
+
+        return arrived
+
     def getInstagramSecurityCode(self) -> str:
         """Extract the security code from the emails.
 
@@ -121,30 +350,81 @@ class EmailClient:
             str: Security code. If multiple codes are found,
                 the one found in the most recent email is returned.
         """
-        last_date = datetime.min
-        last_code = None
-
-        self._login()
-        relevant_emails = self._fetchRelevantEmails()
+        if not self._connect():
+            return None
 
-        if len(relevant_emails) == 0:
+        uids = self._searchRelevantEmails()
+        if len(uids) == 0:
             logging.error("No relevant emails found")
             return None
 
-        for email in relevant_emails:
-            content = self._extractEmailContent(email)
-            if m := re.findall(r">(\d{6})<", content, flags=re.MULTILINE):
-                date = datetime.strptime(email["Date"][:-6], "%a, %d %b %Y %H:%M:%S")
-                if date > last_date:
-                    logging.info(f"Found security code {m[0]}, date {date}")
-                    last_date = date
-                    last_code = m[0]
-
-        if last_code is None:
-            logging.info("No security code found")
-            return None
+        return self._findSecurityCode(uids)
+
+    def waitForInstagramSecurityCode(
+        self, timeout: float = 120, since: float = None
+    ) -> str:
+        """Wait for an email containing the security code.
 
-        return last_code
+        The emails already in the inbox are checked first, then the client
+        waits for new ones with IDLE, checking only the emails it didn't see
+        before. The connection is kept open and reopened if it drops, with
+        exponential backoff; a refused login stops the wait. If the server
+        refuses IDLE, the inbox is polled instead.
+
+        Args:
+            timeout (float, optional): Maximum time to wait (in seconds).
+                Defaults to 120.
+            since (float, optional): Timestamp before which the emails are
+                ignored, so that old codes are not used. Defaults to None.
+
+        Returns:
+            str: Security code, or None if it didn't arrive in time.
+        """
+        deadline = time.monotonic() + timeout
+        seen = set()
+
+        while (remaining := deadline - time.monotonic()) > 0:
+            # dropped connections and unreachable servers are retried with
+            # backoff, a refused login (any other IMAP error) is fatal
+            policy = RetryPolicy(
+                max_tries=self._settings.get("reconnect_max_tries", 5),
+                base_delay=1,
+                max_delay=self._settings.get("reconnect_max_delay", 30),
+                deadline=remaining,
+                retry_on=(imaplib.IMAP4.abort, OSError),
+            )
+            try:
+                policy.call(self._reconnect)
+            except (RetryException, imaplib.IMAP4.error) as e:
+                logging.error(f"Can't connect to email: {e}")
+                return None
+
+            try:
+                uids = [u for u in self._searchRelevantEmails() if u not in seen]
+                if uids:
+                    seen.update(uids)
+                    if (code := self._findSecurityCode(uids, since)) is not None:
+                        return code
+
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    try:
+                        self._idle(
+                            min(remaining, self._settings.get("idle_timeout", 60))
+                        )
+                    except EmailClientException as e:
+                        # poll the inbox instead
+                        logging.warning(e)
+                        time.sleep(min(remaining, self._poll_interval))
+            except (imaplib.IMAP4.abort, OSError) as e:
+                logging.warning(f"Email connection lost while waiting: {e}")
+                self.close()
+            except imaplib.IMAP4.error as e:
+                logging.error(f"Can't search the emails: {e}")
+                return None
+
+        logging.error("Security code not received in time")
+        return None
 
     @property
     def _today_query(self) -> str:
@@ -0,0 +1,103 @@
+"""Module containing the FileIdCache class."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+
+
+class FileIdCache:
+    """Class mapping the uploaded images to their Telegram file_id.
+
+    Once an image is uploaded, Telegram returns a file_id that can be sent
+    again to any chat without uploading the image again. Each entry stores
+    the modification time and the size of the image it was uploaded from,
+    so that a regenerated image is uploaded again. The mapping is saved to
+    a JSON file, to survive restarts of the bot.
+    """
+
+    _path: str
+    _entries: dict[str, dict]
+
+    def __init__(self, path: str) -> FileIdCache:
+        """Initialize the cache.
+
+        Args:
+            path (str): Path to the JSON file containing the cache.
+
+        Returns:
+            FileIdCache
+        """
+        self._path = path
+        self._entries = self._load()
+
+    def _load(self) -> dict[str, dict]:
+        """Load the cache from disk.
+
+        Returns:
+            dict[str, dict]: entries, by image path
+        """
+        try:
+            with open(self._path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self) -> None:
+        """Save the cache to disk."""
+        folder = os.path.dirname(self._path) or "."
+        os.makedirs(folder, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(temp_path, self._path)
+
+    @staticmethod
+    def _signature(image_path: str) -> dict[str, float]:
+        """Get the modification time and the size of an image."""
+        stat = os.stat(image_path)
+        return {"mtime": stat.st_mtime, "size": stat.st_size}
+
+    def get(self, image_path: str) -> str:
+        """Get the file_id of an image.
+
+        Args:
+            image_path (str): Path to the image.
+
+        Returns:
+            str: file_id, or None if the image was never uploaded or it
+                changed after the upload.
+        """
+        key = os.path.abspath(image_path)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        signature = self._signature(image_path)
+        if entry["mtime"] != signature["mtime"] or entry["size"] != signature["size"]:
+            logging.info(f"Image {image_path} changed since its upload")
+            self.invalidate(image_path)
+            return None
+
+        return entry["file_id"]
+
+    def set(self, image_path: str, file_id: str) -> None:
+        """Store the file_id of an uploaded image.
+
+        Args:
+            image_path (str): Path to the image.
+            file_id (str): file_id returned by Telegram.
+        """
+        key = os.path.abspath(image_path)
+        self._entries[key] = {"file_id": file_id, **self._signature(image_path)}
+        self._save()
+
+    def invalidate(self, image_path: str) -> None:
+        """Remove an image from the cache.
+
+        Args:
+            image_path (str): Path to the image.
+        """
+        if self._entries.pop(os.path.abspath(image_path), None) is not None:
+            self._save()
@@ -0,0 +1,171 @@
+"""Module containing the FontCatalogue class."""
+from __future__ import annotations
+
+import logging
+import os
+import random
+import time
+
+from .font_metrics import FontPool
+
+
+class FontCatalogueException(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class FontCatalogue:
+    """Class containing the index of the fonts usable in the images.
+
+    The fonts folder is scanned only once, and then rescanned only when its
+    modification time changes. The modification time itself is checked at
+    most once every `check_interval` seconds, so that a slow (e.g. network
+    mounted) folder is not hit on every render.
+
+    Every font is validated when scanned: it must load and it must be able
+    to render the Italian accented letters. The loaded fonts are kept in the
+    pool, so that the selection and the size fitting reuse them.
+    """
+
+    _folder: str
+    _pool: FontPool
+    _fonts: list[str]
+    _mtime: float
+    _last_check: float
+    _check_interval: float
+
+    _extension: str = ".ttf"
+    _required_glyphs: str = "àèéìòùÀÈÉÌÒÙ"
+    _validation_size: int = 100
+
+    def __init__(
+        self, folder: str, pool: FontPool = None, check_interval: float = 60
+    ) -> FontCatalogue:
+        """Initialize the catalogue.
+
+        Args:
+            folder (str): Folder containing the fonts.
+            pool (FontPool, optional): Pool to load the fonts in.
+                Defaults to a new pool.
+            check_interval (float, optional): Minimum time (in seconds)
+                between two checks of the folder. Defaults to 60.
+
+        Returns:
+            FontCatalogue
+        """
+        self._folder = folder
+        self._pool = pool if pool is not None else FontPool()
+        self._fonts = []
+        self._mtime = None
+        self._last_check = None
+        self._check_interval = check_interval
+        self.refresh(force=True)
+
+    def __len__(self) -> int:
+        """Return the number of usable fonts."""
+        return len(self._fonts)
+
+    def _hasGlyphs(self, path: str) -> bool:
+        """Check whether a font can render all the required glyphs.
+
+        A missing glyph is rendered either as nothing or as the same
+        "missing glyph" box returned for a noncharacter.
+
+        Args:
+            path (str): path to the font file
+
+        Returns:
+            bool
+        """
+        font = self._pool.get(path, self._validation_size)
+        missing = bytes(font.getmask("\U0010FFFD"))
+
+        for glyph in self._required_glyphs:
+            mask = font.getmask(glyph)
+            if mask.getbbox() is None or bytes(mask) == missing:
+                logging.warning(f"Font {path} can't render {glyph}")
+                return False
+
+        return True
+
+    def _validate(self, path: str) -> bool:
+        """Check whether a font is usable.
+
+        Args:
+            path (str): path to the font file
+
+        Returns:
+            bool
+        """
+        try:
+            return self._hasGlyphs(path)
+        except OSError as e:
+            logging.warning(f"Font {path} can't be loaded: {e}")
+            return False
+
+    def _scan(self) -> None:
+        """Scan the folder, keeping only the usable fonts."""
+        logging.info(f"Scanning fonts in {self._folder}")
+        fonts = []
+        with os.scandir(self._folder) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self._extension) or not entry.is_file():
+                    continue
+                if self._validate(entry.path):
+                    fonts.append(entry.path)
+
+        # sort the fonts so that the selection only depends on the seed
+        self._fonts = sorted(fonts)
+        logging.info(f"Found {len(self._fonts)} usable fonts")
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rescan the folder if it was modified since the last scan.
+
+        Args:
+            force (bool, optional): If True, the folder is checked even if the
+                check interval has not passed yet. Defaults to False.
+
+        Returns:
+            bool: True if the folder was rescanned.
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self._last_check is not None
+            and now - self._last_check < self._check_interval
+        ):
+            return False
+
+        self._last_check = now
+        mtime = os.stat(self._folder).st_mtime
+        if mtime == self._mtime:
+            return False
+
+        self._mtime = mtime
+        self._scan()
+        return True
+
+    def choice(self, rng: random.Random) -> str:
+        """Randomly select a font.
+
+        Args:
+            rng (random.Random): Seeded random generator.
+
+        Raises:
+            FontCatalogueException: if there are no usable fonts.
+
+        Returns:
+            str: Path to the font.
+        """
+        self.refresh()
+        if not self._fonts:
+            raise FontCatalogueException(f"No usable fonts in {self._folder}")
+
+        return rng.choice(self._fonts)
+
+    @property
+    def fonts(self) -> list[str]:
+        """Paths of the usable fonts."""
+        self.refresh()
+        return list(self._fonts)
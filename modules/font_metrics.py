@@ -0,0 +1,210 @@
+"""Module containing the classes used to measure and fit text to fonts."""
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from typing import Iterable
+
+from PIL import ImageFont
+
+
+class FontPool:
+    """Class containing a LRU cache of loaded fonts.
+
+    Loading a FreeTypeFont means parsing the font file, so each face is
+    loaded only once for each size and kept until it's the least recently
+    used one and the pool is full.
+    """
+
+    _fonts: OrderedDict[tuple[str, int], ImageFont.FreeTypeFont]
+    _max_size: int
+
+    def __init__(self, max_size: int = 64) -> FontPool:
+        """Initialize the pool.
+
+        Args:
+            max_size (int, optional): Maximum number of fonts kept in memory.
+                Defaults to 64.
+
+        Returns:
+            FontPool
+        """
+        self._fonts = OrderedDict()
+        self._max_size = max_size
+
+    def __len__(self) -> int:
+        """Return the number of fonts in the pool."""
+        return len(self._fonts)
+
+    def get(self, path: str, size: int) -> ImageFont.FreeTypeFont:
+        """Get a font, loading it if needed.
+
+        Args:
+            path (str): Path to the font file.
+            size (int): Size of the font.
+
+        Returns:
+            ImageFont.FreeTypeFont
+        """
+        key = (path, size)
+        if key in self._fonts:
+            self._fonts.move_to_end(key)
+            return self._fonts[key]
+
+        font = ImageFont.FreeTypeFont(path, size)
+        self._fonts[key] = font
+        if len(self._fonts) > self._max_size:
+            self._fonts.popitem(last=False)
+
+        return font
+
+    def clear(self) -> None:
+        """Remove all the fonts from the pool."""
+        self._fonts.clear()
+
+
+class FontMetrics:
+    """Class handling the measurement of text and the fitting of font sizes.
+
+    For each font, a table with the advance of every character of the
+    alphabet is measured once at a reference size. The table gives a cheap
+    estimate of the size fitting a text, which is then refined by a binary
+    search over the measured widths.
+    """
+
+    _pool: FontPool
+    _alphabet: str
+    _width_tables: dict[str, dict[str, float]]
+    _reference_size: int = 100
+
+    def __init__(self, pool: FontPool = None, alphabet: Iterable[str] = "") -> None:
+        """Initialize the metrics engine.
+
+        Args:
+            pool (FontPool, optional): Pool to load the fonts from.
+                Defaults to a new pool.
+            alphabet (Iterable[str], optional): Characters measured in the
+                width tables. Defaults to none.
+        """
+        self._pool = pool if pool is not None else FontPool()
+        self._alphabet = "".join(sorted(set(alphabet)))
+        self._width_tables = {}
+
+    @property
+    def pool(self) -> FontPool:
+        """Pool the fonts are loaded from."""
+        return self._pool
+
+    def getFont(self, path: str, size: int) -> ImageFont.FreeTypeFont:
+        """Get a font from the pool.
+
+        Args:
+            path (str): Path to the font file.
+            size (int): Size of the font.
+
+        Returns:
+            ImageFont.FreeTypeFont
+        """
+        return self._pool.get(path, size)
+
+    def textWidth(self, text: str, path: str, size: int) -> int:
+        """Measure the width of a text.
+
+        Args:
+            text (str): text to measure
+            path (str): path to the font file
+            size (int): size of the font
+
+        Returns:
+            int: right coordinate of the bounding box of the text
+        """
+        _, __, w, ___ = self._pool.get(path, size).getbbox(text=text)
+        return w
+
+    def widthTable(self, path: str) -> dict[str, float]:
+        """Get the table of the character advances of a font.
+
+        The advances are measured at the reference size.
+
+        Args:
+            path (str): path to the font file
+
+        Returns:
+            dict[str, float]: advance of each character of the alphabet
+        """
+        if path not in self._width_tables:
+            logging.info(f"Building width table for {path}")
+            font = self._pool.get(path, self._reference_size)
+            self._width_tables[path] = {c: font.getlength(c) for c in self._alphabet}
+
+        return self._width_tables[path]
+
+    def estimateSize(self, text: str, path: str, max_width: float) -> int:
+        """Estimate the size of a font fitting a text in a given width.
+
+        Args:
+            text (str): text to fit
+            path (str): path to the font file
+            max_width (float): maximum width of the text (in pixels)
+
+        Returns:
+            int: estimated size, or None if no estimate is possible
+        """
+        table = self.widthTable(path)
+        if not table or not text:
+            return None
+
+        average = sum(table.values()) / len(table)
+        width = sum(table.get(c, average) for c in text)
+        if width <= 0:
+            return None
+
+        return int(max_width * self._reference_size / width)
+
+    def fitFont(
+        self, text: str, path: str, max_width: float, max_size: int = 100
+    ) -> int:
+        """Find the biggest font size that fits a text in a given width.
+
+        Args:
+            text (str): text to fit
+            path (str): path to the font file
+            max_width (float): maximum width of the text (in pixels)
+            max_size (int, optional): maximum size of the font.
+                Defaults to 100.
+
+        Returns:
+            int: size of the font
+        """
+
+        def fits(size: int) -> bool:
+            return self.textWidth(text, path, size) < max_width
+
+        # invariant: lo fits (size 0 always does), hi doesn't
+        lo, hi = 0, max_size + 1
+
+        guess = self.estimateSize(text, path, max_width)
+        if guess is not None and 1 <= guess <= max_size:
+            # gallop away from the estimate to bracket the best size
+            step = max(1, guess // 16)
+            if fits(guess):
+                lo = guess
+                while lo + step < hi and fits(lo + step):
+                    lo += step
+                    step *= 2
+                hi = min(hi, lo + step)
+            else:
+                hi = guess
+                while hi - step > lo and not fits(hi - step):
+                    hi -= step
+                    step *= 2
+                lo = max(lo, hi - step)
+
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if fits(mid):
+                lo = mid
+            else:
+                hi = mid
+
+        return max(lo, 1)
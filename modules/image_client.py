@@ -0,0 +1,205 @@
+"""Module containing the asynchronous client used to get the AI images."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import tempfile
+
+import aiohttp
+
+
+class ImageClientException(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class ImageClient:
+    """Class handling the generation and the download of the AI images.
+
+    Images are requested to an OpenAI compatible images endpoint, then
+    streamed to a temporary file in the destination folder and atomically
+    renamed, so that a partially downloaded image is never visible.
+    At most `max_concurrency` prompts are in flight at the same time.
+    """
+
+    _api_key: str
+    _api_base: str
+    _image_size: str
+    _max_concurrency: int
+    _timeout: aiohttp.ClientTimeout
+    _chunk_size: int = 64 * 1024
+
+    def __init__(
+        self,
+        api_key: str,
+        api_base: str = "https://api.openai.com/v1",
+        image_size: str = "512x512",
+        max_concurrency: int = 4,
+        connect_timeout: float = 10,
+        read_timeout: float = 120,
+    ) -> ImageClient:
+        """Initialize the client.
+
+        Args:
+            api_key (str): Key of the API.
+            api_base (str, optional): Base URL of the API.
+                Defaults to the OpenAI API.
+            image_size (str, optional): Size of the images.
+                Defaults to "512x512".
+            max_concurrency (int, optional): Maximum number of prompts
+                handled at the same time. Defaults to 4.
+            connect_timeout (float, optional): Timeout (in seconds) to
+                connect to a server. Defaults to 10.
+            read_timeout (float, optional): Timeout (in seconds) between two
+                reads from a server. Defaults to 120.
+
+        Returns:
+            ImageClient
+        """
+        self._api_key = api_key
+        self._api_base = api_base.rstrip("/")
+        self._image_size = image_size
+        self._max_concurrency = max_concurrency
+        self._timeout = aiohttp.ClientTimeout(
+            sock_connect=connect_timeout, sock_read=read_timeout
+        )
+
+    @property
+    def image_size(self) -> str:
+        """Size of the requested images."""
+        return self._image_size
+
+    def _createSession(self) -> aiohttp.ClientSession:
+        """Create the HTTP session used for a batch of requests.
+
+        Returns:
+            aiohttp.ClientSession
+        """
+        connector = aiohttp.TCPConnector(limit=self._max_concurrency * 2)
+        return aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+
+    async def _generate(self, session: aiohttp.ClientSession, prompt: str) -> str:
+        """Request an image to the API.
+
+        Args:
+            session (aiohttp.ClientSession): session to use
+            prompt (str): prompt of the image
+
+        Raises:
+            ImageClientException: if the API returns an error.
+
+        Returns:
+            str: URL of the generated image
+        """
+        logging.info("Requesting image from OpenAI")
+        async with session.post(
+            f"{self._api_base}/images/generations",
+            headers={"Authorization": f"Bearer {self._api_key}"},
+            json={"prompt": prompt, "n": 1, "size": self._image_size},
+        ) as r:
+            if r.status != 200:
+                raise ImageClientException(
+                    f"Image request failed with status {r.status}: {await r.text()}"
+                )
+            data = await r.json()
+
+        logging.info("Image received from OpenAI")
+        return data["data"][0]["url"]
+
+    async def _download(
+        self, session: aiohttp.ClientSession, url: str, path: str
+    ) -> None:
+        """Stream an image to a file.
+
+        Args:
+            session (aiohttp.ClientSession): session to use
+            url (str): url of the image
+            path (str): destination path
+
+        Raises:
+            ImageClientException: if the server returns an error.
+        """
+        logging.info(f"Downloading image from {url}")
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".", suffix=".part"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                async with session.get(url) as r:
+                    if r.status != 200:
+                        raise ImageClientException(
+                            f"Image download failed with status {r.status}"
+                        )
+                    async for chunk in r.content.iter_chunked(self._chunk_size):
+                        f.write(chunk)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        logging.info(f"Image downloaded to {path}")
+
+    async def _fetch(
+        self,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        prompt: str,
+        path: str,
+    ) -> str:
+        """Generate and download a single image.
+
+        Args:
+            session (aiohttp.ClientSession): session to use
+            semaphore (asyncio.Semaphore): semaphore limiting the concurrency
+            prompt (str): prompt of the image
+            path (str): destination path
+
+        Returns:
+            str: path to the image
+        """
+        async with semaphore:
+            url = await self._generate(session, prompt)
+            await self._download(session, url, path)
+        return path
+
+    async def fetch(self, prompt: str, path: str) -> str:
+        """Generate an image and download it.
+
+        Args:
+            prompt (str): Prompt of the image.
+            path (str): Destination path.
+
+        Returns:
+            str: Path to the image.
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._createSession() as session:
+            return await self._fetch(session, semaphore, prompt, path)
+
+    async def fetchMany(self, requests: list[tuple[str, str]]) -> list[str]:
+        """Generate and download many images concurrently.
+
+        A failure doesn't stop the other downloads: it's logged and the
+        corresponding result is None.
+
+        Args:
+            requests (list[tuple[str, str]]): Prompt and destination path
+                of each image.
+
+        Returns:
+            list[str]: Path to each image, or None if it failed.
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._createSession() as session:
+            results = await asyncio.gather(
+                *(self._fetch(session, semaphore, p, path) for p, path in requests),
+                return_exceptions=True,
+            )
+
+        for (_, path), result in zip(requests, results):
+            if isinstance(result, BaseException):
+                logging.error(f"Error while getting image {path}: {result}")
+
+        return [None if isinstance(r, BaseException) else r for r in results]
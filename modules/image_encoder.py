@@ -0,0 +1,128 @@
+"""Module containing the ImageEncoder class."""
+from __future__ import annotations
+
+import io
+import logging
+import os
+import tempfile
+
+from PIL import Image
+
+
+class ImageEncoder:
+    """Class handling the encoding of the images for the social networks.
+
+    Images are encoded as JPEG in memory, scaled down to a maximum side and
+    compressed until they fit a maximum size. The encoded image is cached
+    next to the source one (same name, .jpg extension), so that retries and
+    the other platforms reuse it until the source image changes.
+    """
+
+    _quality: int
+    _min_quality: int
+    _max_bytes: int
+    _max_side: int
+
+    def __init__(
+        self,
+        quality: int = 90,
+        min_quality: int = 60,
+        max_bytes: int = 8 * 1024 * 1024,
+        max_side: int = 1080,
+    ) -> ImageEncoder:
+        """Initialize the encoder.
+
+        Args:
+            quality (int, optional): Starting JPEG quality. Defaults to 90.
+            min_quality (int, optional): Lowest JPEG quality used to fit the
+                maximum size. Defaults to 60.
+            max_bytes (int, optional): Maximum size of the encoded image.
+                Defaults to 8 MB.
+            max_side (int, optional): Maximum width and height of the
+                encoded image. Defaults to 1080.
+
+        Returns:
+            ImageEncoder
+        """
+        self._quality = quality
+        self._min_quality = min_quality
+        self._max_bytes = max_bytes
+        self._max_side = max_side
+
+    def encode(self, image_path: str) -> bytes:
+        """Encode an image as JPEG.
+
+        Args:
+            image_path (str): Path to the source image.
+
+        Returns:
+            bytes: JPEG encoded image
+        """
+        logging.info(f"Encoding {image_path} to JPEG")
+        with Image.open(image_path) as source:
+            return self.encodeImage(source)
+
+    def encodeImage(self, image: Image.Image) -> bytes:
+        """Encode an already loaded image as JPEG.
+
+        Args:
+            image (Image.Image): Source image.
+
+        Returns:
+            bytes: JPEG encoded image
+        """
+        image = image.convert("RGB")
+        image.thumbnail((self._max_side, self._max_side), Image.LANCZOS)
+
+        quality = self._quality
+        while True:
+            buffer = io.BytesIO()
+            image.save(buffer, "JPEG", quality=quality, optimize=True)
+            if buffer.tell() <= self._max_bytes or quality <= self._min_quality:
+                break
+            quality = max(self._min_quality, quality - 5)
+
+        logging.info(f"Image encoded with quality {quality}, {buffer.tell()} bytes")
+        return buffer.getvalue()
+
+    def cachedPath(self, image_path: str) -> str:
+        """Get the path of the JPEG version of an image, encoding it if needed.
+
+        Args:
+            image_path (str): Path to the source image.
+
+        Returns:
+            str: Path to the JPEG image.
+        """
+        jpeg_path = os.path.splitext(image_path)[0] + ".jpg"
+        if jpeg_path == image_path:
+            return image_path
+
+        if os.path.isfile(jpeg_path) and os.path.getmtime(
+            jpeg_path
+        ) >= os.path.getmtime(image_path):
+            logging.info(f"Reusing encoded image {jpeg_path}")
+            return jpeg_path
+
+        data = self.encode(image_path)
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(jpeg_path) or ".", suffix=".part"
+        )
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, jpeg_path)
+
+        logging.info(f"Encoded image cached to {jpeg_path}")
+        return jpeg_path
+
+    def cachedBytes(self, image_path: str) -> bytes:
+        """Get the JPEG version of an image, encoding it if needed.
+
+        Args:
+            image_path (str): Path to the source image.
+
+        Returns:
+            bytes: JPEG encoded image
+        """
+        with open(self.cachedPath(image_path), "rb") as f:
+            return f.read()
@@ -3,8 +3,8 @@ from __future__ import annotations
 
 import logging
 import os
+import time
 from pathlib import Path
-from time import sleep
 from typing import Any
 
 import toml
@@ -12,9 +12,9 @@ import ujson
 from instagrapi import Client
 from instagrapi.exceptions import ClientForbiddenError, LoginRequired
 from instagrapi.mixins.challenge import ChallengeChoice
-from PIL import Image
 
 from modules.email_client import EmailClient, EmailClientException
+from modules.image_encoder import ImageEncoder
 
 
 class Instagram:
@@ -22,6 +22,7 @@ class Instagram:
 
     _settings: dict[str, Any]
     _client: Client
+    _encoder: ImageEncoder
 
     def __init__(self, path="settings.toml") -> Instagram:
         """Initialize the bot.
@@ -31,16 +32,13 @@ class Instagram:
         """
         logging.info("Initializing Instagram")
         self._settings = self._loadSettings(path)
-        self._createTempFolder()
-
-    def _createTempFolder(self) -> None:
-        """Create folder structure."""
-        os.makedirs(self._settings["temp_folder"], exist_ok=True)
-
-    def _cleanTempFolder(self) -> None:
-        """Clean the temporary folder."""
-        for file in os.listdir(self._settings["temp_folder"]):
-            os.remove(os.path.join(self._settings["temp_folder"], file))
+        self._client = None
+        self._encoder = ImageEncoder(
+            quality=self._settings.get("jpeg_quality", 90),
+            min_quality=self._settings.get("jpeg_min_quality", 60),
+            max_bytes=self._settings.get("jpeg_max_kb", 8192) * 1024,
+            max_side=self._settings.get("jpeg_max_side", 1080),
+        )
 
     def _loadSettings(self, path: str) -> dict:
         """Load settings from a TOML file.
@@ -60,7 +58,7 @@ class Instagram:
 
         try:
             with open(self._settings["instagram_settings_path"], "r") as f:
-                self._client.settings = ujson.load(f)
+                self._client.set_settings(ujson.load(f))
             return True
         except Exception as e:
             logging.error(f"Error loading Instagram settings: {e}")
@@ -78,42 +76,17 @@ class Instagram:
 
     def _challengeCodeHandler(self, _: ChallengeChoice, *__: Any) -> str:
         logging.info("Challenge code required.")
-        email_client = EmailClient()
-
-        tries = 0
-        max_tries = 4
-        sleep_time = 5
-
-        while True:
-            try:
-                return email_client.getInstagramSecurityCode()
-            except EmailClientException:
-                logging.info(
-                    f"No relevant email found. Retrying in {sleep_time} seconds. "
-                    f"Attempt {tries+1}/{max_tries}"
-                )
-                tries += 1
-                if tries >= max_tries:
-                    raise Exception("Too many attempts")
-                sleep(sleep_time)
-
-    def _convertToJPEG(self, image_path: str, destination: str) -> str:
-        """Convert an image to JPEG.
-
-        Args:
-            image_path (str): Path to the source image.
-
-        Returns:
-            str: Path to the JPEG image.
-        """
-        logging.info(f"Converting {image_path} to JPEG")
-
-        filename = image_path.split("/")[-1].split(".")[0]
-        image = Image.open(image_path).convert("RGB")
-        jpeg_path = os.path.join(destination, f"{filename}.jpg")
-        image.save(jpeg_path, "JPEG")
-        logging.info(f"Image converted to {jpeg_path}")
-        return jpeg_path
+        # codes sent before the challenge started are not valid anymore
+        since = time.time() - self._settings.get("challenge_max_age", 300)
+        # the email client retries the lost connections with a RetryPolicy
+        with EmailClient() as email_client:
+            code = email_client.waitForInstagramSecurityCode(
+                timeout=self._settings.get("challenge_deadline", 120), since=since
+            )
+
+        if code is None:
+            raise EmailClientException("Security code not received")
+        return code
 
     def login(self, use_proxy: bool = False, try_again: bool = True) -> bool:
         """Login to Instagram.
@@ -138,7 +111,6 @@ class Instagram:
         settings_exist = self._tryLoadInstagramSettings()
         if settings_exist:
             logging.info("Instagram settings loaded from file")
-            self._client.load_settings(self._settings["instagram_settings_path"])
         else:
             logging.info("Instagram settings not found. Creating new ones")
             self._client.set_locale("it_IT")
@@ -167,6 +139,29 @@ class Instagram:
 
         return True
 
+    def checkSession(self) -> bool:
+        """Check whether the current session is still valid.
+
+        Returns:
+            bool: True if the session is valid.
+        """
+        if not self.logged_in:
+            return False
+
+        try:
+            self._client.account_info()
+        except (LoginRequired, ClientForbiddenError) as e:
+            logging.warning(f"Instagram session is not valid anymore: {e}")
+            return False
+
+        self._saveInstagramSettings()
+        return True
+
+    @property
+    def logged_in(self) -> bool:
+        """Whether a login was completed."""
+        return self._client is not None and bool(self._client.user_id)
+
     def logout(self) -> None:
         """Logout from Instagram."""
         logging.info("Logging out from Instagram")
@@ -182,19 +177,10 @@ class Instagram:
         """
         logging.info(f"Uploading image {image_path} to Instagram")
 
-        delete_after = False
-        if not image_path.endswith(".jpg"):
-            delete_after = True
-            image_path = self._convertToJPEG(image_path, self._settings["temp_folder"])
-
-        path = Path(image_path)
-        self._client.photo_upload(path, image_caption)
+        jpeg_path = self._encoder.cachedPath(image_path)
+        self._client.photo_upload(Path(jpeg_path), image_caption)
         logging.info(f"Image {image_path} uploaded to Instagram")
 
-        if delete_after:
-            logging.info("Cleaning temporary folder")
-            self._cleanTempFolder()
-
     @property
     def proxy(self) -> str:
         """Return the proxy URL representation."""
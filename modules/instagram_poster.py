@@ -4,8 +4,10 @@ from __future__ import annotations
 import logging
 from datetime import datetime
 
-from modules.instagram import Instagram
-from modules.saint_factory import SaintFactory
+from instagrapi.exceptions import ClientForbiddenError
+
+from modules.artifact_store import ArtifactStore
+from modules.instagram_session import InstagramSession
 
 from .scheduler import Scheduler
 
@@ -13,37 +15,48 @@ from .scheduler import Scheduler
 class InstagramPoster(Scheduler):
     """Class handling the logic of the instagram poster."""
 
-    _factory: SaintFactory
-    _instagram: Instagram
+    _store: ArtifactStore
+    _session: InstagramSession
     _post_time: datetime
 
+    _fatal_exceptions = (ClientForbiddenError,)
+
     def __init__(self) -> InstagramPoster:
         """Initialize the poster."""
         logging.info("Initializing instagram poster")
         super().__init__()
-        self._factory = SaintFactory()
-        self._instagram = Instagram()
+        self._store = ArtifactStore()
+        self._session = InstagramSession(
+            check_interval=self._settings.get("session_check_interval", 3600),
+            refresh_interval=self._settings.get("session_refresh_interval", 21600),
+        )
         self._post_time = self.loadScheduleTime("post_time")
 
     def start(self) -> None:
         """Loop the poster."""
         logging.info("Starting instagram poster loop")
-        super().start("post_time", self.upload)
+        # log in before the first post, so that the session is ready
+        self.tryFunction(self._session.ensure)
+        try:
+            super().start("post_time", self.upload)
+        finally:
+            self._session.close()
 
     def upload(self) -> None:
-        """Publish a post."""
-        if not self.tryFunction(self._instagram.login):
+        """Publish a post.
+
+        The session is kept logged in between posts.
+        """
+        if not self.tryFunction(self._session.ensure):
             return
 
         if not self.tryFunction(self._uploadImage):
             return
 
-        self._instagram.logout()
-
         logging.info("Upload done")
 
     def _uploadImage(self) -> None:
         """Upload the image."""
-        saint = self._factory.generateSaint()
+        saint = self._store.load()
         caption = saint.bio + "\n\n#santodelgiorno #santinoquotidiano"
-        self._instagram.uploadImage(image_path=saint.image_path, image_caption=caption)
+        self._session.uploadImage(image_path=saint.image_path, image_caption=caption)
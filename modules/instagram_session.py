@@ -0,0 +1,141 @@
+"""Module containing the InstagramSession class."""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from instagrapi.exceptions import LoginRequired
+
+from modules.instagram import Instagram
+
+
+class InstagramSession:
+    """Class keeping a long lived, logged in Instagram client.
+
+    Instead of logging in and out around every post, the client is kept
+    logged in. The session is checked against Instagram only if it was not
+    used for `check_interval` seconds, and it's refreshed in background
+    every `refresh_interval` seconds, so that it doesn't expire between
+    two posts. A full login is done again only when Instagram reports that
+    the session is not valid anymore.
+    """
+
+    _instagram: Instagram
+    _lock: threading.RLock
+    _last_check: float
+    _check_interval: float
+    _refresh_interval: float
+    _timer: threading.Timer
+
+    def __init__(
+        self,
+        instagram: Instagram = None,
+        check_interval: float = 3600,
+        refresh_interval: float = 6 * 3600,
+    ) -> InstagramSession:
+        """Initialize the session.
+
+        Args:
+            instagram (Instagram, optional): Instagram client to keep logged in.
+                Defaults to a new client.
+            check_interval (float, optional): Time (in seconds) after which
+                the session is checked before being used. Defaults to an hour.
+            refresh_interval (float, optional): Time (in seconds) between
+                two background refreshes. Defaults to six hours.
+
+        Returns:
+            InstagramSession
+        """
+        self._instagram = instagram if instagram is not None else Instagram()
+        self._lock = threading.RLock()
+        self._last_check = None
+        self._check_interval = check_interval
+        self._refresh_interval = refresh_interval
+        self._timer = None
+
+    def _login(self) -> None:
+        """Log in from scratch."""
+        logging.info("Logging in a new Instagram session")
+        self._instagram.login()
+        self._last_check = time.monotonic()
+        self._scheduleRefresh()
+
+    def _scheduleRefresh(self) -> None:
+        """Schedule the next background refresh."""
+        if self._timer is not None:
+            self._timer.cancel()
+
+        self._timer = threading.Timer(self._refresh_interval, self._refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _refresh(self) -> None:
+        """Refresh the session in background."""
+        logging.info("Refreshing Instagram session")
+        try:
+            with self._lock:
+                self._last_check = None
+                self.ensure()
+        except Exception as e:
+            logging.error(f"Error while refreshing Instagram session: {e}")
+            self._scheduleRefresh()
+
+    def ensure(self) -> Instagram:
+        """Get the client, making sure that it's logged in.
+
+        Returns:
+            Instagram
+        """
+        with self._lock:
+            if not self._instagram.logged_in:
+                self._login()
+                return self._instagram
+
+            now = time.monotonic()
+            if (
+                self._last_check is None
+                or now - self._last_check > self._check_interval
+            ):
+                if not self._instagram.checkSession():
+                    self._login()
+                    return self._instagram
+
+                self._last_check = now
+                self._scheduleRefresh()
+
+            return self._instagram
+
+    def uploadImage(self, image_path: str, image_caption: str) -> None:
+        """Upload an image to Instagram with the current session.
+
+        If the session turns out to be expired, it's invalidated and the
+        error is raised, so the next try logs in again.
+
+        Args:
+            image_path (str): path of the image to upload
+            image_caption (str): caption of the image
+        """
+        with self._lock:
+            instagram = self.ensure()
+            try:
+                instagram.uploadImage(
+                    image_path=image_path, image_caption=image_caption
+                )
+            except LoginRequired:
+                self.invalidate()
+                raise
+
+            self._last_check = time.monotonic()
+
+    def invalidate(self) -> None:
+        """Force a check of the session before its next use."""
+        with self._lock:
+            self._last_check = None
+
+    def close(self) -> None:
+        """Stop the background refresh, keeping the session saved."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
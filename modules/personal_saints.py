@@ -0,0 +1,232 @@
+"""Module containing the PersonalSaints class."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from .saint import Saint
+from .saint_factory import SaintFactory, initWorker, renderInWorker
+
+
+class PersonalSaintsException(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class TokenBucket:
+    """Class limiting the rate of the requests of each user.
+
+    Each user has a bucket holding up to `burst` tokens, refilled at `rate`
+    tokens per second; every request takes a token. Only the buckets of the
+    most recent users are kept, a forgotten user simply starts again from a
+    full bucket.
+    """
+
+    _rate: float
+    _burst: float
+    _max_users: int
+    _buckets: OrderedDict[int, tuple[float, float]]
+
+    def __init__(self, rate: float, burst: float, max_users: int = 4096) -> TokenBucket:
+        """Initialize the limiter.
+
+        Args:
+            rate (float): Tokens added to each bucket every second.
+            burst (float): Maximum number of tokens in a bucket.
+            max_users (int, optional): Maximum number of buckets kept.
+                Defaults to 4096.
+
+        Returns:
+            TokenBucket
+        """
+        self._rate = rate
+        self._burst = burst
+        self._max_users = max_users
+        self._buckets = OrderedDict()
+
+    def allow(self, user_id: int) -> bool:
+        """Take a token from the bucket of a user, if there's any.
+
+        Args:
+            user_id (int): Id of the user.
+
+        Returns:
+            bool: True if the request is allowed.
+        """
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(user_id, (self._burst, now))
+        tokens = min(self._burst, tokens + (now - last) * self._rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        self._buckets[user_id] = (tokens, now)
+        if len(self._buckets) > self._max_users:
+            self._buckets.popitem(last=False)
+
+        return allowed
+
+
+class PersonalSaints:
+    """Class handling the saints generated on demand for each user.
+
+    The saint of a user is seeded by the user id and by the day, so each
+    user gets a different saint every day. The saints themselves are cheap
+    to create and are created on the spot, while their cards are rendered
+    by a bounded pool of worker processes. The most recent cards are kept
+    in a LRU cache, concurrent requests of the same card share the same
+    render and, when too many renders are waiting, new ones are refused.
+    """
+
+    _factory: SaintFactory
+    _template: str
+    _max_workers: int
+    _max_pending: int
+    _cache_size: int
+    _cache: OrderedDict[str, bytes]
+    _in_flight: dict[str, asyncio.Future]
+    _limiter: TokenBucket
+    _executor: ProcessPoolExecutor
+
+    def __init__(
+        self,
+        factory: SaintFactory,
+        template: str = "compact",
+        max_workers: int = 2,
+        max_pending: int = 32,
+        cache_size: int = 128,
+        rate: float = 0.05,
+        burst: float = 3,
+    ) -> PersonalSaints:
+        """Initialize the personal saints.
+
+        Args:
+            factory (SaintFactory): Factory used to create the saints.
+            template (str, optional): Name of the template of the cards.
+                Defaults to "compact".
+            max_workers (int, optional): Number of worker processes.
+                Defaults to 2.
+            max_pending (int, optional): Maximum number of renders waiting
+                or in progress. Defaults to 32.
+            cache_size (int, optional): Maximum number of cards kept in
+                memory. Defaults to 128.
+            rate (float, optional): Requests per second allowed to each
+                user, on average. Defaults to 0.05 (3 per minute).
+            burst (float, optional): Maximum number of consecutive requests
+                allowed to each user. Defaults to 3.
+
+        Returns:
+            PersonalSaints
+        """
+        self._factory = factory
+        self._template = template
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+        self._in_flight = {}
+        self._limiter = TokenBucket(rate=rate, burst=burst)
+        self._executor = None
+
+    @staticmethod
+    def _seed(user_id: int, day: date) -> str:
+        """Get the seed of the saint of a user."""
+        return f"{user_id}-{day.strftime('%Y%m%d')}"
+
+    def allow(self, user_id: int) -> bool:
+        """Check whether a user can make a request now.
+
+        Args:
+            user_id (int): Id of the user.
+
+        Returns:
+            bool
+        """
+        return self._limiter.allow(user_id)
+
+    def saint(self, user_id: int, day: date = None) -> Saint:
+        """Create the saint of a user.
+
+        Args:
+            user_id (int): Id of the user.
+            day (date, optional): Day of the saint. Defaults to today.
+
+        Returns:
+            Saint
+        """
+        if day is None:
+            day = date.today()
+
+        return self._factory.createSaint(self._seed(user_id, day))
+
+    async def image(self, user_id: int, day: date = None) -> bytes:
+        """Get the card of the saint of a user, rendering it if needed.
+
+        Args:
+            user_id (int): Id of the user.
+            day (date, optional): Day of the saint. Defaults to today.
+
+        Raises:
+            PersonalSaintsException: if too many renders are pending.
+
+        Returns:
+            bytes: JPEG encoded card
+        """
+        if day is None:
+            day = date.today()
+
+        seed = self._seed(user_id, day)
+        if seed in self._cache:
+            self._cache.move_to_end(seed)
+            return self._cache[seed]
+
+        future = self._in_flight.get(seed)
+        if future is None:
+            if len(self._in_flight) >= self._max_pending:
+                raise PersonalSaintsException("Too many saints being rendered")
+
+            logging.info(f"Rendering personal saint {seed}")
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._getExecutor(), renderInWorker, seed, self._template
+            )
+            self._in_flight[seed] = future
+            future.add_done_callback(lambda f: self._rendered(seed, f))
+
+        # a cancelled caller must not cancel the render shared with the others
+        return await asyncio.shield(future)
+
+    def _rendered(self, seed: str, future: asyncio.Future) -> None:
+        """Store a finished render in the cache."""
+        self._in_flight.pop(seed, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        self._cache[seed] = future.result()
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _getExecutor(self) -> ProcessPoolExecutor:
+        """Get the pool of the workers, starting it on first use."""
+        if self._executor is None:
+            # the workers are spawned, since the parent runs other threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=initWorker,
+            )
+
+        return self._executor
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
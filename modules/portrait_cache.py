@@ -0,0 +1,193 @@
+"""Module containing the PortraitCache class."""
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class PortraitCache:
+    """Class handling a content addressed cache of the AI portraits.
+
+    Each portrait is stored under the hash of the prompt and of the
+    parameters used to create it, so that the same request never reaches
+    the AI twice. An index on disk keeps track of the size, the creation
+    time and the last use of each portrait; entries older than the
+    maximum age are dropped and, when the cache is bigger than the maximum
+    size, the least recently used ones are removed.
+    """
+
+    _folder: str
+    _max_size: int
+    _max_age: float
+
+    def __init__(
+        self, folder: str, max_size_mb: float = 512, max_age_days: float = 365
+    ) -> PortraitCache:
+        """Initialize the cache.
+
+        Args:
+            folder (str): Folder containing the cached portraits.
+            max_size_mb (float, optional): Maximum size of the cache, in MB.
+                Defaults to 512.
+            max_age_days (float, optional): Maximum age of a portrait, in days.
+                Defaults to 365.
+
+        Returns:
+            PortraitCache
+        """
+        self._folder = folder
+        self._max_size = int(max_size_mb * 1024 * 1024)
+        self._max_age = max_age_days * 24 * 60 * 60
+        os.makedirs(self._folder, exist_ok=True)
+
+    @staticmethod
+    def key(prompt: str, **params: str) -> str:
+        """Compute the key of a portrait.
+
+        Args:
+            prompt (str): Prompt of the portrait.
+            **params (str): Other parameters of the request (e.g. the size).
+
+        Returns:
+            str: hex digest identifying the portrait
+        """
+        data = json.dumps({"prompt": prompt, **params}, sort_keys=True)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """Get the path of a cached portrait."""
+        return os.path.join(self._folder, f"{key}.png")
+
+    @property
+    def _index_path(self) -> str:
+        """Get the path of the index of the cache."""
+        return os.path.join(self._folder, "index.json")
+
+    @contextmanager
+    def _lockedIndex(self) -> Iterator[dict[str, dict]]:
+        """Load the index while holding an exclusive lock, saving it after.
+
+        Yields:
+            dict[str, dict]: index of the cache, by key
+        """
+        with open(os.path.join(self._folder, "index.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self._index_path) as f:
+                    index = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                index = {}
+
+            yield index
+
+            fd, temp_path = tempfile.mkstemp(dir=self._folder, suffix=".part")
+            with os.fdopen(fd, "w") as f:
+                json.dump(index, f)
+            os.replace(temp_path, self._index_path)
+
+    def _evict(self, index: dict[str, dict]) -> None:
+        """Remove the expired entries and the least recently used ones.
+
+        Args:
+            index (dict[str, dict]): index of the cache
+        """
+        now = time.time()
+        for key in [k for k, e in index.items() if now - e["created"] > self._max_age]:
+            logging.info(f"Portrait {key} expired")
+            self._remove(index, key)
+
+        total = sum(e["size"] for e in index.values())
+        for key in sorted(index, key=lambda k: index[k]["used"]):
+            if total <= self._max_size:
+                break
+            logging.info(f"Evicting portrait {key}")
+            total -= index[key]["size"]
+            self._remove(index, key)
+
+    def _remove(self, index: dict[str, dict], key: str) -> None:
+        """Remove a portrait from the cache."""
+        del index[key]
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def lookup(self, key: str) -> str:
+        """Look for a portrait in the cache.
+
+        Args:
+            key (str): Key of the portrait.
+
+        Returns:
+            str: Path to the cached portrait, or None if it's not cached.
+        """
+        with self._lockedIndex() as index:
+            entry = index.get(key)
+            if entry is None:
+                return None
+
+            if not os.path.isfile(self._path(key)):
+                del index[key]
+                return None
+
+            entry["used"] = time.time()
+
+        logging.info(f"Portrait {key} found in cache")
+        return self._path(key)
+
+    def store(self, key: str, path: str) -> str:
+        """Add a portrait to the cache.
+
+        Args:
+            key (str): Key of the portrait.
+            path (str): Path to the portrait to add.
+
+        Returns:
+            str: Path to the cached portrait.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=self._folder, suffix=".part")
+        os.close(fd)
+        shutil.copyfile(path, temp_path)
+        os.replace(temp_path, self._path(key))
+
+        now = time.time()
+        with self._lockedIndex() as index:
+            index[key] = {
+                "size": os.path.getsize(self._path(key)),
+                "created": now,
+                "used": now,
+            }
+            self._evict(index)
+
+        logging.info(f"Portrait {key} stored in cache")
+        return self._path(key)
+
+    def restore(self, key: str, path: str) -> bool:
+        """Copy a cached portrait to a given path.
+
+        Args:
+            key (str): Key of the portrait.
+            path (str): Destination path.
+
+        Returns:
+            bool: True if the portrait was cached.
+        """
+        cached = self.lookup(key)
+        if cached is None:
+            return False
+
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".", suffix=".part"
+        )
+        os.close(fd)
+        shutil.copyfile(cached, temp_path)
+        os.replace(temp_path, path)
+        return True
@@ -0,0 +1,405 @@
+"""Module containing the RenderBenchmark class."""
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Iterator
+
+from .resource_pack import ResourcePack
+from .saint_factory import SaintFactory
+from .word_corpus import WordCorpus
+
+# stages of the pipeline, in order; the times of the stages are exclusive,
+# so font selection and font fitting are not counted in the compositing
+STAGES = [
+    "corpus_load",
+    "create_saint",
+    "placeholder",
+    "font_select",
+    "fit_font",
+    "compose",
+    "png_save",
+    "toml_write",
+]
+PERCENTILES = [50, 90, 99]
+# parameters of a run that must match for two reports to be compared
+COMPARABLE_META = ["saints", "cold_runs", "python", "machine"]
+
+
+class RenderBenchmarkException(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class StageTimer:
+    """Class measuring the time spent in the stages of a pipeline.
+
+    Stages can be nested: the time of a stage doesn't include the time of
+    the stages inside it. The times of a single iteration (e.g. a saint) are
+    summed per stage and then committed as one sample.
+    """
+
+    _samples: dict[str, list[float]]
+    _current: dict[str, float]
+    _children: list[float]
+
+    def __init__(self) -> StageTimer:
+        """Initialize the timer.
+
+        Returns:
+            StageTimer
+        """
+        self._samples = defaultdict(list)
+        self._current = defaultdict(float)
+        self._children = []
+
+    @property
+    def samples(self) -> dict[str, list[float]]:
+        """Committed samples of each stage, in seconds."""
+        return dict(self._samples)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure a stage.
+
+        Args:
+            name (str): Name of the stage.
+        """
+        self._children.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._current[name] += elapsed - self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+
+    def wrap(self, name: str, function: Callable) -> Callable:
+        """Wrap a function so that each call is measured as a stage.
+
+        Args:
+            name (str): Name of the stage.
+            function (Callable): Function to wrap.
+
+        Returns:
+            Callable
+        """
+
+        def wrapper(*args, **kwargs) -> Any:
+            with self.stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    def commit(self) -> None:
+        """Save the times of the current iteration as samples."""
+        for name, elapsed in self._current.items():
+            self._samples[name].append(elapsed)
+        self._current.clear()
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Summarize the samples of a stage.
+
+    Args:
+        samples (list[float]): Times, in seconds.
+
+    Returns:
+        dict[str, float]: count, mean, percentiles and maximum, in ms.
+    """
+    ordered = sorted(samples)
+    summary = {
+        "count": len(ordered),
+        "mean": 1000 * sum(ordered) / len(ordered),
+    }
+    for p in PERCENTILES:
+        # nearest rank percentile
+        rank = max(1, -(-p * len(ordered) // 100))
+        summary[f"p{p}"] = 1000 * ordered[rank - 1]
+    summary["max"] = 1000 * ordered[-1]
+    return summary
+
+
+class RenderBenchmark:
+    """Class measuring the generation of the saints in offline mode.
+
+    The pipeline of `SaintFactory.generateSaint` is run step by step, with
+    the placeholder image instead of the AI portrait and the files written
+    to a temporary folder. Cold runs each happen in a new process, so that
+    no corpus, font or template cache is populated; warm runs generate many
+    saints with the same factory, after a few untimed ones.
+    """
+
+    _saints: int
+    _cold_runs: int
+    _warmup: int
+    _corpus_loads: int
+    _start: date
+
+    def __init__(
+        self,
+        saints: int = 1000,
+        cold_runs: int = 5,
+        warmup: int = 20,
+        corpus_loads: int = 100,
+        start: date = date(2000, 1, 1),
+    ) -> RenderBenchmark:
+        """Initialize the benchmark.
+
+        Args:
+            saints (int, optional): Saints generated in the warm run.
+                Defaults to 1000.
+            cold_runs (int, optional): Number of cold runs, each generating
+                a single saint in a new process. Defaults to 5.
+            warmup (int, optional): Untimed saints generated before the warm
+                run. Defaults to 20.
+            corpus_loads (int, optional): Times the corpora are loaded again
+                in the warm run. Defaults to 100.
+            start (date, optional): Day of the first saint. Defaults to
+                2000-01-01.
+
+        Returns:
+            RenderBenchmark
+        """
+        self._saints = saints
+        self._cold_runs = cold_runs
+        self._warmup = warmup
+        self._corpus_loads = corpus_loads
+        self._start = start
+
+    @staticmethod
+    def _instrument(factory: SaintFactory, timer: StageTimer) -> None:
+        """Measure the stages called inside the compositing of the cards.
+
+        Args:
+            factory (SaintFactory): Factory to instrument.
+            timer (StageTimer): Timer of the stages.
+        """
+        factory._selectFont = timer.wrap("font_select", factory._selectFont)
+        factory._metrics.fitFont = timer.wrap("fit_font", factory._metrics.fitFont)
+
+    @staticmethod
+    def _generate(
+        factory: SaintFactory, timer: StageTimer, day: date, folder: str
+    ) -> None:
+        """Generate a saint, measuring each stage.
+
+        Args:
+            factory (SaintFactory): Factory generating the saint.
+            timer (StageTimer): Timer of the stages.
+            day (date): Day of the saint.
+            folder (str): Folder of the image and of the TOML file.
+        """
+        image_path = os.path.join(folder, "saint.png")
+        toml_path = os.path.join(folder, "saint.toml")
+        rng = factory._seededRandom(day)
+
+        with timer.stage("create_saint"):
+            saint = factory._createSaint(rng, image_path=image_path, day=day)
+        with timer.stage("placeholder"):
+            portrait = factory._createPlaceholderImage()
+        with timer.stage("compose"):
+            image = factory._composeImage(saint, rng, portrait)
+        with timer.stage("png_save"):
+            factory._atomicWrite(
+                image_path, lambda path: image.save(path, format="PNG")
+            )
+        with timer.stage("toml_write"):
+            factory._atomicWrite(toml_path, saint.toTOML)
+
+    def runCold(self) -> dict[str, list[float]]:
+        """Generate the first saint of a new process.
+
+        Returns:
+            dict[str, list[float]]: Time of each stage, in seconds.
+        """
+        timer = StageTimer()
+        # the corpora are loaded by the constructor
+        load_corpora = SaintFactory._loadCorpora
+        SaintFactory._loadCorpora = timer.wrap("corpus_load", load_corpora)
+        try:
+            factory = SaintFactory()
+        finally:
+            SaintFactory._loadCorpora = load_corpora
+
+        self._instrument(factory, timer)
+        with tempfile.TemporaryDirectory() as folder:
+            self._generate(factory, timer, self._start, folder)
+        timer.commit()
+        return timer.samples
+
+    def runWarm(self) -> dict[str, list[float]]:
+        """Generate many saints with the same factory.
+
+        Returns:
+            dict[str, list[float]]: Times of each stage, in seconds.
+        """
+        factory = SaintFactory()
+        timer = StageTimer()
+
+        # the files are cached by the OS, the parsing is repeated
+        for _ in range(self._corpus_loads):
+            WordCorpus.clearCache()
+            ResourcePack.clearCache()
+            with timer.stage("corpus_load"):
+                factory._loadCorpora()
+            timer.commit()
+
+        with tempfile.TemporaryDirectory() as folder:
+            for i in range(self._warmup):
+                self._generate(
+                    factory, StageTimer(), self._start + timedelta(i), folder
+                )
+
+            self._instrument(factory, timer)
+            for i in range(self._saints):
+                day = self._start + timedelta(self._warmup + i)
+                self._generate(factory, timer, day, folder)
+                timer.commit()
+
+        return timer.samples
+
+    def run(self) -> dict[str, Any]:
+        """Run the cold and the warm runs.
+
+        Returns:
+            dict[str, Any]: Report with the summary of each stage, in ms.
+        """
+        cold = defaultdict(list)
+        if self._cold_runs > 0:
+            # each run in a new process, created from scratch
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=context, max_tasks_per_child=1
+            ) as executor:
+                for i in range(self._cold_runs):
+                    logging.info(f"Cold run {i + 1} of {self._cold_runs}")
+                    for name, samples in executor.submit(self.runCold).result().items():
+                        cold[name].extend(samples)
+
+        logging.info(f"Warm run of {self._saints} saints")
+        warm = self.runWarm()
+
+        return {
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "saints": self._saints,
+                "cold_runs": self._cold_runs,
+            },
+            "cold": {s: summarize(cold[s]) for s in STAGES if cold.get(s)},
+            "warm": {s: summarize(warm[s]) for s in STAGES if warm.get(s)},
+        }
+
+    @staticmethod
+    def format(report: dict[str, Any]) -> str:
+        """Format a report as a table.
+
+        Args:
+            report (dict[str, Any]): Report created by run.
+
+        Returns:
+            str
+        """
+        columns = ["count", "mean", *(f"p{p}" for p in PERCENTILES), "max"]
+        lines = []
+        for phase in ("cold", "warm"):
+            lines.append(f"{phase:<14}" + "".join(f"{c:>10}" for c in columns))
+            for stage, summary in report[phase].items():
+                lines.append(
+                    f"  {stage:<12}"
+                    + f"{summary['count']:>10}"
+                    + "".join(f"{summary[c]:>10.3f}" for c in columns[1:])
+                )
+        return "\n".join(lines)
+
+    @staticmethod
+    def save(report: dict[str, Any], path: str) -> None:
+        """Save a report as a JSON baseline.
+
+        Args:
+            report (dict[str, Any]): Report created by run.
+            path (str): Path of the JSON file.
+        """
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    @staticmethod
+    def load(path: str) -> dict[str, Any]:
+        """Load a JSON baseline.
+
+        Args:
+            path (str): Path of the JSON file.
+
+        Returns:
+            dict[str, Any]
+        """
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def compare(
+        report: dict[str, Any],
+        baseline: dict[str, Any],
+        threshold: float = 0.1,
+        min_difference: float = 0.25,
+        phase: str = "warm",
+    ) -> list[str]:
+        """Find the stages that got slower than in a baseline.
+
+        The median and the 90th percentile of each stage are compared. Only
+        the warm phase has enough samples for a reliable comparison, so the
+        cold one should only be reported, not used as a gate.
+
+        Args:
+            report (dict[str, Any]): Report created by run.
+            baseline (dict[str, Any]): Report to compare to.
+            threshold (float, optional): Relative slowdown counted as a
+                regression. Defaults to 0.1 (10%).
+            min_difference (float, optional): Slowdowns smaller than this
+                many ms are ignored as noise. Defaults to 0.25.
+            phase (str, optional): Phase to compare. Defaults to "warm".
+
+        Raises:
+            RenderBenchmarkException: if the baseline was created with
+                different parameters or on a different Python or machine.
+
+        Returns:
+            list[str]: Description of each regression.
+        """
+        for key in COMPARABLE_META:
+            old = baseline.get("meta", {}).get(key)
+            new = report["meta"][key]
+            if old != new:
+                raise RenderBenchmarkException(
+                    f"Baseline has {key} {old}, this run has {new}"
+                )
+
+        regressions = []
+        for stage, summary in report[phase].items():
+            previous = baseline.get(phase, {}).get(stage)
+            if previous is None:
+                continue
+
+            for metric in ("p50", "p90"):
+                old, new = previous[metric], summary[metric]
+                if new - old > max(old * threshold, min_difference):
+                    change = f"+{100 * (new - old) / old:.0f}%" if old > 0 else "new"
+                    regressions.append(
+                        f"{phase} {stage} {metric}: {old:.3f} ms -> "
+                        f"{new:.3f} ms ({change})"
+                    )
+
+        return regressions
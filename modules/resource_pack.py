@@ -0,0 +1,461 @@
+"""Module containing the ResourcePack class."""
+from __future__ import annotations
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Sequence
+
+from .word_corpus import WordCorpus
+
+
+class ResourcePackException(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class ResourcePack:
+    """Class containing the corpora compiled in a single binary file.
+
+    The pack is memory mapped and every corpus is a WordCorpus viewing its
+    section of the map, so nothing is copied when loading it and all the
+    processes using the same pack share the same pages in memory.
+
+    The file starts with a header (magic, version, number of sections and
+    SHA-256 of the rest of the file), followed by a table with one entry per
+    section and then by the sections themselves. A text section contains
+    the offsets of the entries (uint32, one more than the entries) and then
+    the entries, UTF-8 encoded; a weights section contains one float64 per
+    entry. The weights and the categories of a corpus are stored in the
+    sections "<name>.weights" and "<name>.categories". All the numbers are
+    little endian and every section is aligned to 8 bytes. The bounds of the
+    sections and the checksum are checked when the pack is opened.
+
+    The text files remain the source of truth: each section records the
+    modification time and the size of its source file, so that a stale pack
+    can be detected without reading the sources.
+    """
+
+    _magic: bytes = b"SOTDPACK"
+    _version: int = 2
+    # magic, version, number of sections, SHA-256 of the rest of the file
+    _header = struct.Struct("<8sHH32s")
+    # name, kind, entries, offsets position, data position, data size,
+    # source modification time (ns) and source size
+    _section = struct.Struct("<32sBIIIIqQ")
+    _text_kind: int = 0
+    _weights_kind: int = 1
+
+    _loaded: dict[str, ResourcePack] = {}
+
+    _path: str
+    _buffer: memoryview
+    _identity: tuple[int, int, int] = None
+    _sections: dict[str, tuple[int, int, int, int, int, int, int]]
+
+    def __init__(self, path: str, buffer: memoryview) -> ResourcePack:
+        """Initialize the pack.
+
+        Args:
+            path (str): Path of the pack.
+            buffer (memoryview): Content of the pack.
+
+        Raises:
+            ResourcePackException: if the header or the section table is
+                not valid.
+
+        Returns:
+            ResourcePack
+        """
+        self._path = path
+        self._buffer = buffer
+
+        if len(buffer) < self._header.size:
+            raise ResourcePackException(f"{path} is too short")
+
+        magic, version, count, _ = self._header.unpack_from(buffer)
+        if magic != self._magic:
+            raise ResourcePackException(f"{path} is not a resource pack")
+        if version != self._version:
+            raise ResourcePackException(
+                f"{path} has version {version}, expected {self._version}"
+            )
+
+        table_end = self._header.size + count * self._section.size
+        if len(buffer) < table_end:
+            raise ResourcePackException(f"{path} is truncated")
+
+        self._sections = {}
+        for i in range(count):
+            name, *fields = self._section.unpack_from(
+                buffer, self._header.size + i * self._section.size
+            )
+            kind, entries, offsets_at, data_at, data_size, _, _ = fields
+            if kind == self._text_kind:
+                offsets_end = offsets_at + 4 * (entries + 1)
+            elif kind == self._weights_kind:
+                offsets_end = 0
+                if data_size != 8 * entries:
+                    raise ResourcePackException(f"{path} has invalid weights")
+            else:
+                raise ResourcePackException(f"{path} has unknown section {kind}")
+            if max(offsets_end, data_at + data_size) > len(buffer):
+                raise ResourcePackException(f"{path} is truncated")
+            try:
+                name = name.rstrip(b"\0").decode("ascii")
+            except UnicodeDecodeError:
+                raise ResourcePackException(f"{path} has an invalid section name")
+            self._sections[name] = tuple(fields)
+
+    def __repr__(self) -> str:
+        """Return the string representation of the pack."""
+        return f"ResourcePack({self._path}, {len(self._sections)} sections)"
+
+    @property
+    def names(self) -> list[str]:
+        """Names of the corpora in the pack."""
+        return [name for name in self._sections if "." not in name]
+
+    @classmethod
+    def open(cls, path: str) -> ResourcePack:
+        """Memory map a pack, checking its header, bounds and checksum.
+
+        Args:
+            path (str): Path of the pack.
+
+        Raises:
+            ResourcePackException: if the pack can't be read or is not valid.
+
+        Returns:
+            ResourcePack
+        """
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                stat = os.fstat(f.fileno())
+        except (OSError, ValueError) as e:
+            # an empty file can't be mapped and raises ValueError
+            raise ResourcePackException(f"Can't map {path}: {e}")
+
+        pack = cls(path, memoryview(mapped))
+        pack._checkDigest()
+        pack._identity = cls._fileIdentity(stat)
+        return pack
+
+    @staticmethod
+    def _fileIdentity(stat: os.stat_result) -> tuple[int, int, int]:
+        """Get what identifies a version of a pack file.
+
+        A pack replaced with os.replace has a new inode, one rewritten in
+        place has a new modification time or size.
+
+        Args:
+            stat (os.stat_result): Status of the file.
+
+        Returns:
+            tuple[int, int, int]: inode, modification time (ns) and size
+        """
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _checkDigest(self) -> None:
+        """Check the SHA-256 of the pack.
+
+        Raises:
+            ResourcePackException: if the checksum doesn't match.
+        """
+        *_, digest = self._header.unpack_from(self._buffer)
+        if hashlib.sha256(self._buffer[self._header.size :]).digest() != digest:
+            raise ResourcePackException(f"{self._path} checksum mismatch")
+
+    @classmethod
+    def load(cls, path: str) -> ResourcePack:
+        """Memory map a pack, reusing it if already loaded.
+
+        The pack is mapped again if the file changed since it was loaded,
+        e.g. when build-resources.py replaced it.
+
+        Args:
+            path (str): Path of the pack.
+
+        Raises:
+            ResourcePackException: if the pack can't be read or is not valid.
+
+        Returns:
+            ResourcePack
+        """
+        key = os.path.abspath(path)
+        try:
+            identity = cls._fileIdentity(os.stat(path))
+        except OSError as e:
+            raise ResourcePackException(f"Can't read {path}: {e}")
+
+        if key not in cls._loaded or cls._loaded[key]._identity != identity:
+            logging.info(f"Loading resource pack from {path}")
+            cls._loaded[key] = cls.open(path)
+
+        return cls._loaded[key]
+
+    @classmethod
+    def clearCache(cls) -> None:
+        """Forget all the packs loaded so far."""
+        cls._loaded.clear()
+
+    def _weights(self, name: str) -> memoryview:
+        """Get the data of a weights section, without copying it.
+
+        Args:
+            name (str): Name of the section.
+
+        Returns:
+            memoryview: float64 values.
+        """
+        _, _, _, data_at, data_size, _, _ = self._sections[name]
+        data = self._buffer[data_at : data_at + data_size]
+        if sys.byteorder == "little":
+            return data.cast("d")
+
+        values = array("d", data.tobytes())
+        values.byteswap()
+        return values
+
+    def _text(self, name: str) -> WordCorpus:
+        """Get the entries of a text section, without copying them.
+
+        Args:
+            name (str): Name of the section.
+
+        Returns:
+            WordCorpus
+        """
+        _, entries, offsets_at, blob_at, blob_size, _, _ = self._sections[name]
+        offsets = self._buffer[offsets_at : offsets_at + 4 * (entries + 1)]
+        if sys.byteorder == "little":
+            offsets = offsets.cast("I")
+        else:
+            offsets = array("I", offsets.tobytes())
+            offsets.byteswap()
+
+        return WordCorpus(self._buffer[blob_at : blob_at + blob_size], offsets)
+
+    def corpus(self, name: str) -> WordCorpus:
+        """Get a corpus of the pack, with its weights and categories.
+
+        Nothing is copied: the corpus views the memory mapped file.
+
+        Args:
+            name (str): Name of the corpus.
+
+        Raises:
+            ResourcePackException: if the corpus does not exist.
+
+        Returns:
+            WordCorpus
+        """
+        if name not in self._sections:
+            raise ResourcePackException(f"{self._path} has no section {name}")
+
+        text = self._text(name)
+        weights = None
+        categories = None
+        if f"{name}.weights" in self._sections:
+            weights = self._weights(f"{name}.weights")
+        if f"{name}.categories" in self._sections:
+            categories = self._text(f"{name}.categories")
+
+        return WordCorpus(text._blob, text._offsets, weights, categories)
+
+    def isCurrent(self, sources: dict[str, str]) -> bool:
+        """Check whether the pack was built from the current text files.
+
+        Only the modification time and the size of the files are compared,
+        so the check does not read the files.
+
+        Args:
+            sources (dict[str, str]): Path of the text file of each section.
+
+        Returns:
+            bool
+        """
+        for name, path in sources.items():
+            if name not in self._sections:
+                return False
+
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return False
+
+            *_, mtime, size = self._sections[name]
+            if stat.st_mtime_ns != mtime or stat.st_size != size:
+                return False
+
+        return True
+
+    def verify(
+        self,
+        sources: dict[str, str] = None,
+        parallel: list[tuple[str, str]] = None,
+    ) -> None:
+        """Check the integrity of the pack.
+
+        The checksum, the offsets and the encoding of every section are
+        checked and, optionally, the content of the sections is compared
+        with the text files.
+
+        Args:
+            sources (dict[str, str], optional): Path of the text file of each
+                section. Defaults to None.
+            parallel (list[tuple[str, str]], optional): Pairs of sections
+                that must be aligned line by line. Defaults to None.
+
+        Raises:
+            ResourcePackException: if the pack is not valid.
+        """
+        self._checkDigest()
+
+        for name, (kind, entries, *_) in self._sections.items():
+            if kind == self._weights_kind:
+                corpus = self.corpus(name.rsplit(".", 1)[0])
+                if len(corpus) != entries:
+                    raise ResourcePackException(f"Section {name} is not aligned")
+                if any(not w >= 0 for w in corpus.weights):
+                    raise ResourcePackException(f"Section {name} has invalid weights")
+                continue
+
+            corpus = self._text(name)
+            offsets = corpus._offsets
+            if offsets[0] != 0 or offsets[-1] != len(corpus._blob):
+                raise ResourcePackException(f"Section {name} has invalid bounds")
+            if any(a > b for a, b in zip(offsets, offsets[1:])):
+                raise ResourcePackException(f"Section {name} has invalid offsets")
+            try:
+                corpus.characters()
+            except UnicodeDecodeError as e:
+                raise ResourcePackException(f"Section {name} is not UTF-8: {e}")
+            if "." in name and len(self._text(name.rsplit(".", 1)[0])) != entries:
+                raise ResourcePackException(f"Section {name} is not aligned")
+
+        for first, second in parallel or []:
+            if len(self.corpus(first)) != len(self.corpus(second)):
+                raise ResourcePackException(
+                    f"Sections {first} and {second} are not aligned"
+                )
+
+        for name, path in (sources or {}).items():
+            corpus = self.corpus(name)
+            source = WordCorpus.fromFile(path)
+            if (
+                list(corpus) != list(source)
+                or _values(corpus.weights) != _values(source.weights)
+                or _values(corpus.categories) != _values(source.categories)
+            ):
+                raise ResourcePackException(f"Section {name} differs from {path}")
+
+    @classmethod
+    def build(
+        cls,
+        path: str,
+        sources: dict[str, str],
+        parallel: list[tuple[str, str]] = None,
+    ) -> None:
+        """Compile text files into a pack.
+
+        The pack is written to a temporary file and then moved in place, so
+        processes that have already mapped the previous pack are not affected.
+
+        Args:
+            path (str): Path of the pack.
+            sources (dict[str, str]): Path of the text file of each section.
+            parallel (list[tuple[str, str]], optional): Pairs of sections
+                that must be aligned line by line. Defaults to None.
+
+        Raises:
+            ResourcePackException: if two parallel sections are not aligned.
+        """
+        corpora = {}
+        stats = {}
+        for name, source in sources.items():
+            stats[name] = os.stat(source)
+            corpora[name] = WordCorpus.fromFile(source)
+
+        for first, second in parallel or []:
+            if len(corpora[first]) != len(corpora[second]):
+                raise ResourcePackException(
+                    f"{sources[first]} has {len(corpora[first])} entries but "
+                    f"{sources[second]} has {len(corpora[second])}"
+                )
+
+        sections = []
+        for name, corpus in corpora.items():
+            sections.append((name, cls._text_kind, corpus, stats[name]))
+            if corpus.weights is not None:
+                sections.append(
+                    (f"{name}.weights", cls._weights_kind, corpus, stats[name])
+                )
+            if corpus.categories is not None:
+                sections.append(
+                    (
+                        f"{name}.categories",
+                        cls._text_kind,
+                        corpus.categories,
+                        stats[name],
+                    )
+                )
+
+        table = bytearray()
+        body = bytearray()
+        position = cls._header.size + len(sections) * cls._section.size
+        # every section starts aligned to 8 bytes
+        body += b"\0" * (-position % 8)
+        for name, kind, corpus, stat in sections:
+            if kind == cls._weights_kind:
+                offsets = array("I")
+                data = array("d", corpus.weights)
+            else:
+                offsets = array("I", corpus._offsets)
+                data = corpus._blob
+            if sys.byteorder != "little":
+                offsets.byteswap()
+                if kind == cls._weights_kind:
+                    data.byteswap()
+            data = bytes(data)
+
+            offsets_at = position + len(body)
+            table += cls._section.pack(
+                name.encode("ascii"),
+                kind,
+                len(corpus),
+                offsets_at,
+                offsets_at + 4 * len(offsets),
+                len(data),
+                stat.st_mtime_ns,
+                stat.st_size,
+            )
+            body += offsets.tobytes()
+            body += data
+            body += b"\0" * (-(position + len(body)) % 8)
+
+        content = bytes(table + body)
+        header = cls._header.pack(
+            cls._magic,
+            cls._version,
+            len(sections),
+            hashlib.sha256(content).digest(),
+        )
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(header)
+            f.write(content)
+        os.replace(temp_path, path)
+        logging.info(f"Resource pack with {len(sections)} sections saved to {path}")
+
+
+def _values(sequence: Sequence) -> list:
+    """Convert an optional sequence to a list, for comparisons."""
+    return list(sequence) if sequence is not None else None
@@ -0,0 +1,280 @@
+"""Module containing the policies used to retry failing functions."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable
+
+
+class RetryException(Exception):
+    """Exception raised when a function keeps failing after all the tries."""
+
+    pass
+
+
+class RetryMetrics:
+    """Class collecting the attempts and the latency of the retried functions."""
+
+    _stats: dict[str, dict[str, float]]
+
+    def __init__(self) -> RetryMetrics:
+        """Initialize the metrics.
+
+        Returns:
+            RetryMetrics
+        """
+        self._stats = {}
+
+    def record(self, name: str, attempt: int, latency: float, success: bool) -> None:
+        """Record an attempt.
+
+        Args:
+            name (str): Name of the function.
+            attempt (int): Number of the attempt, starting from 1.
+            latency (float): Duration of the attempt (in seconds).
+            success (bool): Whether the attempt succeeded.
+        """
+        stats = self._stats.setdefault(
+            name,
+            {"attempts": 0, "successes": 0, "failures": 0, "retries": 0, "latency": 0},
+        )
+        stats["attempts"] += 1
+        stats["latency"] += latency
+        stats["successes" if success else "failures"] += 1
+        if attempt > 1:
+            stats["retries"] += 1
+
+        outcome = "succeeded" if success else "failed"
+        logging.info(f"{name}: attempt {attempt} {outcome} in {latency:.3f} seconds")
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        """Get the metrics collected so far.
+
+        Returns:
+            dict[str, dict[str, float]]: Metrics, by function name.
+        """
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def summary(self, name: str) -> str:
+        """Describe the metrics of a function.
+
+        Args:
+            name (str): Name of the function.
+
+        Returns:
+            str: Summary of the metrics, or None if the function never ran.
+        """
+        stats = self._stats.get(name)
+        if stats is None:
+            return None
+
+        return (
+            f"{name}: {stats['attempts']} attempts, {stats['retries']} retries, "
+            f"{stats['failures']} failures, "
+            f"{stats['latency'] / stats['attempts']:.3f} seconds per attempt"
+        )
+
+
+class RetryPolicy:
+    """Class handling the retry of a failing function.
+
+    The delay between two tries grows exponentially, up to a maximum, and
+    it's randomly reduced by up to a `jitter` fraction, so that many clients
+    don't retry all at once. Exceptions are classified: the `fatal` ones are
+    raised immediately, the ones in `retry_on` are retried, any other one is
+    raised immediately. The retries also stop once the deadline is reached.
+    """
+
+    max_tries: int
+    base_delay: float
+    max_delay: float
+    multiplier: float
+    jitter: float
+    deadline: float
+    retry_on: tuple[type[BaseException], ...]
+    fatal: tuple[type[BaseException], ...]
+
+    def __init__(
+        self,
+        max_tries: int = 3,
+        base_delay: float = 1,
+        max_delay: float = 60,
+        multiplier: float = 2,
+        jitter: float = 0.5,
+        deadline: float = None,
+        retry_on: tuple[type[BaseException], ...] = (Exception,),
+        fatal: tuple[type[BaseException], ...] = (),
+        metrics: RetryMetrics = None,
+    ) -> RetryPolicy:
+        """Initialize the policy.
+
+        Args:
+            max_tries (int, optional): Maximum number of tries. Defaults to 3.
+            base_delay (float, optional): Delay (in seconds) after the first
+                failure. Defaults to 1.
+            max_delay (float, optional): Maximum delay (in seconds) between
+                two tries. Defaults to 60.
+            multiplier (float, optional): Growth factor of the delay.
+                Defaults to 2.
+            jitter (float, optional): Maximum fraction of the delay randomly
+                removed from it. Defaults to 0.5.
+            deadline (float, optional): Maximum total time (in seconds) spent
+                trying. Defaults to no deadline.
+            retry_on (tuple[type[BaseException], ...], optional): Exceptions
+                that are retried. Defaults to all exceptions.
+            fatal (tuple[type[BaseException], ...], optional): Exceptions
+                that are never retried, even if they are in retry_on.
+                Defaults to none.
+            metrics (RetryMetrics, optional): Collector of the metrics of
+                the attempts. Defaults to None (not collected).
+
+        Returns:
+            RetryPolicy
+        """
+        self.max_tries = max_tries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_on = retry_on
+        self.fatal = fatal
+        self._metrics = metrics
+
+    def _record(self, name: str, attempt: int, start: float, success: bool) -> None:
+        """Record an attempt in the metrics, if collected.
+
+        Args:
+            name (str): name of the function
+            attempt (int): number of the attempt
+            start (float): monotonic time of the start of the attempt
+            success (bool): whether the attempt succeeded
+        """
+        if self._metrics is not None:
+            self._metrics.record(name, attempt, time.monotonic() - start, success)
+
+    def delay(self, attempt: int) -> float:
+        """Compute the delay after a failed attempt.
+
+        Args:
+            attempt (int): Number of the failed attempt, starting from 1.
+
+        Returns:
+            float: delay in seconds
+        """
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def isRetryable(self, e: BaseException) -> bool:
+        """Check whether an exception can be retried.
+
+        Args:
+            e (BaseException): Exception raised by the function.
+
+        Returns:
+            bool
+        """
+        return not isinstance(e, self.fatal) and isinstance(e, self.retry_on)
+
+    def _nextDelay(
+        self, name: str, attempt: int, start: float, e: BaseException
+    ) -> float:
+        """Decide whether to retry after a failure.
+
+        Args:
+            name (str): name of the function
+            attempt (int): number of the failed attempt
+            start (float): monotonic time of the first attempt
+            e (BaseException): exception raised by the function
+
+        Raises:
+            BaseException: the exception itself, if it's not retryable.
+            RetryException: if there are no tries or time left.
+
+        Returns:
+            float: delay before the next attempt
+        """
+        logging.error(f"Error while running function: {name}")
+        logging.error(f"Error raised: {e}")
+        logging.error(f"Error type: {type(e)}")
+
+        if not self.isRetryable(e):
+            logging.error(f"{type(e).__name__} is not retryable")
+            raise e
+
+        if attempt >= self.max_tries:
+            raise RetryException(f"{name} failed {attempt} times") from e
+
+        delay = self.delay(attempt)
+        if self.deadline is not None:
+            if time.monotonic() - start + delay > self.deadline:
+                raise RetryException(f"{name} reached its deadline") from e
+
+        logging.info(
+            f"Trying again in {delay:.1f} seconds ({attempt}/{self.max_tries})"
+        )
+        return delay
+
+    def call(self, f: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Call a function, retrying it if it fails.
+
+        Args:
+            f (Callable): Function to call.
+            *args (Any): Positional arguments of the function.
+            **kwargs (Any): Keyword arguments of the function.
+
+        Raises:
+            RetryException: if the function keeps failing.
+
+        Returns:
+            Any: value returned by the function
+        """
+        name = getattr(f, "__name__", repr(f))
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            attempt_start = time.monotonic()
+            try:
+                result = f(*args, **kwargs)
+            except Exception as e:
+                self._record(name, attempt, attempt_start, False)
+                time.sleep(self._nextDelay(name, attempt, start, e))
+                continue
+
+            self._record(name, attempt, attempt_start, True)
+            return result
+
+    async def acall(
+        self, f: Callable[..., Awaitable], *args: Any, **kwargs: Any
+    ) -> Any:
+        """Await a coroutine function, retrying it if it fails.
+
+        Args:
+            f (Callable[..., Awaitable]): Coroutine function to call.
+            *args (Any): Positional arguments of the function.
+            **kwargs (Any): Keyword arguments of the function.
+
+        Raises:
+            RetryException: if the function keeps failing.
+
+        Returns:
+            Any: value returned by the function
+        """
+        name = getattr(f, "__name__", repr(f))
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            attempt_start = time.monotonic()
+            try:
+                result = await f(*args, **kwargs)
+            except Exception as e:
+                self._record(name, attempt, attempt_start, False)
+                await asyncio.sleep(self._nextDelay(name, attempt, start, e))
+                continue
+
+            self._record(name, attempt, attempt_start, True)
+            return result
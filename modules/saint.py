@@ -1,10 +1,12 @@
 """Module containing the Saint class."""
 from __future__ import annotations
 
+import struct
 from enum import Enum
+from typing import Any, Iterator
 
 import toml
-from typing_extensions import Any
+import ujson
 
 
 class Gender(Enum):
@@ -15,18 +17,50 @@ class Gender(Enum):
 
 
 class Saint:
-    """Class containing a saint."""
-
-    _name: str
-    _gender: Gender
-    _protector_of: list[str]
-    _patron_city: str
-    _born: int
-    _died: int
-    _birthplace: str
-    _deathplace: str
-    _image_path: str = None
-    _protector_of_english: list[str] = None
+    """Class containing a saint.
+
+    Saints are immutable: every field is set in the constructor and the
+    derived strings (full name, patron city, bio) are built on first use
+    and then cached. A saint can be saved to and loaded from TOML, JSON and
+    a compact binary format, all without losing any field.
+    """
+
+    __slots__ = (
+        "name",
+        "gender",
+        "protector_of",
+        "patron_city",
+        "born",
+        "died",
+        "birthplace",
+        "deathplace",
+        "image_path",
+        "protector_of_english",
+        "_full_name",
+        "_full_patron_city",
+        "_bio",
+    )
+
+    name: str
+    gender: Gender
+    protector_of: tuple[str, ...]
+    patron_city: str
+    born: int
+    died: int
+    birthplace: str
+    deathplace: str
+    image_path: str
+    protector_of_english: tuple[str, ...]
+
+    _field_names = __slots__[:10]
+    _genders = {g.value.encode("ascii"): g for g in Gender}
+
+    # binary format: gender, born, died and number of patronages
+    _header = struct.Struct("<ciiBB")
+    # length of a missing string, or count of a missing list, so strings and
+    # lists at least this long can't be stored
+    _missing_length = 0xFFFF
+    _missing_count = 0xFF
 
     def __init__(
         self,
@@ -57,105 +91,206 @@ class Saint:
                  of the things the saint protects. Defaults to None.
 
         Returns:
-            Saint: _description_
+            Saint
         """
-        self._name = name
-        self._gender = Gender(gender)
-        self._protector_of = [p.lower() for p in protector_of]
-        self._patron_city = patron_city
-        self._born = born
-        self._died = died
-        self._birthplace = birthplace
-        self._deathplace = deathplace
-
-        if image_path is not None:
-            self._image_path = image_path
-
-        if protector_of_english is not None:
-            self._protector_of_english = protector_of_english
+        # the fields are set bypassing __setattr__, which forbids changes
+        set_field = object.__setattr__
+        set_field(self, "name", name)
+        set_field(self, "gender", Gender(gender))
+        set_field(self, "protector_of", tuple(p.lower() for p in protector_of))
+        set_field(self, "patron_city", patron_city)
+        set_field(self, "born", born)
+        set_field(self, "died", died)
+        set_field(self, "birthplace", birthplace)
+        set_field(self, "deathplace", deathplace)
+        set_field(self, "image_path", image_path)
+        set_field(
+            self,
+            "protector_of_english",
+            tuple(protector_of_english) if protector_of_english is not None else None,
+        )
+        set_field(self, "_full_name", None)
+        set_field(self, "_full_patron_city", None)
+        set_field(self, "_bio", None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Prevent the saint from being modified."""
+        raise AttributeError(f"Saint is immutable, can't set {name}")
+
+    def __delattr__(self, name: str) -> None:
+        """Prevent the saint from being modified."""
+        raise AttributeError(f"Saint is immutable, can't delete {name}")
+
+    def __reduce__(self) -> tuple:
+        """Pickle the saint through its constructor."""
+        return (self.__class__._fromFields, (self._fields(),))
+
+    def __eq__(self, other: object) -> bool:
+        """Compare two saints field by field."""
+        if not isinstance(other, Saint):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self) -> int:
+        """Hash the fields of the saint."""
+        return hash(self._fields())
 
     def __repr__(self) -> str:
         """Return the string representation of the saint."""
+        return self.bio
+
+    def __str__(self) -> str:
+        """Return the string representation of the saint."""
+        return self.bio
+
+    def _fields(self) -> tuple:
+        """Get the fields of the saint, in the order of the constructor."""
+        return (
+            self.name,
+            self.gender,
+            self.protector_of,
+            self.patron_city,
+            self.born,
+            self.died,
+            self.birthplace,
+            self.deathplace,
+            self.image_path,
+            self.protector_of_english,
+        )
+
+    @classmethod
+    def _fromFields(cls, fields: tuple) -> Saint:
+        """Create a saint from fields that were already validated.
+
+        The fields are in the order of the constructor, with the patronages
+        as tuples and the gender as a Gender.
+        """
+        saint = cls.__new__(cls)
+        set_field = object.__setattr__
+        for key, value in zip(cls._field_names, fields):
+            set_field(saint, key, value)
+        set_field(saint, "_full_name", None)
+        set_field(saint, "_full_patron_city", None)
+        set_field(saint, "_bio", None)
+        return saint
+
+    def replace(self, **changes: Any) -> Saint:
+        """Create a copy of the saint with some fields changed.
+
+        Args:
+            **changes (Any): New values of the fields.
+
+        Returns:
+            Saint
+        """
+        return self.fromDict({**self.toDict(), **changes})
+
+    @property
+    def male(self) -> bool:
+        """Whether the saint is male."""
+        return self.gender is Gender.Male
+
+    @property
+    def full_name(self) -> str:
+        """Full name of the saint."""
+        if self._full_name is None:
+            prefix = "San" if self.male else "Santa"
+            object.__setattr__(self, "_full_name", f"{prefix} {self.name}")
+        return self._full_name
+
+    @property
+    def full_patron_city(self) -> str:
+        """Full name of the patron city."""
+        if self._full_patron_city is None:
+            prefix = "Patrono" if self.male else "Patrona"
+            object.__setattr__(
+                self, "_full_patron_city", f"{prefix} di {self.patron_city}"
+            )
+        return self._full_patron_city
+
+    @property
+    def bio(self) -> str:
+        """Biography of the saint, in Italian."""
+        if self._bio is None:
+            object.__setattr__(self, "_bio", self._createBio())
+        return self._bio
+
+    def _createBio(self) -> str:
+        """Create the biography of the saint.
+
+        Returns:
+            str
+        """
         bio = ""
 
-        if self._male:
-            bio += f"San {self._name}, protettore di "
+        if self.male:
+            bio += f"San {self.name}, protettore di "
         else:
-            bio += f"Santa {self._name}, protettrice di "
+            bio += f"Santa {self.name}, protettrice di "
 
-        bio += ", ".join(self._protector_of[:-1])
-        if len(self._protector_of) > 1:
+        bio += ", ".join(self.protector_of[:-1])
+        if len(self.protector_of) > 1:
             bio += " e "
-        bio += self._protector_of[-1]
+        bio += self.protector_of[-1]
 
-        if self._male:
+        if self.male:
             bio += ". Patrono di "
         else:
             bio += ". Patrona di "
-        bio += self._patron_city
+        bio += self.patron_city
 
-        if self._male:
+        if self.male:
             bio += ". Nato a "
         else:
             bio += ". Nata a "
 
-        bio += f"{self._birthplace} ({self._born})"
+        bio += f"{self.birthplace} ({self.born})"
 
-        if self._male:
+        if self.male:
             bio += ", morto a "
         else:
             bio += ", morta a "
-        bio += f"{self._deathplace} ({self._died})."
+        bio += f"{self.deathplace} ({self.died})."
 
         return bio
 
-    def __str__(self) -> str:
-        """Return the string representation of the saint."""
-        return self.__repr__()
-
-    @property
-    def bio(self) -> str:
-        """Return the string representation of the saint."""
-        return self.__repr__()
+    def toDict(self) -> dict[str, Any]:
+        """Convert the saint to a dictionary of plain values.
 
-    @property
-    def image_path(self) -> str:
-        """Path of the saint image."""
-        return self._image_path
+        Missing optional fields are not included.
 
-    @image_path.setter
-    def image_path(self, path: str) -> None:
-        """Set the path of the saint image."""
-        self._image_path = path
+        Returns:
+            dict[str, Any]
+        """
+        data = {
+            "name": self.name,
+            "gender": self.gender.value,
+            "protector_of": list(self.protector_of),
+            "patron_city": self.patron_city,
+            "born": self.born,
+            "died": self.died,
+            "birthplace": self.birthplace,
+            "deathplace": self.deathplace,
+        }
 
-    def __getattr__(self, name: str) -> Any:
-        """Get the attribute of the saint.
+        if self.image_path is not None:
+            data["image_path"] = self.image_path
+        if self.protector_of_english is not None:
+            data["protector_of_english"] = list(self.protector_of_english)
 
-        In addition to the attributes passed in the constructor,
-        it is possible to get the following attributes:
+        return data
 
-        - full_name: Full name of the saint.
-        - full_patron_city: Full name of the patron city.
+    @classmethod
+    def fromDict(cls, data: dict[str, Any]) -> Saint:
+        """Create a saint from a dictionary created by toDict.
 
         Args:
-            name (str): Name of the attribute.
+            data (dict[str, Any]): Fields of the saint.
 
         Returns:
-            Any: Value of the attribute.
+            Saint
         """
-        if name == "_male":
-            return self._gender == Gender.Male
-        if name == "full_name":
-            if self._male:
-                return f"San {self._name}"
-            return f"Santa {self._name}"
-        if name == "full_patron_city":
-            if self._male:
-                return f"Patrono di {self._patron_city}"
-            return f"Patrona di {self._patron_city}"
-
-        if (name := f"_{name}") in self.__dict__:
-            return self.__dict__[name]
+        return cls(**data)
 
     def toTOML(self, path: str) -> None:
         """Save the saint to a TOML file.
@@ -163,20 +298,8 @@ class Saint:
         Args:
             path (str): Path of the TOML file.
         """
-        data = {
-            "name": self._name,
-            "gender": self._gender.value,
-            "protector_of": self._protector_of,
-            "patron_city": self._patron_city,
-            "born": self._born,
-            "died": self._died,
-            "birthplace": self._birthplace,
-            "deathplace": self._deathplace,
-            "image_path": self._image_path,
-        }
-
         with open(path, "w") as f:
-            toml.dump(data, f)
+            toml.dump(self.toDict(), f)
 
     @classmethod
     def fromTOML(cls, path: str) -> Saint:
@@ -191,4 +314,143 @@ class Saint:
         with open(path, "r") as f:
             data = toml.load(f)
 
-        return cls(**data)
+        return cls.fromDict(data)
+
+    def toJSON(self) -> str:
+        """Convert the saint to JSON.
+
+        Returns:
+            str
+        """
+        return ujson.dumps(self.toDict(), ensure_ascii=False)
+
+    @classmethod
+    def fromJSON(cls, data: str) -> Saint:
+        """Load a saint from JSON.
+
+        Args:
+            data (str): JSON created by toJSON.
+
+        Returns:
+            Saint
+        """
+        return cls.fromDict(ujson.loads(data))
+
+    def toBytes(self) -> bytes:
+        """Convert the saint to its binary representation.
+
+        The binary representation contains a fixed header (gender, years and
+        number of patronages), the lengths of all the strings and then the
+        strings themselves, UTF-8 encoded.
+
+        Raises:
+            ValueError: if a string is 65535 bytes or longer, or if there are
+                255 patronages or more.
+
+        Returns:
+            bytes
+        """
+        english = self.protector_of_english
+        strings = [
+            self.name,
+            self.patron_city,
+            self.birthplace,
+            self.deathplace,
+            self.image_path,
+            *self.protector_of,
+            *(english or ()),
+        ]
+        encoded = [s.encode("utf-8") if s is not None else b"" for s in strings]
+        lengths = [
+            len(e) if s is not None else self._missing_length
+            for s, e in zip(strings, encoded)
+        ]
+        if any(len(e) >= self._missing_length for e in encoded):
+            raise ValueError(
+                f"Strings of {self._missing_length} bytes or more can't be stored"
+            )
+        if max(len(self.protector_of), len(english or ())) >= self._missing_count:
+            raise ValueError(
+                f"{self._missing_count} patronages or more can't be stored"
+            )
+
+        header = self._header.pack(
+            self.gender.value.encode("ascii"),
+            self.born,
+            self.died,
+            len(self.protector_of),
+            len(english) if english is not None else self._missing_count,
+        )
+        return b"".join([header, struct.pack(f"<{len(lengths)}H", *lengths), *encoded])
+
+    @classmethod
+    def unpackFrom(cls, buffer: bytes, offset: int = 0) -> tuple[Saint, int]:
+        """Load a saint from its binary representation inside a buffer.
+
+        Args:
+            buffer (bytes): Buffer containing the saint.
+            offset (int, optional): Position of the saint. Defaults to 0.
+
+        Returns:
+            tuple[Saint, int]: the saint and the position after it
+        """
+        gender, born, died, count, english_count = cls._header.unpack_from(
+            buffer, offset
+        )
+        offset += cls._header.size
+
+        has_english = english_count != cls._missing_count
+        total = 5 + count + (english_count if has_english else 0)
+        lengths = struct.unpack_from(f"<{total}H", buffer, offset)
+        offset += 2 * total
+
+        strings = []
+        for length in lengths:
+            if length == cls._missing_length:
+                strings.append(None)
+                continue
+
+            strings.append(str(buffer[offset : offset + length], "utf-8"))
+            offset += length
+
+        name, patron_city, birthplace, deathplace, image_path = strings[:5]
+        fields = (
+            name,
+            cls._genders[gender],
+            tuple(strings[5 : 5 + count]),
+            patron_city,
+            born,
+            died,
+            birthplace,
+            deathplace,
+            image_path,
+            tuple(strings[5 + count :]) if has_english else None,
+        )
+        return cls._fromFields(fields), offset
+
+    @classmethod
+    def fromBytes(cls, data: bytes) -> Saint:
+        """Load a saint from its binary representation.
+
+        Args:
+            data (bytes): Binary representation created by toBytes.
+
+        Returns:
+            Saint
+        """
+        return cls.unpackFrom(data)[0]
+
+    @classmethod
+    def iterBytes(cls, buffer: bytes) -> Iterator[Saint]:
+        """Load many saints written one after the other.
+
+        Args:
+            buffer (bytes): Concatenated binary representations of the saints.
+
+        Yields:
+            Saint
+        """
+        offset = 0
+        while offset < len(buffer):
+            saint, offset = cls.unpackFrom(buffer, offset)
+            yield saint
@@ -0,0 +1,277 @@
+"""Module containing the SaintArchive class."""
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Iterator
+
+from .saint import Gender, Saint
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS saints (
+    day TEXT PRIMARY KEY,
+    name TEXT NOT NULL COLLATE NOCASE,
+    gender TEXT NOT NULL,
+    patron_city TEXT NOT NULL COLLATE NOCASE,
+    born INTEGER NOT NULL,
+    died INTEGER NOT NULL,
+    birthplace TEXT NOT NULL,
+    deathplace TEXT NOT NULL,
+    image_path TEXT,
+    source_mtime REAL
+);
+CREATE TABLE IF NOT EXISTS patronages (
+    day TEXT NOT NULL REFERENCES saints(day) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    name_english TEXT COLLATE NOCASE,
+    PRIMARY KEY (day, position)
+);
+CREATE INDEX IF NOT EXISTS saints_name ON saints(name);
+CREATE INDEX IF NOT EXISTS saints_patron_city ON saints(patron_city);
+CREATE INDEX IF NOT EXISTS patronages_name ON patronages(name);
+CREATE INDEX IF NOT EXISTS patronages_name_english ON patronages(name_english);
+"""
+
+
+class SaintArchive:
+    """Class handling an index of all the generated saints.
+
+    The saints are stored in a SQLite database, indexed by day, name, patron
+    city and patronage, so that they can be searched without loading every
+    TOML file. The archive is updated as the saints are generated, and it
+    can be rebuilt from the TOML folder at any time.
+
+    A new connection is opened for each operation, so that the archive can
+    be shared by threads and by processes.
+    """
+
+    _path: str
+    _timeout: float
+
+    def __init__(self, path: str, timeout: float = 30) -> SaintArchive:
+        """Initialize the archive, creating the database if needed.
+
+        Args:
+            path (str): Path to the database.
+            timeout (float, optional): Time (in seconds) to wait for a
+                database locked by another writer. Defaults to 30.
+
+        Returns:
+            SaintArchive
+        """
+        self._path = path
+        self._timeout = timeout
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, committing the changes when done.
+
+        Yields:
+            sqlite3.Connection
+        """
+        connection = sqlite3.connect(self._path, timeout=self._timeout)
+        try:
+            connection.execute("PRAGMA foreign_keys = ON")
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _insert(
+        self,
+        connection: sqlite3.Connection,
+        day: date,
+        saint: Saint,
+        source_mtime: float = None,
+    ) -> None:
+        """Insert a saint, replacing the one of the same day."""
+        key = day.isoformat()
+        connection.execute("DELETE FROM saints WHERE day = ?", (key,))
+        connection.execute(
+            "INSERT INTO saints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                saint.name,
+                saint.gender.value,
+                saint.patron_city,
+                saint.born,
+                saint.died,
+                saint.birthplace,
+                saint.deathplace,
+                saint.image_path,
+                source_mtime,
+            ),
+        )
+
+        english = saint.protector_of_english or []
+        connection.executemany(
+            "INSERT INTO patronages VALUES (?, ?, ?, ?)",
+            [
+                (key, position, name, english[position] if english else None)
+                for position, name in enumerate(saint.protector_of)
+            ],
+        )
+
+    def add(self, day: date, saint: Saint, source_mtime: float = None) -> None:
+        """Add a saint to the archive, replacing the one of the same day.
+
+        Args:
+            day (date): Day of the saint.
+            saint (Saint): Saint to add.
+            source_mtime (float, optional): Modification time of the TOML
+                file of the saint. Defaults to None.
+        """
+        with self._connect() as connection:
+            self._insert(connection, day, saint, source_mtime)
+
+    def rebuild(self, toml_folder: str, full: bool = False) -> int:
+        """Update the archive from the TOML files of the saints.
+
+        Only the files named after a day (YYYYMMDD.toml) are loaded. Unless
+        a full rebuild is requested, the files that didn't change since they
+        were archived are skipped. The saints whose file was removed are
+        removed from the archive too.
+
+        Args:
+            toml_folder (str): Folder containing the TOML files.
+            full (bool, optional): If True, every file is loaded again.
+                Defaults to False.
+
+        Returns:
+            int: number of saints loaded
+        """
+        files = {}
+        with os.scandir(toml_folder) as entries:
+            for entry in entries:
+                stem, extension = os.path.splitext(entry.name)
+                if extension != ".toml" or not entry.is_file():
+                    continue
+                try:
+                    day = datetime.strptime(stem, "%Y%m%d").date()
+                except ValueError:
+                    continue
+                files[day.isoformat()] = (day, entry.path, entry.stat().st_mtime)
+
+        loaded = 0
+        with self._connect() as connection:
+            if full:
+                connection.execute("DELETE FROM saints")
+            archived = dict(connection.execute("SELECT day, source_mtime FROM saints"))
+
+            for key in archived.keys() - files.keys():
+                connection.execute("DELETE FROM saints WHERE day = ?", (key,))
+
+            for key, (day, path, mtime) in files.items():
+                if archived.get(key) == mtime:
+                    continue
+                self._insert(connection, day, Saint.fromTOML(path), mtime)
+                loaded += 1
+
+        logging.info(
+            f"Archive updated: {loaded} saints loaded, {len(files)} in {toml_folder}"
+        )
+        return loaded
+
+    def _select(self, where: str, parameters: tuple) -> list[tuple[date, Saint]]:
+        """Load the saints matching a condition.
+
+        Args:
+            where (str): SQL condition over the saints table (aliased as s).
+            parameters (tuple): parameters of the condition
+
+        Returns:
+            list[tuple[date, Saint]]: day and saint, in chronological order
+        """
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT * FROM saints AS s WHERE {where} ORDER BY day", parameters
+            ).fetchall()
+            patronages = {}
+            for key, name, name_english in connection.execute(
+                "SELECT p.day, p.name, p.name_english FROM patronages AS p "
+                f"JOIN saints AS s ON s.day = p.day WHERE {where} "
+                "ORDER BY p.day, p.position",
+                parameters,
+            ):
+                patronages.setdefault(key, []).append((name, name_english))
+
+        saints = []
+        for key, name, gender, city, born, died, birth, death, image, _ in rows:
+            protector_of = [p[0] for p in patronages.get(key, [])]
+            english = [p[1] for p in patronages.get(key, [])]
+            saint = Saint(
+                name=name,
+                gender=Gender(gender),
+                protector_of=protector_of,
+                patron_city=city,
+                born=born,
+                died=died,
+                birthplace=birth,
+                deathplace=death,
+                image_path=image,
+                protector_of_english=english if None not in english else None,
+            )
+            saints.append((date.fromisoformat(key), saint))
+
+        return saints
+
+    def __len__(self) -> int:
+        """Return the number of archived saints."""
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM saints").fetchone()[0]
+
+    def get(self, day: date) -> Saint:
+        """Get the saint of a day.
+
+        Args:
+            day (date): Day of the saint.
+
+        Returns:
+            Saint: the saint, or None if it's not archived.
+        """
+        saints = self._select("s.day = ?", (day.isoformat(),))
+        return saints[0][1] if saints else None
+
+    def byPatronage(self, patronage: str) -> list[tuple[date, Saint]]:
+        """Find the saints protecting something.
+
+        Args:
+            patronage (str): Thing protected by the saints, in Italian or in
+                English (e.g. "gatti" or "cats"). Case insensitive.
+
+        Returns:
+            list[tuple[date, Saint]]: day and saint, in chronological order
+        """
+        return self._select(
+            "s.day IN (SELECT day FROM patronages WHERE name = ?1 "
+            "UNION SELECT day FROM patronages WHERE name_english = ?1)",
+            (patronage,),
+        )
+
+    def byCity(self, city: str) -> list[tuple[date, Saint]]:
+        """Find the patron saints of a city.
+
+        Args:
+            city (str): Name of the city. Case insensitive.
+
+        Returns:
+            list[tuple[date, Saint]]: day and saint, in chronological order
+        """
+        return self._select("s.patron_city = ?", (city,))
+
+    def byName(self, name: str) -> list[tuple[date, Saint]]:
+        """Find the saints with a name.
+
+        Args:
+            name (str): Name of the saints. Case insensitive.
+
+        Returns:
+            list[tuple[date, Saint]]: day and saint, in chronological order
+        """
+        return self._select("s.name = ?", (name,))
@@ -4,8 +4,8 @@ from __future__ import annotations
 import logging
 
 
+from .artifact_store import ArtifactStore
 from .scheduler import Scheduler
-from .saint_factory import SaintFactory
 
 
 class SaintCreator(Scheduler):
@@ -15,7 +15,7 @@ class SaintCreator(Scheduler):
         """Initialize the creator."""
         super().__init__()
         self._generate_time = self.loadScheduleTime("generate_time")
-        self._factory = SaintFactory()
+        self._store = ArtifactStore()
 
     def start(self) -> None:
         """Start the scheduler."""
@@ -23,6 +23,6 @@ class SaintCreator(Scheduler):
         super().start("generate_time", self._generate)
 
     def _generate(self) -> None:
-        """Generate a saint."""
-        self._factory.generateSaint()
+        """Generate and publish a saint."""
+        self._store.publish()
         logging.info("Saint generated")
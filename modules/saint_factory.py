@@ -1,23 +1,64 @@
 """Module containing the SaintFactory class."""
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 import random
-from datetime import datetime
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from typing import Callable
 
-import openai
-import requests
 import toml
-from PIL import Image, ImageDraw, ImageFont
-
+from PIL import Image, ImageDraw
+
+from .card_template import TEMPLATES, CardTemplate
+from .font_catalogue import FontCatalogue
+from .font_metrics import FontMetrics, FontPool
+from .image_client import ImageClient
+from .image_encoder import ImageEncoder
+from .portrait_cache import PortraitCache
+from .resource_pack import ResourcePack, ResourcePackException
 from .saint import Gender, Saint
+from .saint_archive import SaintArchive
+from .unique_sequence import UniqueSequence
+from .weighted_sampler import SeasonalBoost, WeightedSampler
+from .word_corpus import WordCorpus
+
+
+# text files of the corpora, which are the source of the resource pack
+CORPUS_SOURCES = {
+    "names_m": "resources/nomi-m.txt",
+    "names_f": "resources/nomi-f.txt",
+    "animals": "resources/animali-plurali.txt",
+    "animals_english": "resources/animali-plurali-inglese.txt",
+    "professions": "resources/professioni-plurali.txt",
+    "professions_english": "resources/professioni-plurali-inglese.txt",
+    "cities": "resources/citta.txt",
+}
+# corpora aligned line by line with their English translation
+PARALLEL_CORPORA = [
+    ("animals", "animals_english"),
+    ("professions", "professions_english"),
+]
 
 
 class SaintFactory:
     """Class handling the logic to generate images of saints."""
 
     _settings: dict[str, str]
+    _corpora: dict[str, WordCorpus]
+    _metrics: FontMetrics
+    _fonts: FontCatalogue
+    _template: CardTemplate
+    _image_client: ImageClient
+    _portraits: PortraitCache
+    _encoder: ImageEncoder
+    _archive: SaintArchive
+    _samplers: dict[str, WeightedSampler]
+    _sequences: dict[str, UniqueSequence]
 
     def __init__(self) -> SaintFactory:
         """Initialize the saint factory.
@@ -27,18 +68,144 @@ class SaintFactory:
         """
         self._settings = self._loadSettings("settings.toml")
         self._createFolderStructure()
+        self._corpora = self._loadCorpora()
+        self._samplers = self._createSamplers()
+        self._sequences = self._createSequences()
+        self._metrics = self._createFontMetrics()
+        self._fonts = FontCatalogue(
+            self._settings["fonts_folder"],
+            pool=self._metrics.pool,
+            check_interval=self._settings.get("fonts_check_interval", 60),
+        )
+        self._template = TEMPLATES[self._settings.get("template", "classic")]
+        self._image_client = ImageClient(
+            api_key=self._settings["openai_key"],
+            api_base=self._settings.get("openai_api_base", "https://api.openai.com/v1"),
+            max_concurrency=self._settings.get("openai_max_concurrency", 4),
+            connect_timeout=self._settings.get("openai_connect_timeout", 10),
+            read_timeout=self._settings.get("openai_read_timeout", 120),
+        )
+        self._portraits = PortraitCache(
+            # defaults to a subfolder of the OpenAI images folder
+            folder=self._settings.get("portrait_cache_folder")
+            or os.path.join(self._settings["openai_folder"], "cache"),
+            max_size_mb=self._settings.get("portrait_cache_max_mb", 512),
+            max_age_days=self._settings.get("portrait_cache_max_age_days", 365),
+        )
+        self._encoder = ImageEncoder(quality=85)
+        self._archive = SaintArchive(
+            self._settings.get("archive_path")
+            or os.path.join(self._settings["toml_folder"], "archive.sqlite")
+        )
 
-    def _loadFile(self, path: str) -> list[str]:
-        """Load a file.
+    def _loadCorpora(self) -> dict[str, WordCorpus]:
+        """Load the word lists used to generate the saints.
 
-        Args:
-            path (str): Path to the file.
+        The lists are read from the resource pack (built by the
+        build-resources.py script) if it's up to date with the text files,
+        otherwise from the text files themselves. Either way, they are
+        loaded only once per process and shared between all the factories.
 
         Returns:
-            list[str]: Lines of the file.
+            dict[str, WordCorpus]: Corpora, by name.
         """
-        with open(path) as f:
-            return [line.strip() for line in f]
+        pack_path = self._settings.get("resource_pack_path", "")
+        if pack_path and os.path.isfile(pack_path):
+            try:
+                pack = ResourcePack.load(pack_path)
+                if pack.isCurrent(CORPUS_SOURCES):
+                    return {name: pack.corpus(name) for name in CORPUS_SOURCES}
+                logging.warning(
+                    f"Resource pack {pack_path} is older than the text files, "
+                    "run build-resources.py to update it"
+                )
+            except ResourcePackException as e:
+                logging.warning(f"Resource pack {pack_path} not usable: {e}")
+
+        logging.info("Loading corpora")
+        corpora = {name: WordCorpus.load(path) for name, path in CORPUS_SOURCES.items()}
+        for first, second in PARALLEL_CORPORA:
+            WordCorpus.checkParallel(
+                corpora[first],
+                corpora[second],
+                CORPUS_SOURCES[first],
+                CORPUS_SOURCES[second],
+            )
+
+        return corpora
+
+    def _createSamplers(self) -> dict[str, WeightedSampler]:
+        """Create the samplers used to draw the entries of the corpora.
+
+        The entries are drawn according to the weights in the corpora, if
+        any. The "sampling_filters" setting restricts a corpus to some
+        categories (e.g. {cities = ["italy"]}), while the "sampling_boosts"
+        setting multiplies the weights of a category in a period of the year.
+
+        Returns:
+            dict[str, WeightedSampler]: Samplers, by corpus name.
+        """
+        filters = self._settings.get("sampling_filters", {})
+        boosts = SeasonalBoost.fromSettings(self._settings.get("sampling_boosts", []))
+
+        samplers = {}
+        for key in ("names_m", "names_f", "animals", "professions", "cities"):
+            samplers[key] = WeightedSampler(
+                self._corpora[key],
+                categories=filters.get(key),
+                boosts=[b for b in boosts if b.corpus == key],
+            )
+
+        return samplers
+
+    def _createSequences(self) -> dict[str, UniqueSequence]:
+        """Create the sequences used by the unique mode.
+
+        In unique mode, enabled by a positive "unique_window" setting, the
+        names, the patronages and the patron cities don't repeat within that
+        many days.
+
+        Returns:
+            dict[str, UniqueSequence]: Sequences, by corpus name. Empty if
+                the unique mode is disabled.
+        """
+        window = self._settings.get("unique_window", 0)
+        if window <= 0:
+            return {}
+
+        logging.info(f"Unique mode enabled, window of {window} days")
+        sequences = {}
+        # names in both lists are only used as male, so they can't repeat
+        # because of two saints of different gender
+        excluded = {"names_f": set(self._corpora["names_m"])}
+        for key in ("names_m", "names_f", "animals", "professions", "cities"):
+            # only the first occurrence of repeated words is used, among the
+            # entries allowed by the category filters
+            indexes = {}
+            for index in self._samplers[key].candidates:
+                word = self._corpora[key][index]
+                if word not in excluded.get(key, ()):
+                    indexes.setdefault(word, index)
+            sequences[key] = UniqueSequence(list(indexes.values()), window, key)
+
+        return sequences
+
+    def _createFontMetrics(self) -> FontMetrics:
+        """Create the engine used to fit the text in the images.
+
+        The width tables of the fonts are measured on the characters
+        of the names and the cities, which make up the text of the images.
+
+        Returns:
+            FontMetrics
+        """
+        alphabet = set("0123456789()- ")
+        for key in ("names_m", "names_f", "cities"):
+            alphabet |= self._corpora[key].characters()
+        alphabet |= set("San Santa Patrono Patrona di")
+
+        pool = FontPool(self._settings.get("font_cache_size", 64))
+        return FontMetrics(pool, alphabet)
 
     def _loadSettings(self, path: str) -> dict[str, str]:
         """Load settings from a TOML file.
@@ -63,23 +230,12 @@ class SaintFactory:
         os.makedirs(self._settings["image_folder"], exist_ok=True)
         os.makedirs(self._settings["toml_folder"], exist_ok=True)
 
-    def _downloadImage(self, url: str, path: str) -> None:
-        """Download an image from a URL.
-
-        Args:
-            url (str): url of the image
-            path (str): destination path
-        """
-        logging.info(f"Downloading image from {url}")
-        r = requests.get(url, allow_redirects=True)
-        open(path, "wb").write(r.content)
-        logging.info(f"Image downloaded to {path}")
-
-    def _generatePrompt(self, saint: Saint) -> str:
+    def _generatePrompt(self, saint: Saint, rng: random.Random) -> str:
         """Generate the prompt for the AI.
 
         Args:
             saint (Saint): Saint to generate the image for.
+            rng (random.Random): Seeded random generator.
 
         Returns:
             str
@@ -118,80 +274,112 @@ class SaintFactory:
             "in the style of a Matisse painting",
             "in the style of a Klimt painting",
         ]
-        prompt = f"{base_prompt} {random.choice(styles)}."
+        prompt = f"{base_prompt} {rng.choice(styles)}."
         logging.info(f"Prompt generated: {prompt}")
         return prompt
 
-    def _downloadAIImage(self, saint: Saint) -> str:
+    async def fetchAIImage(self, prompt: str, day: date) -> str:
         """Create and download the image from the AI.
 
         Args:
-            saint (Saint): Saint to generate the image for.
+            prompt (str): Prompt of the image.
+            day (date): Day of the saint.
 
         Returns:
             str: Path to the image.
         """
+        path = self._AIimageFilename(day)
+        key = self._portraitKey(prompt)
+        if self._portraits.restore(key, path):
+            logging.info(f"AI image restored from cache to {path}")
+            return path
+
         logging.info("Downloading AI image")
-        openai.api_key = self._settings["openai_key"]
-        logging.info("Requesting image from OpenAI")
-        image_resp = openai.Image.create(
-            prompt=self._generatePrompt(saint),
-            n=1,
-            size="512x512",
-        )
-        logging.info("Image received from OpenAI")
-        url = image_resp["data"][0]["url"]
-        self._downloadImage(url, self._AIimageFilename)
-        return self._AIimageFilename
+        await self._image_client.fetch(prompt, path)
+        self._portraits.store(key, path)
+        return path
 
-    def _selectFont(self) -> str:
-        """
-        Randomly select a font from the font folder.
+    def _downloadAIImage(self, prompt: str, day: date) -> str:
+        """Create and download the image from the AI, outside of an event loop.
+
+        Args:
+            prompt (str): Prompt of the image.
+            day (date): Day of the saint.
 
         Returns:
-            str: Path to the font.
+            str: Path to the image.
         """
-        logging.info(f"Selecting font from {self._settings['fonts_folder']}")
-        # list all the fonts in the folder
-        font_files = [
-            os.path.join(self._settings["fonts_folder"], f)
-            for f in os.listdir(self._settings["fonts_folder"])
-            if os.path.isfile(os.path.join(self._settings["fonts_folder"], f))
-            and f.endswith(".ttf")
-        ]
+        return asyncio.run(self.fetchAIImage(prompt, day))
 
-        # select a random font
-        selected_font = random.choice(font_files)
-        logging.info(f"Selected font: {selected_font}")
-        return selected_font
+    def _portraitKey(self, prompt: str) -> str:
+        """Get the key of an AI image in the portrait cache.
+
+        Args:
+            prompt (str): Prompt of the image.
+
+        Returns:
+            str
+        """
+        return PortraitCache.key(prompt, size=self._image_client.image_size)
 
-    def _fitFont(
-        self, text: str, font_size: int, font_path: str, max_width: float
-    ) -> int:
-        """Fit a font to a given width.
+    def lookupPortrait(self, prompt: str) -> str:
+        """Look for an AI image in the portrait cache.
 
         Args:
-            text (str): text to fit
-            font_size (int)
-            font_path (str)
-            max_width (float): maximum width of the text (in pixels)
+            prompt (str): Prompt of the image.
 
         Returns:
-            int: size of the font
+            str: Path to the cached image, or None if it's not cached.
         """
-        font_size = 100
-        while True:
-            font = ImageFont.FreeTypeFont(font_path, font_size)
-            _, __, w, ___ = font.getbbox(
-                text=text,
-            )
+        return self._portraits.lookup(self._portraitKey(prompt))
+
+    async def fetchAIImages(self, days: list[date]) -> None:
+        """Create and download the missing AI images of many days concurrently.
+
+        Args:
+            days (list[date]): Days of the saints.
+        """
+        requests = []
+        for d in days:
+            if os.path.isfile(self._AIimageFilename(d)):
+                continue
+            rng = self._seededRandom(d)
+            saint = self._createSaint(rng, day=d)
+            prompt = self._generatePrompt(saint, rng)
+            if self._portraits.restore(
+                self._portraitKey(prompt), self._AIimageFilename(d)
+            ):
+                continue
+            requests.append((prompt, self._AIimageFilename(d)))
+
+        logging.info(f"Downloading {len(requests)} AI images")
+        results = await self._image_client.fetchMany(requests)
+        for (prompt, _), path in zip(requests, results):
+            if path is not None:
+                self._portraits.store(self._portraitKey(prompt), path)
+
+    def _prefetchAIImages(self, days: list[date]) -> None:
+        """Download the missing AI images of many days, outside of an event loop.
+
+        Args:
+            days (list[date]): Days of the saints.
+        """
+        asyncio.run(self.fetchAIImages(days))
 
-            if w < max_width:
-                break
+    def _selectFont(self, rng: random.Random) -> str:
+        """
+        Randomly select a font from the font folder.
 
-            font_size -= 1
+        Args:
+            rng (random.Random): Seeded random generator.
 
-        return font_size
+        Returns:
+            str: Path to the font.
+        """
+        logging.info(f"Selecting font from {self._settings['fonts_folder']}")
+        selected_font = self._fonts.choice(rng)
+        logging.info(f"Selected font: {selected_font}")
+        return selected_font
 
     def _createPlaceholderImage(self) -> Image.Image:
         """Create a placeholder image for when the AI is offline."""
@@ -210,11 +398,15 @@ class SaintFactory:
         # return the image
         return base_img
 
-    def _generateImage(self, saint: Saint, offline: bool = False) -> str:
+    def _generateImage(
+        self, saint: Saint, rng: random.Random, day: date, offline: bool = False
+    ) -> str:
         """Generate the image of a saint.
 
         Args:
             saint (Saint): Saint to generate the image for.
+            rng (random.Random): Seeded random generator.
+            day (date): Day of the saint.
             offline (bool, optional): If True, the AI won't be used
                 and a placeholder image will be used instead.
                 Defaults to False.
@@ -227,96 +419,68 @@ class SaintFactory:
         if offline:
             base_img = self._createPlaceholderImage()
         else:
-            if not os.path.isfile(self._AIimageFilename):
+            # the prompt is always generated, so that the following random
+            # choices don't depend on the image being already downloaded
+            prompt = self._generatePrompt(saint, rng)
+            if not os.path.isfile(self._AIimageFilename(day)):
                 # if source image doesn't exist, download it
-                self._downloadAIImage(saint)
-            base_img = Image.open(self._AIimageFilename)
+                self._downloadAIImage(prompt, day)
+            base_img = Image.open(self._AIimageFilename(day))
 
-        border_x = 32
-        border_y = 192
+        out_img = self._composeImage(saint, rng, base_img)
 
-        # create output image
-        out_size = (base_img.width + border_x * 2, base_img.height + border_y)
-        img_background_color = (
-            random.randint(235, 255),
-            random.randint(235, 255),
-            random.randint(235, 255),
-            255,
-        )
-        out_img = Image.new("RGBA", out_size, color=img_background_color)
-        out_img.paste(base_img, (border_x, border_x))
+        # save the image
+        filename = self._outImageFilename(day)
+        self._atomicWrite(filename, lambda path: out_img.save(path, format="PNG"))
+        logging.info(f"Image saved to {filename}")
+        return filename
 
-        # initiate the drawing process
-        draw = ImageDraw.Draw(out_img)
-        text = f"{saint.full_name} ({saint.born}-{saint.died})"
-        subtext = saint.full_patron_city
+    def _composeImage(
+        self,
+        saint: Saint,
+        rng: random.Random,
+        portrait: Image.Image,
+        template: CardTemplate = None,
+    ) -> Image.Image:
+        """Compose the card of a saint around its portrait.
 
-        # fit the font to the image width
-        font_path = self._selectFont()
-        font_line_scl = 0.8
-        font_size = self._fitFont(
-            text=text,
-            font_size=100,
-            font_path=font_path,
-            max_width=(out_img.width - border_x * 2) * font_line_scl,
-        )
-
-        # draw the text, centred
-        font = ImageFont.FreeTypeFont(font_path, font_size)
-        _, __, w, h = font.getbbox(
-            text=text,
-        )
+        Args:
+            saint (Saint): Saint to compose the card for.
+            rng (random.Random): Seeded random generator.
+            portrait (Image.Image): Portrait of the saint.
+            template (CardTemplate, optional): Layout of the card.
+                Defaults to the template in the settings.
 
-        text_x = out_img.width / 2 - w / 2
-        text_y = (
-            out_img.height
-            - (out_img.height - base_img.height - border_x) * 0.66
-            - h / 2
-        )
+        Returns:
+            Image.Image
+        """
+        if template is None:
+            template = self._template
 
-        draw.text(
-            xy=(text_x, text_y),
-            text=text,
-            font=font,
-            fill=(0, 0, 0, 255),
+        img_background_color = (
+            rng.randint(235, 255),
+            rng.randint(235, 255),
+            rng.randint(235, 255),
+            255,
         )
+        text = f"{saint.full_name} ({saint.born}-{saint.died})"
+        subtext = saint.full_patron_city
+        font_path = self._selectFont(rng)
 
-        # draw the subtext, centred
-        font_line_scl = 0.4
-        font_size = self._fitFont(
-            text=subtext,
-            font_size=100,
+        # compose the image
+        return template.render(
+            portrait=portrait,
+            texts=[text, subtext],
             font_path=font_path,
-            max_width=(out_img.width - border_x * 2) * font_line_scl,
-        )
-
-        font = ImageFont.FreeTypeFont(font_path, font_size)
-        _, __, w, h = font.getbbox(
-            text=subtext,
-        )
-
-        text_x = out_img.width / 2 - w / 2
-        text_y = (
-            out_img.height
-            - (out_img.height - base_img.height - border_x) * 0.33
-            - h / 2
-        )
-
-        draw.text(
-            xy=(text_x, text_y),
-            text=subtext,
-            font=font,
-            fill=(0, 0, 0, 255),
+            metrics=self._metrics,
+            background_color=img_background_color,
         )
 
-        # save the image
-        filename = self._outImageFilename
-        out_img.save(filename)
-        logging.info(f"Image saved to {filename}")
-        return filename
-
     def generateSaint(
-        self, offline: bool = False, force_generation: bool = False
+        self,
+        offline: bool = False,
+        force_generation: bool = False,
+        day: date = None,
     ) -> Saint:
         """Generate a saint.
 
@@ -329,39 +493,220 @@ class SaintFactory:
             force_generation (bool, optional): If True, the saint will be
                 generated even if it already exists.
                 Defaults to False.
+            day (date, optional): Day to generate the saint for.
+                Defaults to today.
 
         Returns:
             Saint
         """
-        logging.info("Generating saint")
+        if day is None:
+            day = date.today()
+
+        logging.info(f"Generating saint for {day.isoformat()}")
         # if the saint is already generated, load it from file
-        if os.path.isfile(self._outSaintFilename) and not force_generation:
+        if os.path.isfile(self._outSaintFilename(day)) and not force_generation:
             logging.info("Loading saint from file")
-            return Saint.fromTOML(self._outSaintFilename)
+            return Saint.fromTOML(self._outSaintFilename(day))
+
+        rng = self._seededRandom(day)
+        saint = self._createSaint(rng, image_path=self._outImageFilename(day), day=day)
+
+        logging.info("Generating image")
+        self._generateImage(saint, rng, day, offline=offline)
+
+        logging.info("Saving saint to file")
+        # the TOML file is written last, marking the saint as complete
+        self._atomicWrite(self._outSaintFilename(day), saint.toTOML)
+        try:
+            self._archive.add(
+                day, saint, source_mtime=os.path.getmtime(self._outSaintFilename(day))
+            )
+        except sqlite3.Error as e:
+            # the saint is already published, the row is added by a rebuild
+            logging.warning(f"Can't add the saint to the archive: {e}")
+
+        logging.info("Saint generated")
+        return saint
+
+    def createSaint(self, seed: str) -> Saint:
+        """Create a saint from an arbitrary seed, without saving it.
+
+        Args:
+            seed (str): Seed of the random generator.
+
+        Returns:
+            Saint
+        """
+        return self._createSaint(random.Random(seed))
+
+    def renderSaint(self, seed: str, template: str = None) -> bytes:
+        """Render the card of the saint created from a seed, in memory.
+
+        The AI is not used: the card contains the placeholder portrait.
+
+        Args:
+            seed (str): Seed of the random generator.
+            template (str, optional): Name of the template of the card.
+                Defaults to the template in the settings.
+
+        Returns:
+            bytes: JPEG encoded card
+        """
+        rng = random.Random(seed)
+        saint = self._createSaint(rng)
+        image = self._composeImage(
+            saint,
+            rng,
+            self._createPlaceholderImage(),
+            TEMPLATES[template] if template is not None else None,
+        )
+        return self._encoder.encodeImage(image)
+
+    def _atomicWrite(self, path: str, write: Callable[[str], None]) -> None:
+        """Write a file atomically.
+
+        The file is written to a temporary path in the same folder, then
+        renamed, so that readers never see a partially written file.
+
+        Args:
+            path (str): Destination path.
+            write (Callable[[str], None]): Function writing the file to
+                the path it receives.
+        """
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or ".", suffix=".part"
+        )
+        os.close(fd)
+        try:
+            write(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @property
+    def archive(self) -> SaintArchive:
+        """Archive of the generated saints."""
+        return self._archive
+
+    def rebuildArchive(self, full: bool = False) -> int:
+        """Update the archive from the TOML files of the generated saints.
+
+        Args:
+            full (bool, optional): If True, every file is loaded again,
+                otherwise only the changed ones. Defaults to False.
+
+        Returns:
+            int: number of saints loaded
+        """
+        return self._archive.rebuild(self._settings["toml_folder"], full=full)
+
+    def isGenerated(self, day: date = None) -> bool:
+        """Check whether the saint of a day was already generated.
+
+        Args:
+            day (date, optional): Day of the saint. Defaults to today.
+
+        Returns:
+            bool
+        """
+        if day is None:
+            day = date.today()
+
+        return os.path.isfile(self._outSaintFilename(day))
+
+    def loadSaint(self, day: date = None) -> Saint:
+        """Load an already generated saint.
+
+        Args:
+            day (date, optional): Day of the saint. Defaults to today.
+
+        Returns:
+            Saint
+        """
+        if day is None:
+            day = date.today()
+
+        return Saint.fromTOML(self._outSaintFilename(day))
+
+    def lockFilename(self, day: date = None) -> str:
+        """Get the filename of the lock guarding the saint of a day.
+
+        Args:
+            day (date, optional): Day of the saint. Defaults to today.
+
+        Returns:
+            str
+        """
+        if day is None:
+            day = date.today()
+
+        timestamp = day.strftime("%Y%m%d")
+        folder = self._settings["toml_folder"]
+        return f"{folder}{timestamp}.lock"
+
+    def _seededRandom(self, day: date) -> random.Random:
+        """Create the random generator used to generate the saint of a day.
+
+        Args:
+            day (date): Day of the saint.
 
+        Returns:
+            random.Random
+        """
         # random seeding to make the generation reproducible
-        seed = datetime.now().strftime("%Y%m%d")
-        random.seed(seed)
+        seed = day.strftime("%Y%m%d")
+        return random.Random(seed)
+
+    def _pickIndex(self, key: str, rng: random.Random, day: date = None) -> int:
+        """Choose the index of an item of a corpus.
+
+        If the saint has a day and the unique mode is enabled, the item is
+        taken from the unique sequence of the corpus, otherwise it's drawn
+        by the sampler of the corpus.
+
+        Args:
+            key (str): Name of the corpus.
+            rng (random.Random): Seeded random generator.
+            day (date, optional): Day of the saint. Defaults to None.
+
+        Returns:
+            int
+        """
+        if day is not None and key in self._sequences:
+            return self._sequences[key][day.toordinal()]
+
+        return self._samplers[key].pick(rng, day)
+
+    def _createSaint(
+        self, rng: random.Random, image_path: str = None, day: date = None
+    ) -> Saint:
+        """Randomly choose the parameters of a saint.
+
+        Args:
+            rng (random.Random): Seeded random generator.
+            image_path (str, optional): Path of the image of the saint.
+                Defaults to None.
+            day (date, optional): Day of the saint, used by the unique mode.
+                Defaults to None.
 
+        Returns:
+            Saint
+        """
         # choose the parameters of the saint
-        gender = random.choice(["m", "f"])
-        names = {
-            "m": self._loadFile("resources/nomi-m.txt"),
-            "f": self._loadFile("resources/nomi-f.txt"),
-        }
-        animals = self._loadFile("resources/animali-plurali.txt")
-        animals_english = self._loadFile("resources/animali-plurali-inglese.txt")
-        professions = self._loadFile("resources/professioni-plurali.txt")
-        professions_english = self._loadFile(
-            "resources/professioni-plurali-inglese.txt"
-        )
-        cities = self._loadFile("resources/citta.txt")
+        gender = rng.choice(["m", "f"])
+        names = self._corpora[f"names_{gender}"]
+        animals = self._corpora["animals"]
+        animals_english = self._corpora["animals_english"]
+        professions = self._corpora["professions"]
+        professions_english = self._corpora["professions_english"]
+        cities = self._corpora["cities"]
 
-        name = random.choice(names[gender])
+        name = names[self._pickIndex(f"names_{gender}", rng, day)]
 
         protector_of_indexes = [
-            random.randint(0, len(animals) - 1),
-            random.randint(0, len(professions) - 1),
+            self._pickIndex("animals", rng, day),
+            self._pickIndex("professions", rng, day),
         ]
 
         protector_of = [
@@ -373,15 +718,15 @@ class SaintFactory:
             professions_english[protector_of_indexes[1]],
         ]
 
-        patron_city = random.choice(cities)
-        born = random.randint(100, 1800)
-        died = born + random.randint(20, 100)
-        birthplace = random.choice(cities)
-        deathplace = random.choice(cities)
+        patron_city = cities[self._pickIndex("cities", rng, day)]
+        born = rng.randint(100, 1800)
+        died = born + rng.randint(20, 100)
+        birthplace = cities[self._samplers["cities"].pick(rng, day)]
+        deathplace = cities[self._samplers["cities"].pick(rng, day)]
 
         logging.info("Generating saint")
         # create the saint object
-        saint = Saint(
+        return Saint(
             gender=Gender(gender),
             name=name,
             protector_of=protector_of,
@@ -390,49 +735,141 @@ class SaintFactory:
             died=died,
             birthplace=birthplace,
             deathplace=deathplace,
+            image_path=image_path,
             protector_of_english=protector_of_english,
         )
 
-        logging.info("Generating image")
-        self._generateImage(saint, offline=offline)
-        # associate the image to the saint
-        saint.image_path = self._outImageFilename
+    def generateRange(
+        self,
+        start: date,
+        end: date,
+        workers: int = 1,
+        offline: bool = False,
+        force_generation: bool = False,
+    ) -> list[Saint]:
+        """Generate the saints for a range of days, in parallel.
+
+        Each day is seeded by its date, so the result is the same as calling
+        generateSaint on that day. Days that were already generated are
+        skipped, unless force_generation is True, so an interrupted run
+        can be resumed. When online, the missing AI images are downloaded
+        concurrently before rendering.
 
-        logging.info("Saving saint to file")
-        saint.toTOML(self._outSaintFilename)
+        Args:
+            start (date): First day of the range.
+            end (date): Last day of the range (included).
+            workers (int, optional): Number of worker processes.
+                Defaults to 1.
+            offline (bool, optional): If True, the AI won't be used
+                and a placeholder image will be used instead.
+                Defaults to False.
+            force_generation (bool, optional): If True, the saints will be
+                generated even if they already exist.
+                Defaults to False.
 
-        logging.info("Saint generated")
-        return saint
+        Returns:
+            list[Saint]: Saints of the range, in chronological order.
+        """
+        days = [start + timedelta(days=d) for d in range((end - start).days + 1)]
+        missing = [
+            d
+            for d in days
+            if force_generation or not os.path.isfile(self._outSaintFilename(d))
+        ]
+        logging.info(
+            f"Generating {len(missing)} saints out of {len(days)} "
+            f"from {start.isoformat()} to {end.isoformat()}"
+        )
 
-    @property
-    def _AIimageFilename(self) -> str:
+        if not offline:
+            self._prefetchAIImages(missing)
+
+        if workers <= 1:
+            for d in missing:
+                self.generateSaint(offline, force_generation=True, day=d)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=initWorker
+            ) as executor:
+                futures = [
+                    executor.submit(_generateInWorker, d, offline) for d in missing
+                ]
+                for future in futures:
+                    logging.info(f"Saint saved to {future.result()}")
+
+        return [Saint.fromTOML(self._outSaintFilename(d)) for d in days]
+
+    def _AIimageFilename(self, day: date) -> str:
         """Get the filename of the image generated by OpenAI.
 
+        Args:
+            day (date): Day of the saint.
+
         Returns:
             str
         """
-        timestamp = datetime.today().strftime("%Y%m%d")
+        timestamp = day.strftime("%Y%m%d")
         folder = self._settings["openai_folder"]
         return f"{folder}{timestamp}.png"
 
-    @property
-    def _outImageFilename(self) -> str:
+    def _outImageFilename(self, day: date) -> str:
         """Get the filename of the image generated by the script.
 
+        Args:
+            day (date): Day of the saint.
+
         Returns:
             str
         """
-        timestamp = datetime.today().strftime("%Y%m%d")
+        timestamp = day.strftime("%Y%m%d")
         folder = self._settings["image_folder"]
         return f"{folder}{timestamp}.png"
 
-    @property
-    def _outSaintFilename(self) -> str:
+    def _outSaintFilename(self, day: date) -> str:
         """Get the filename of the saint generated by the script.
 
+        Args:
+            day (date): Day of the saint.
+
         Returns:
             str
         """
-        timestamp = datetime.today().strftime("%Y%m%d")
+        timestamp = day.strftime("%Y%m%d")
         folder = self._settings["toml_folder"]
         return f"{folder}{timestamp}.toml"
+
+
+_worker_factory: SaintFactory = None
+
+
+def initWorker() -> None:
+    """Create the factory used by a worker process."""
+    global _worker_factory
+    _worker_factory = SaintFactory()
+
+
+def _generateInWorker(day: date, offline: bool) -> str:
+    """Generate a single saint inside a worker process of generateRange.
+
+    Args:
+        day (date): Day of the saint.
+        offline (bool): If True, the AI won't be used.
+
+    Returns:
+        str: Path to the TOML file of the saint.
+    """
+    _worker_factory.generateSaint(offline, force_generation=True, day=day)
+    return _worker_factory._outSaintFilename(day)
+
+
+def renderInWorker(seed: str, template: str) -> bytes:
+    """Render a saint inside a worker process.
+
+    Args:
+        seed (str): Seed of the random generator.
+        template (str): Name of the template of the card.
+
+    Returns:
+        bytes: JPEG encoded card
+    """
+    return _worker_factory.renderSaint(seed, template)
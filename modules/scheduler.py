@@ -1,29 +1,100 @@
 """This module contains the class handling the logic of the scheduler.
 
 The scheduler is a class inherited by other classes that need to schedule
-a task once a day. It uses the schedule library to schedule the task and \
-the time is loaded from a settings file, in format HH:MM.
+a task once a day. The time is loaded from a settings file, in format HH:MM,
+and it's interpreted in the Europe/Rome timezone, so the task runs at the
+same wall clock time all year long, across DST changes.
+
+Instead of polling, the scheduler sleeps until the next deadline. The time
+is read from a Clock, which can be replaced to run simulated schedules.
 """
 from __future__ import annotations
 
 import logging
-from typing import Callable
-from datetime import datetime
+from datetime import datetime, time, timedelta, timezone
 from time import sleep
+from typing import Callable
 
 import pytz
-import schedule
 import toml
 
+from .retry import RetryException, RetryMetrics, RetryPolicy
+
+
+class Clock:
+    """Class providing the current time to the scheduler."""
+
+    # the wall clock is checked at least this often (in seconds) while
+    # sleeping, so that a suspension of the machine doesn't delay the jobs
+    _max_sleep: float = 60
+
+    def now(self) -> datetime:
+        """Get the current time.
+
+        Returns:
+            datetime: current time, timezone aware
+        """
+        return datetime.now(timezone.utc)
+
+    def sleepUntil(self, deadline: datetime) -> None:
+        """Wait until a given time.
+
+        Args:
+            deadline (datetime): time to wake up at, timezone aware
+        """
+        while (seconds := (deadline - self.now()).total_seconds()) > 0:
+            sleep(min(seconds, self._max_sleep))
+
+
+class Job:
+    """Class containing a function scheduled once a day."""
+
+    function: Callable
+    run_time: time
+    next_run: datetime
+
+    def __init__(self, function: Callable, run_time: time) -> Job:
+        """Initialize the job.
+
+        Args:
+            function (Callable): function to run
+            run_time (time): local time of the day the function runs at
+
+        Returns:
+            Job
+        """
+        self.function = function
+        self.run_time = run_time
+        self.next_run = None
+
+    @property
+    def name(self) -> str:
+        """Name of the scheduled function."""
+        return getattr(self.function, "__name__", repr(self.function))
+
 
 class Scheduler:
     """Class handling the logic of the scheduler."""
 
     _timezone: pytz.timezone = pytz.timezone("Europe/Rome")
+    _clock: Clock
+    _jobs: list[Job]
+    _retry_metrics: RetryMetrics
+
+    # exceptions that are never retried by tryFunction
+    _fatal_exceptions: tuple[type[BaseException], ...] = ()
 
-    def __init__(self) -> Scheduler:
-        """Initialize the scheduler."""
+    def __init__(self, clock: Clock = None) -> Scheduler:
+        """Initialize the scheduler.
+
+        Args:
+            clock (Clock, optional): Clock providing the time.
+                Defaults to the system clock.
+        """
         self._settings = self._loadSettings()
+        self._clock = clock if clock is not None else Clock()
+        self._jobs = []
+        self._retry_metrics = RetryMetrics()
 
     def _loadSettings(self, path: str = "settings.toml", key: str = None) -> dict:
         """Load settings from a toml file.
@@ -49,14 +120,45 @@ class Scheduler:
         return settings
 
     def loadScheduleTime(self, key: str) -> datetime:
-        """Load the time the image was generated.
+        """Load the time a function is scheduled at.
 
         Returns:
-            datetime: Time the image was generated.
+            datetime: Today, at the scheduled time, in the local timezone.
         """
-        return datetime.strptime(self._settings[key], "%H:%M").replace(
-            tzinfo=self._timezone
-        )
+        run_time = datetime.strptime(self._settings[key], "%H:%M").time()
+        today = self._clock.now().astimezone(self._timezone).date()
+        return self._localize(datetime.combine(today, run_time))
+
+    def _localize(self, naive: datetime) -> datetime:
+        """Attach the local timezone to a wall clock time.
+
+        Times skipped by the DST change are moved forward by an hour,
+        repeated times are resolved to their second occurrence.
+
+        Args:
+            naive (datetime): wall clock time
+
+        Returns:
+            datetime: timezone aware time
+        """
+        return self._timezone.normalize(self._timezone.localize(naive, is_dst=False))
+
+    def _nextRun(self, run_time: time, after: datetime) -> datetime:
+        """Compute the first time a daily job runs after a given instant.
+
+        Args:
+            run_time (time): local time of the day the job runs at
+            after (datetime): instant to start from, timezone aware
+
+        Returns:
+            datetime: timezone aware time of the next run
+        """
+        day = after.astimezone(self._timezone).date()
+        while True:
+            candidate = self._localize(datetime.combine(day, run_time))
+            if candidate > after:
+                return candidate
+            day += timedelta(days=1)
 
     def _schedule(self, key: str, function: Callable) -> None:
         """Schedule a function to run at a specific time once a day.
@@ -65,43 +167,97 @@ class Scheduler:
             key (str): key containing the run time in format %H:%M
             function (Callable): function to run
         """
-        schedule_time = self.loadScheduleTime(key)
-        schedule_time_str = schedule_time.strftime("%H:%M")
-        schedule.every().day.at(schedule_time_str).do(function)
+        job = Job(function, self.loadScheduleTime(key).time())
+        job.next_run = self._nextRun(job.run_time, self._clock.now())
+        self._jobs.append(job)
+
+    def runPending(self) -> None:
+        """Run the jobs whose time has come.
+
+        A job running late by less than the misfire grace time just runs.
+        A job later than that (e.g. after the machine was suspended) runs
+        once to catch up if "catch_up" is enabled in the settings, otherwise
+        it's skipped. In both cases, the missed runs are not repeated.
+        """
+        grace = timedelta(seconds=self._settings.get("misfire_grace_time", 300))
+        catch_up = self._settings.get("catch_up", True)
+
+        for job in self._jobs:
+            now = self._clock.now()
+            if now < job.next_run:
+                continue
+
+            delay = now - job.next_run
+            if delay <= grace or catch_up:
+                if delay > grace:
+                    logging.warning(f"Catching up {job.name}, late by {delay}")
+                job.function()
+            else:
+                logging.warning(f"Skipping {job.name}, late by {delay}")
+
+            job.next_run = self._nextRun(job.run_time, self._clock.now())
+            logging.info(f"Function {job.name} scheduled for {job.next_run}")
+
+    def _retryPolicy(self) -> RetryPolicy:
+        """Create the policy used to retry the failing functions.
+
+        The delay starts from "retry_delay" and doubles after each failure,
+        up to "retry_max_delay".
+
+        Returns:
+            RetryPolicy
+        """
+        return RetryPolicy(
+            max_tries=self._settings["max_tries"],
+            base_delay=self._settings["retry_delay"],
+            max_delay=self._settings.get("retry_max_delay", 600),
+            deadline=self._settings.get("retry_deadline"),
+            fatal=self._fatal_exceptions,
+            metrics=self._retry_metrics,
+        )
 
     def tryFunction(self, f: Callable) -> bool:
-        """Try to run a function."""
-        tries = 0
-        max_tries = self._settings["max_tries"]
-        retry_delay = self._settings["retry_delay"]
-        while tries < max_tries:
-            try:
-                f()
-                return True
-            except Exception as e:
-                logging.error(f"Error while running function: {f.__name__}")
-                logging.error(f"Error raised: {e}")
-                logging.error(f"Error type: {type(e)}")
-                tries += 1
-                logging.info(
-                    f"Trying again in {retry_delay} second ({tries}/{max_tries})"
-                )
-                sleep(retry_delay)
-
-        logging.error("Max tries reached. Exiting...")
+        """Try to run a function, retrying it if it fails.
+
+        Returns:
+            bool: True if the function succeeded.
+        """
+        try:
+            self._retryPolicy().call(f)
+            return True
+        except RetryException as e:
+            logging.error(f"{e}. Exiting...")
+        except Exception as e:
+            logging.error(f"Fatal error while running {f.__name__}: {e}")
+        finally:
+            # totals since the scheduler started
+            logging.info(f"Retry metrics of {self._retry_metrics.summary(f.__name__)}")
+
         return False
 
+    def run(self, until: datetime = None) -> None:
+        """Run the scheduled jobs, sleeping until the next deadline.
+
+        Args:
+            until (datetime, optional): Time to stop at, timezone aware.
+                Defaults to running forever.
+        """
+        while until is None or self._clock.now() < until:
+            self.runPending()
+
+            wake = min(job.next_run for job in self._jobs)
+            if until is not None:
+                wake = min(wake, until)
+            self._clock.sleepUntil(wake)
+
     def start(self, key: str, function: Callable) -> None:
         """Loop the creator."""
         self._schedule(key, function)
         logging.info(f"Function {function.__name__} scheduled for {self.next_run}")
-        while True:
-            try:
-                schedule.run_pending()
-                sleep(1)
-            except KeyboardInterrupt:
-                logging.warning("Keyboard interrupt called. Exiting...")
-                return
+        try:
+            self.run()
+        except KeyboardInterrupt:
+            logging.warning("Keyboard interrupt called. Exiting...")
 
     @property
     def next_run(self) -> str:
@@ -110,8 +266,7 @@ class Scheduler:
         Returns:
             str: run time, iso format
         """
-        n = schedule.next_run()
-        if n is None:
+        if not self._jobs:
             raise ValueError("No next run time found")
 
-        return n.isoformat()
+        return min(job.next_run for job in self._jobs).isoformat()
@@ -7,18 +7,29 @@ import logging
 import os
 import sys
 import traceback
+from uuid import uuid4
 
 import pytz
 import toml
-from telegram import Update, constants
+from telegram import (
+    InlineQueryResultArticle,
+    InputTextMessageContent,
+    Update,
+    constants,
+)
+from telegram.error import BadRequest
 from telegram.ext import (
     ApplicationBuilder,
     CallbackContext,
     CommandHandler,
     ContextTypes,
+    InlineQueryHandler,
 )
 
-from modules.saint_factory import SaintFactory
+from modules.artifact_store import ArtifactStore
+from modules.file_id_cache import FileIdCache
+from modules.personal_saints import PersonalSaints, PersonalSaintsException
+from modules.saint import Saint
 
 
 class TelegramBot:
@@ -33,9 +44,21 @@ class TelegramBot:
             TelegramBot
         """
         logging.info("Initializing bot")
-        self._factory = SaintFactory()
+        self._store = ArtifactStore()
         self._settings = self._loadSettings(settings_path)
+        self._file_ids = FileIdCache(
+            self._settings.get("file_id_cache_path", "out/telegram/file_ids.json")
+        )
         self._post_time = self._loadPostTime()
+        self._personal = PersonalSaints(
+            factory=self._store.factory,
+            template=self._settings.get("personal_template", "compact"),
+            max_workers=self._settings.get("personal_workers", 2),
+            max_pending=self._settings.get("personal_max_pending", 32),
+            cache_size=self._settings.get("personal_cache_size", 128),
+            rate=self._settings.get("personal_rate", 0.05),
+            burst=self._settings.get("personal_burst", 3),
+        )
         self._application = ApplicationBuilder().token(self._settings["token"]).build()
         self._job_queue = self._application.job_queue
 
@@ -61,6 +84,8 @@ class TelegramBot:
                 CommandHandler("start", self._startCommandHandler),
                 CommandHandler("reset", self._resetCommandHandler),
                 CommandHandler("ping", self._pingCommandHandler),
+                CommandHandler("santo", self._santoCommandHandler),
+                InlineQueryHandler(self._inlineQueryHandler),
             ]
         )
         logging.info("Bot initialized")
@@ -136,6 +161,56 @@ class TelegramBot:
             parse_mode=constants.ParseMode.MARKDOWN,
         )
 
+    def _today(self) -> datetime.date:
+        """Get the current day, in the bot timezone."""
+        return datetime.datetime.now(self._timezone).date()
+
+    async def _santoCommandHandler(self, update: Update, context: ContextTypes) -> None:
+        logging.info("Received /santo command")
+        chat_id = update.effective_chat.id
+        user_id = update.effective_user.id
+        if not self._personal.allow(user_id):
+            logging.warning(f"Too many requests from user {user_id}")
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text="Troppe richieste, riprova tra qualche minuto.",
+            )
+            return
+
+        day = self._today()
+        saint = self._personal.saint(user_id, day)
+        try:
+            image = await self._personal.image(user_id, day)
+        except PersonalSaintsException as e:
+            logging.warning(f"Personal saint not rendered: {e}")
+            await context.bot.send_message(
+                chat_id=chat_id,
+                text="I santi sono tutti occupati, riprova tra poco.",
+            )
+            return
+
+        await context.bot.send_photo(chat_id=chat_id, photo=image, caption=saint.bio)
+
+    async def _inlineQueryHandler(self, update: Update, context: ContextTypes) -> None:
+        logging.info("Received inline query")
+        user_id = update.inline_query.from_user.id
+        if not self._personal.allow(user_id):
+            logging.warning(f"Too many requests from user {user_id}")
+            return
+
+        saint = self._personal.saint(user_id, self._today())
+        result = InlineQueryResultArticle(
+            id=str(uuid4()),
+            title=saint.full_name,
+            description=saint.full_patron_city,
+            input_message_content=InputTextMessageContent(saint.bio),
+        )
+        await update.inline_query.answer(
+            [result],
+            cache_time=self._settings.get("personal_inline_cache_time", 300),
+            is_personal=True,
+        )
+
     async def _errorHandler(self, _: Update, context: ContextTypes) -> None:
         logging.error(f"Exception while handling an update: {context.error}")
         tb_list = traceback.format_exception(
@@ -147,15 +222,38 @@ class TelegramBot:
         )
         logging.error(f"Traceback: {''.join(tb_list)}")
 
+    async def _sendSaint(self, chat_id: int | str, saint: Saint) -> None:
+        """Send the image of a saint to a chat.
+
+        The image is uploaded only the first time, then its file_id is reused.
+
+        Args:
+            chat_id (int | str): id or name of the chat
+            saint (Saint): saint to send
+        """
+        file_id = self._file_ids.get(saint.image_path)
+        if file_id is not None:
+            try:
+                await self._application.bot.send_photo(
+                    chat_id=chat_id, photo=file_id, caption=saint.bio
+                )
+                return
+            except BadRequest as e:
+                logging.warning(f"Cached file_id rejected ({e}), uploading again")
+                self._file_ids.invalidate(saint.image_path)
+
+        logging.info(f"Uploading {saint.image_path}")
+        with open(saint.image_path, "rb") as photo:
+            message = await self._application.bot.send_photo(
+                chat_id=chat_id, photo=photo, caption=saint.bio
+            )
+
+        self._file_ids.set(saint.image_path, message.photo[-1].file_id)
+
     async def _postSaint(self, *_: Any, **__: Any) -> None:
         logging.info("Posting saint")
-        saint = self._factory.generateSaint()
-        image_path = saint.image_path
-        await self._application.bot.send_photo(
-            chat_id=self._settings["channel_name"],
-            photo=open(image_path, "rb"),
-            caption=saint.bio,
-        )
+        saint = await self._store.loadAsync()
+        await self._sendSaint(self._settings["channel_name"], saint)
 
     async def _botStarted(self, _: CallbackContext) -> None:
         logging.info("Bot started")
@@ -168,4 +266,7 @@ class TelegramBot:
     def start(self) -> None:
         """Start the bot."""
         logging.info("Starting bot")
-        self._application.run_polling()
+        try:
+            self._application.run_polling()
+        finally:
+            self._personal.close()
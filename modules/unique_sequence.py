@@ -0,0 +1,119 @@
+"""Module containing the UniqueSequence class."""
+from __future__ import annotations
+
+import logging
+import random
+from collections import OrderedDict
+
+
+class UniqueSequence:
+    """Class mapping days to items of a list, without close repetitions.
+
+    The days are split in cycles as long as the list: each cycle walks a
+    different shuffled permutation of the list, so no item is repeated
+    inside a cycle. At the boundary between two cycles, the items at the
+    head of a cycle that were also in the tail of the previous one are
+    swapped with items from the middle of the permutation, so that no item
+    is repeated within `window` consecutive days.
+
+    Each permutation only depends on its seed and on the tail of the
+    previous raw permutation, so any day can be computed independently, in
+    constant amortized time and without keeping any state on disk.
+    """
+
+    _items: list[int]
+    _size: int
+    _window: int
+    _seed: str
+    _permutations: OrderedDict[int, list[int]]
+    _cache_size: int = 4
+
+    def __init__(self, items: list[int], window: int, seed: str) -> UniqueSequence:
+        """Initialize the sequence.
+
+        Args:
+            items (list[int]): Distinct items of the list (e.g. the indexes
+                of the distinct words of a corpus).
+            window (int): Minimum number of days between two repetitions of
+                the same item. It's limited to a third of the items.
+            seed (str): Seed of the permutations.
+
+        Returns:
+            UniqueSequence
+        """
+        self._items = list(items)
+        self._size = len(self._items)
+        self._window = min(window, self._size // 3)
+        self._seed = seed
+        self._permutations = OrderedDict()
+
+        if self._window < window:
+            logging.warning(
+                f"Window of {seed} limited to {self._window} days by its "
+                f"{self._size} items"
+            )
+
+    @property
+    def window(self) -> int:
+        """Minimum number of days between two repetitions of the same item."""
+        return self._window
+
+    def _shuffled(self, cycle: int) -> list[int]:
+        """Create the raw permutation of a cycle.
+
+        Args:
+            cycle (int): index of the cycle
+
+        Returns:
+            list[int]: shuffled indexes of the list
+        """
+        permutation = list(range(self._size))
+        random.Random(f"{self._seed}-{cycle}").shuffle(permutation)
+        return permutation
+
+    def _permutation(self, cycle: int) -> list[int]:
+        """Get the permutation of a cycle, fixed at its boundary.
+
+        Args:
+            cycle (int): index of the cycle
+
+        Returns:
+            list[int]: indexes of the list, in the order of the cycle
+        """
+        if cycle in self._permutations:
+            self._permutations.move_to_end(cycle)
+            return self._permutations[cycle]
+
+        permutation = self._shuffled(cycle)
+        window = self._window
+        if window > 0:
+            # the tail is never changed by the fix, so the raw one can be used
+            previous_tail = set(self._shuffled(cycle - 1)[-window:])
+            # replacements come from the middle, which touches neither boundary
+            candidates = (
+                i
+                for i in range(window, self._size - window)
+                if permutation[i] not in previous_tail
+            )
+            for i in range(window):
+                if permutation[i] in previous_tail:
+                    j = next(candidates)
+                    permutation[i], permutation[j] = permutation[j], permutation[i]
+
+        self._permutations[cycle] = permutation
+        if len(self._permutations) > self._cache_size:
+            self._permutations.popitem(last=False)
+
+        return permutation
+
+    def __getitem__(self, day: int) -> int:
+        """Get the item of a day.
+
+        Args:
+            day (int): Ordinal of the day.
+
+        Returns:
+            int
+        """
+        cycle, position = divmod(day, self._size)
+        return self._items[self._permutation(cycle)[position]]
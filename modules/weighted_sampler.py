@@ -0,0 +1,285 @@
+"""Module containing the WeightedSampler class."""
+from __future__ import annotations
+
+import logging
+import random
+from array import array
+from datetime import date
+from typing import Sequence
+
+from .word_corpus import WordCorpus
+
+
+class WeightedSamplerException(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class AliasTable:
+    """Class drawing indexes with given probabilities, using the alias method.
+
+    The table is built once in O(n) (Vose's algorithm) and each draw takes
+    constant time, using a single random number.
+    """
+
+    _probabilities: array
+    _aliases: array
+
+    def __init__(self, weights: Sequence[float]) -> AliasTable:
+        """Initialize the table.
+
+        Args:
+            weights (Sequence[float]): Non negative weight of each index.
+
+        Raises:
+            WeightedSamplerException: if all the weights are zero.
+
+        Returns:
+            AliasTable
+        """
+        size = len(weights)
+        total = sum(weights)
+        if size == 0 or total <= 0:
+            raise WeightedSamplerException("The weights must have a positive sum")
+
+        # probabilities scaled so that their mean is 1
+        scaled = array("d", (w * size / total for w in weights))
+        self._probabilities = array("d", bytes(8 * size))
+        self._aliases = array("I", range(size))
+
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s = small.pop()
+            g = large[-1]
+            self._probabilities[s] = scaled[s]
+            self._aliases[s] = g
+            scaled[g] -= 1 - scaled[s]
+            if scaled[g] < 1:
+                small.append(large.pop())
+
+        # the leftovers are 1, up to rounding errors
+        for i in small + large:
+            self._probabilities[i] = 1
+
+    def __len__(self) -> int:
+        """Return the number of indexes in the table."""
+        return len(self._aliases)
+
+    def sample(self, rng: random.Random) -> int:
+        """Draw an index.
+
+        Args:
+            rng (random.Random): Random generator.
+
+        Returns:
+            int
+        """
+        u = rng.random() * len(self._aliases)
+        i = int(u)
+        if u - i < self._probabilities[i]:
+            return i
+        return self._aliases[i]
+
+
+class SeasonalBoost:
+    """Class multiplying the weights of a category during a period of the year."""
+
+    corpus: str
+    category: str
+    start: tuple[int, int]
+    end: tuple[int, int]
+    factor: float
+
+    def __init__(
+        self, corpus: str, category: str, start: str, end: str, factor: float
+    ) -> SeasonalBoost:
+        """Initialize the boost.
+
+        Args:
+            corpus (str): Name of the corpus.
+            category (str): Category of the boosted entries.
+            start (str): First day of the period, as MM-DD.
+            end (str): Last day of the period, as MM-DD. It can come before
+                the start, for periods across the new year.
+            factor (float): Multiplier of the weights.
+
+        Raises:
+            WeightedSamplerException: if the days or the factor are not valid.
+
+        Returns:
+            SeasonalBoost
+        """
+        self.corpus = corpus
+        self.category = category.lower()
+        self.factor = float(factor)
+        try:
+            self.start = tuple(int(x) for x in start.split("-"))
+            self.end = tuple(int(x) for x in end.split("-"))
+            # check that the days exist, in a leap year
+            date(2000, *self.start)
+            date(2000, *self.end)
+        except (ValueError, TypeError) as e:
+            raise WeightedSamplerException(f"Invalid period {start} - {end}: {e}")
+        if self.factor < 0:
+            raise WeightedSamplerException("The factor can't be negative")
+
+    def __repr__(self) -> str:
+        """Return the string representation of the boost."""
+        return (
+            f"SeasonalBoost({self.corpus}, {self.category}, "
+            f"{self.start} - {self.end}, x{self.factor})"
+        )
+
+    def isActive(self, day: date) -> bool:
+        """Check whether a day is in the period of the boost.
+
+        Args:
+            day (date)
+
+        Returns:
+            bool
+        """
+        current = (day.month, day.day)
+        if self.start <= self.end:
+            return self.start <= current <= self.end
+        return current >= self.start or current <= self.end
+
+    @classmethod
+    def fromSettings(cls, settings: list[dict]) -> list[SeasonalBoost]:
+        """Create the boosts from the settings.
+
+        Args:
+            settings (list[dict]): Boosts, each with the keys corpus,
+                category, start, end and factor.
+
+        Returns:
+            list[SeasonalBoost]
+        """
+        return [cls(**boost) for boost in settings]
+
+
+class WeightedSampler:
+    """Class drawing the entries of a corpus.
+
+    The entries are drawn according to the weights of the corpus, optionally
+    restricted to some categories and with the weights of some categories
+    boosted in periods of the year. An alias table is built once for each
+    combination of active boosts, so each draw takes constant time.
+
+    If the corpus has no weights and no boost is active, the entries are
+    drawn uniformly with a single call to `randrange`, so the draws are the
+    same as a plain uniform choice.
+    """
+
+    _corpus: WordCorpus
+    _filter: set[str]
+    _boosts: list[SeasonalBoost]
+    _candidates: array
+    _tables: dict[tuple[int, ...], AliasTable]
+
+    def __init__(
+        self,
+        corpus: WordCorpus,
+        categories: list[str] = None,
+        boosts: list[SeasonalBoost] = None,
+    ) -> WeightedSampler:
+        """Initialize the sampler.
+
+        Args:
+            corpus (WordCorpus): Corpus to draw from.
+            categories (list[str], optional): Only draw the entries in at
+                least one of these categories. Defaults to None (no filter).
+            boosts (list[SeasonalBoost], optional): Boosts of the corpus.
+                Defaults to None.
+
+        Raises:
+            WeightedSamplerException: if the corpus is empty or no entry is in
+                the categories.
+
+        Returns:
+            WeightedSampler
+        """
+        self._corpus = corpus
+        self._filter = {c.lower() for c in categories} if categories else None
+        self._boosts = boosts or []
+        self._tables = {}
+
+        if self._filter is None:
+            self._candidates = array("I", range(len(corpus)))
+        else:
+            self._candidates = array(
+                "I",
+                (
+                    i
+                    for i in range(len(corpus))
+                    if corpus.categoriesOf(i) & self._filter
+                ),
+            )
+            logging.info(
+                f"{len(self._candidates)} of {len(corpus)} entries in "
+                f"{', '.join(sorted(self._filter))}"
+            )
+
+        if not self._candidates:
+            if self._filter is None:
+                raise WeightedSamplerException("The corpus is empty")
+            raise WeightedSamplerException(
+                f"No entry in the categories {', '.join(sorted(self._filter))}"
+            )
+
+    @property
+    def candidates(self) -> array:
+        """Indexes of the entries that can be drawn."""
+        return self._candidates
+
+    def _table(self, active: tuple[int, ...]) -> AliasTable:
+        """Get the alias table of a combination of active boosts.
+
+        Args:
+            active (tuple[int, ...]): Indexes of the active boosts.
+
+        Returns:
+            AliasTable
+        """
+        if active not in self._tables:
+            corpus = self._corpus
+            weights = array(
+                "d",
+                (
+                    corpus.weights[i] if corpus.weights is not None else 1.0
+                    for i in self._candidates
+                ),
+            )
+            for b in active:
+                boost = self._boosts[b]
+                for j, i in enumerate(self._candidates):
+                    if boost.category in corpus.categoriesOf(i):
+                        weights[j] *= boost.factor
+
+            self._tables[active] = AliasTable(weights)
+
+        return self._tables[active]
+
+    def pick(self, rng: random.Random, day: date = None) -> int:
+        """Draw the index of an entry.
+
+        Args:
+            rng (random.Random): Seeded random generator.
+            day (date, optional): Day of the draw, used by the boosts.
+                Defaults to None (no boost).
+
+        Returns:
+            int
+        """
+        active = ()
+        if day is not None:
+            active = tuple(i for i, b in enumerate(self._boosts) if b.isActive(day))
+
+        if not active and self._corpus.weights is None:
+            if self._filter is None:
+                return rng.randrange(len(self._corpus))
+            return self._candidates[rng.randrange(len(self._candidates))]
+
+        return self._candidates[self._table(active).sample(rng)]
@@ -0,0 +1,270 @@
+"""Module containing the WordCorpus class."""
+from __future__ import annotations
+
+import logging
+import os
+from array import array
+from typing import Iterator, Sequence
+
+
+class WordCorpusException(Exception):
+    """Base class for exceptions in this module."""
+
+    pass
+
+
+class WordCorpus:
+    """Class containing a read only list of words.
+
+    All the entries are stored in a single UTF-8 encoded blob, alongside
+    an array with the offset of each entry inside it. This avoids creating
+    one string object per line, while still providing O(1) indexed access.
+    The blob and the offsets can also be views of a memory mapped file (see
+    ResourcePack), in which case the corpus doesn't copy them.
+
+    Each entry can optionally have a weight, used by the weighted sampling,
+    and some comma separated categories, used to filter the entries. In the
+    text files they are the second and the third tab separated column.
+
+    Corpora loaded through `load` are cached at class level, so that every
+    SaintFactory in the same process shares the same instances.
+    """
+
+    _blob: bytes
+    _offsets: array
+    _weights: Sequence[float]
+    _categories: WordCorpus
+    _loaded: dict[str, WordCorpus] = {}
+
+    def __init__(
+        self,
+        blob: bytes,
+        offsets: array,
+        weights: Sequence[float] = None,
+        categories: WordCorpus = None,
+    ) -> WordCorpus:
+        """Initialize the corpus.
+
+        Args:
+            blob (bytes): UTF-8 encoded entries, one after another. Any
+                bytes-like object is accepted.
+            offsets (array): Offsets of the entries in the blob. It must
+                contain one item more than the number of entries, the last
+                one being the length of the blob.
+            weights (Sequence[float], optional): Weight of each entry.
+                Defaults to None (no weights).
+            categories (WordCorpus, optional): Comma separated categories of
+                each entry. Defaults to None (no categories).
+
+        Returns:
+            WordCorpus
+        """
+        self._blob = blob
+        self._offsets = offsets
+        self._weights = weights
+        self._categories = categories
+
+    def __len__(self) -> int:
+        """Return the number of entries in the corpus."""
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        """Return the entry at a given index.
+
+        Args:
+            index (int): Index of the entry. Negative values are allowed.
+
+        Returns:
+            str
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("WordCorpus index out of range")
+
+        start = self._offsets[index]
+        end = self._offsets[index + 1]
+        return str(self._blob[start:end], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the entries of the corpus."""
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def weights(self) -> Sequence[float]:
+        """Weight of each entry, or None if the corpus has no weights."""
+        return self._weights
+
+    @property
+    def categories(self) -> WordCorpus:
+        """Comma separated categories of each entry, or None if missing."""
+        return self._categories
+
+    def categoriesOf(self, index: int) -> set[str]:
+        """Return the categories of an entry.
+
+        Args:
+            index (int): Index of the entry.
+
+        Returns:
+            set[str]: Categories, empty if the entry has none.
+        """
+        if self._categories is None:
+            return set()
+
+        return {c for c in self._categories[index].split(",") if c}
+
+    def characters(self) -> set[str]:
+        """Return the set of characters used in the corpus."""
+        return set(str(self._blob, "utf-8"))
+
+    def __repr__(self) -> str:
+        """Return the string representation of the corpus."""
+        return f"WordCorpus({len(self)} entries, {len(self._blob)} bytes)"
+
+    @classmethod
+    def fromLines(
+        cls,
+        lines: list[str],
+        weights: Sequence[float] = None,
+        categories: list[str] = None,
+    ) -> WordCorpus:
+        """Create a corpus from a list of lines.
+
+        Args:
+            lines (list[str]): Entries of the corpus.
+            weights (Sequence[float], optional): Weight of each entry.
+                Defaults to None.
+            categories (list[str], optional): Comma separated categories of
+                each entry. Defaults to None.
+
+        Raises:
+            WordCorpusException: if a weight is negative.
+
+        Returns:
+            WordCorpus
+        """
+        blob = bytearray()
+        offsets = array("I", [0])
+
+        for line in lines:
+            blob += line.encode("utf-8")
+            offsets.append(len(blob))
+
+        if weights is not None:
+            weights = array("d", weights)
+            if any(w < 0 for w in weights):
+                raise WordCorpusException("Weights can't be negative")
+        if categories is not None:
+            categories = cls.fromLines(categories)
+
+        return cls(bytes(blob), offsets, weights, categories)
+
+    @classmethod
+    def fromFile(cls, path: str) -> WordCorpus:
+        """Load a corpus from a text file, one entry per line.
+
+        Each line can have two more tab separated columns: the weight of
+        the entry (1 if empty) and its comma separated categories.
+
+        Args:
+            path (str): Path to the file.
+
+        Raises:
+            WordCorpusException: if a weight is not a valid number.
+
+        Returns:
+            WordCorpus
+        """
+        logging.info(f"Loading corpus from {path}")
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().split("\n")
+
+        # a trailing newline does not start a new entry
+        if lines and lines[-1] == "":
+            lines.pop()
+
+        columns = [line.split("\t") for line in lines]
+        entries = [c[0].strip() for c in columns]
+        weights = None
+        categories = None
+
+        if any(len(c) > 1 for c in columns):
+            try:
+                weights = [
+                    float(c[1]) if len(c) > 1 and c[1].strip() else 1.0 for c in columns
+                ]
+            except ValueError as e:
+                raise WordCorpusException(f"Invalid weight in {path}: {e}")
+        if any(len(c) > 2 for c in columns):
+            categories = [c[2].strip().lower() if len(c) > 2 else "" for c in columns]
+
+        return cls.fromLines(entries, weights, categories)
+
+    @classmethod
+    def load(cls, path: str) -> WordCorpus:
+        """Load a corpus from a text file, reusing it if already loaded.
+
+        Args:
+            path (str): Path to the file.
+
+        Returns:
+            WordCorpus
+        """
+        key = os.path.abspath(path)
+        if key not in cls._loaded:
+            cls._loaded[key] = cls.fromFile(path)
+
+        return cls._loaded[key]
+
+    @classmethod
+    def loadParallel(
+        cls, path: str, path_english: str
+    ) -> tuple[WordCorpus, WordCorpus]:
+        """Load an Italian corpus and its English translation.
+
+        The two files must be aligned line by line.
+
+        Args:
+            path (str): Path to the Italian file.
+            path_english (str): Path to the English file.
+
+        Raises:
+            WordCorpusException: if the two corpora have different lengths.
+
+        Returns:
+            tuple[WordCorpus, WordCorpus]: Italian and English corpora.
+        """
+        corpus = cls.load(path)
+        corpus_english = cls.load(path_english)
+        cls.checkParallel(corpus, corpus_english, path, path_english)
+
+        return corpus, corpus_english
+
+    @staticmethod
+    def checkParallel(
+        corpus: WordCorpus, corpus_english: WordCorpus, path: str, path_english: str
+    ) -> None:
+        """Check that an Italian corpus is aligned with its English translation.
+
+        Args:
+            corpus (WordCorpus): Italian corpus.
+            corpus_english (WordCorpus): English corpus.
+            path (str): Path to the Italian file, used in the error message.
+            path_english (str): Path to the English file, used in the error
+                message.
+
+        Raises:
+            WordCorpusException: if the two corpora have different lengths.
+        """
+        if len(corpus) != len(corpus_english):
+            raise WordCorpusException(
+                f"{path} has {len(corpus)} entries but {path_english} "
+                f"has {len(corpus_english)}"
+            )
+
+    @classmethod
+    def clearCache(cls) -> None:
+        """Forget all the corpora loaded so far."""
+        cls._loaded.clear()
@@ -3,8 +3,8 @@ from __future__ import annotations
 
 import logging
 
+from modules.artifact_store import ArtifactStore
 from modules.instagram import Instagram
-from modules.saint_factory import SaintFactory
 
 
 class InstagramQuickPost:
@@ -14,12 +14,12 @@ class InstagramQuickPost:
         """Initialize the poster."""
         logging.info("Initializing instagram quick poster")
         self._instagram = Instagram()
-        self._factory = SaintFactory()
+        self._store = ArtifactStore()
 
     def _uploadImage(self) -> None:
         """Upload the image."""
         logging.info("Uploading image")
-        saint = self._factory.generateSaint()
+        saint = self._store.load()
         caption = saint.bio + "\n\n#santodelgiorno #santinoquotidiano"
         self._instagram.uploadImage(image_path=saint.image_path, image_caption=caption)
 
@@ -1,34 +1,8 @@
-import re
-
-
-def plural(name: str) -> str:
-    rules = {
-        r"io$": "i",
-        r"logo$": "loghi",
-        r"fago$": "fagi",
-        r"co$": "ci",
-        r"go$": "gi",
-        r"ca$": "che",
-        r"ga$": "ghe",
-        r"e$": "i",
-        r"o$": "i",
-        r"a$": "i",
-    }
-
-    for pattern, replacement in rules.items():
-        if re.search(pattern, name):
-            return re.sub(pattern, replacement, name)
-
-    return name
+from pluralizer import convert_file
 
 
 def main() -> None:
-    with open("professioni.txt") as f:
-        professions = f.read().splitlines()
-
-    with open("professioni-plurali.txt", "w") as f:
-        for p in professions:
-            f.write(plural(p) + "\n")
+    convert_file("professioni.txt", "professioni-plurali.txt", corpus="professions")
 
 
 if __name__ == "__main__":
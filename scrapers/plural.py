@@ -1,7 +1,11 @@
-from bs4 import BeautifulSoup
-import requests
+import argparse
 import re
 
+from bs4 import BeautifulSoup
+
+from pluralizer import Pluralizer, load_exceptions, save_exceptions
+from scraping import fetch_pages, scraper_options, scraper_parser
+
 
 def remove_spaces(s: str) -> str:
     x = s.strip()
@@ -34,45 +38,81 @@ def get_plural(soup: BeautifulSoup) -> str:
         return format_plural(fpl.next_sibling.text)
 
 
-def get_soup(url: str) -> BeautifulSoup:
-    r = requests.get(url)
-    soup = BeautifulSoup(r.text, "html.parser")
-    return soup
+def plural_url(singular: str) -> str:
+    return f"https://www.wordreference.com/definizione/{singular}"
 
 
-def extract_plural(singular: str) -> str:
-    url = f"https://www.wordreference.com/definizione/{singular}"
-    soup = get_soup(url)
-    plural = get_plural(soup)
+def extract_plural(html: str) -> str:
+    # None if WordReference doesn't list a plural, so that the word is
+    # not compared with the engine nor saved as an exception
+    soup = BeautifulSoup(html, "html.parser")
+    return get_plural(soup) or None
 
-    if not plural:
-        return singular.lower()
 
-    return plural
+CORPORA = {
+    "animals": "animali.txt",
+    "professions": "professioni.txt",
+}
 
 
-def convert_file(file_in: str, file_out: str) -> None:
-    with open(file_in) as f:
-        words = f.read().splitlines()
+def scrape_plurals(words: list[str], options: dict) -> list[str]:
+    # all the pages are downloaded at once, the rate limit spaces the requests
+    pages = fetch_pages(
+        [plural_url(w) for w in words], return_exceptions=True, **options
+    )
 
-    plural = []
-    for w in words:
-        print(f"{w} -> ", end="")
+    plurals = []
+    for w, html in zip(words, pages):
         try:
-            p = extract_plural(w)
-            print(p)
+            if isinstance(html, Exception):
+                raise html
+            plural = extract_plural(html)
+            if plural is None:
+                print(f"{w} -> no plural on WordReference")
+            plurals.append(plural)
         except Exception as e:
-            p = w
-            print(f"ERROR: {e}")
-        plural.append(p)
+            print(f"{w} -> ERROR: {e}")
+            plurals.append(None)
+
+    return plurals
+
+
+def verify_file(file_in: str, corpus: str, options: dict, update: bool) -> None:
+    with open(file_in) as f:
+        words = f.read().splitlines()
+
+    pluralizer = Pluralizer()
+    plurals = pluralizer.plural_all(words, corpus)
+    scraped = scrape_plurals(words, options)
+
+    mismatches = 0
+    for w, p, s in zip(words, plurals, scraped):
+        if s is not None and p != s:
+            mismatches += 1
+            print(f"{w} -> {p}, WordReference: {s}")
+    print(f"{mismatches} mismatches out of {len(words)} words")
 
-    with open(file_out, "w") as f:
-        for p in plural:
-            f.write(p + "\n")
+    if update:
+        exceptions = load_exceptions()
+        exceptions.update(pluralizer.find_exceptions(words, scraped, corpus))
+        save_exceptions(exceptions)
+        print(f"{len(exceptions)} exceptions saved")
 
 
 def main() -> None:
-    convert_file("animali.txt", "animali-plurali.txt")
+    parser = argparse.ArgumentParser(
+        description="Verify the plurals of a corpus against WordReference.",
+        parents=[scraper_parser()],
+    )
+    parser.add_argument("corpus", choices=CORPORA.keys())
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="add the words with an irregular plural to the exceptions",
+    )
+    args = parser.parse_args()
+
+    verify_file(CORPORA[args.corpus], args.corpus, scraper_options(args), args.update)
 
 
 if __name__ == "__main__":
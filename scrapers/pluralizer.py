@@ -0,0 +1,122 @@
+"""Rule based pluralizer of Italian nouns.
+
+The plural is built by replacing the longest matching suffix of the word,
+found in a trie of the suffixes of the rule table. The plural of nouns ending
+in -a and -co depends on their gender and stress, which the corpora don't
+record, so each corpus has its own table with the most common plural of
+those endings among its words. Words that don't follow the rules are listed
+in an exceptions file, seeded by comparing the rules with the plurals
+scraped from WordReference.
+"""
+from __future__ import annotations
+
+import json
+import os
+
+EXCEPTIONS_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "plural-exceptions.json"
+)
+
+COMMON_RULES = {
+    "io": "i",
+    "logo": "loghi",
+    "fago": "fagi",
+    "go": "gi",
+    "ca": "che",
+    "ga": "ghe",
+    "e": "i",
+    "o": "i",
+}
+
+RULES = {
+    # la zebra -> le zebre, il baco -> i bachi
+    "animals": {**COMMON_RULES, "co": "chi", "a": "e"},
+    # il dentista -> i dentisti, il medico -> i medici
+    "professions": {**COMMON_RULES, "co": "ci", "a": "i"},
+}
+
+_END = ""
+
+
+class SuffixTrie:
+    def __init__(self, rules: dict[str, str]) -> None:
+        self._root = {}
+        for suffix, replacement in rules.items():
+            node = self._root
+            for c in reversed(suffix):
+                node = node.setdefault(c, {})
+            node[_END] = (len(suffix), replacement)
+
+    def longest_match(self, word: str) -> tuple[int, str]:
+        node = self._root
+        match = None
+        for c in reversed(word):
+            node = node.get(c)
+            if node is None:
+                break
+            match = node.get(_END, match)
+
+        return match
+
+
+def load_exceptions(path: str = EXCEPTIONS_FILE) -> dict[str, str]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_exceptions(exceptions: dict[str, str], path: str = EXCEPTIONS_FILE) -> None:
+    with open(path, "w") as f:
+        json.dump(dict(sorted(exceptions.items())), f, ensure_ascii=False, indent=2)
+
+
+class Pluralizer:
+    def __init__(self, exceptions: dict[str, str] = None) -> None:
+        self._tries = {corpus: SuffixTrie(rules) for corpus, rules in RULES.items()}
+        self._exceptions = load_exceptions() if exceptions is None else exceptions
+
+    def apply_rules(self, word: str, corpus: str) -> str:
+        match = self._tries[corpus].longest_match(word)
+        if match is None:
+            return word
+
+        length, replacement = match
+        return word[:-length] + replacement
+
+    def plural(self, word: str, corpus: str) -> str:
+        if word in self._exceptions:
+            return self._exceptions[word]
+
+        return self.apply_rules(word, corpus)
+
+    def plural_all(self, words: list[str], corpus: str) -> list[str]:
+        # the corpora contain repeated words, each one is pluralized only once
+        plurals = {}
+        for w in words:
+            if w not in plurals:
+                plurals[w] = self.plural(w, corpus)
+
+        return [plurals[w] for w in words]
+
+    def find_exceptions(
+        self, words: list[str], plurals: list[str], corpus: str
+    ) -> dict[str, str]:
+        # words whose known plural is not the one given by the rules
+        return {
+            w: p
+            for w, p in zip(words, plurals)
+            if p and self.apply_rules(w, corpus) != p
+        }
+
+
+def convert_file(file_in: str, file_out: str, corpus: str) -> None:
+    with open(file_in) as f:
+        words = f.read().splitlines()
+
+    plurals = Pluralizer().plural_all(words, corpus)
+
+    with open(file_out, "w") as f:
+        for p in plurals:
+            f.write(p + "\n")
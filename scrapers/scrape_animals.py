@@ -1,11 +1,11 @@
 from bs4 import BeautifulSoup
-import requests
 import re
 
+from scraping import fetch_pages, parse_args, scraper_options
 
-def extract_animals(url: str) -> list[str]:
-    r = requests.get(url)
-    soup = BeautifulSoup(r.text, "html.parser")
+
+def extract_animals(html: str) -> list[str]:
+    soup = BeautifulSoup(html, "html.parser")
     animals = []
 
     while ul := soup.find("div", {"class": "multicolumna"}):
@@ -26,8 +26,10 @@ def extract_animals(url: str) -> list[str]:
 
 
 def main() -> None:
+    args = parse_args("Scrape the animals from Animalpedia.")
     url = "https://www.animalpedia.it/nomi-di-animali-dalla-a-alla-z-3397.html"
-    animals = extract_animals(url)
+    (html,) = fetch_pages([url], **scraper_options(args))
+    animals = extract_animals(html)
 
     animals = sorted(set(animals))
 
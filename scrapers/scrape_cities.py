@@ -1,33 +1,73 @@
+import re
+
 from bs4 import BeautifulSoup
-import requests
 
+from scraping import fetch_pages, parse_args, scraper_options
+
+
+# the lists only contain cities with at least this many inhabitants, so
+# it's the weight of the cities whose population is missing
+MIN_POPULATION = 100000
+
+
+def parse_population(text: str) -> int:
+    # drop the references and the thousands separators
+    digits = re.sub(r"\[.*?\]|[,.\s]", "", text)
+    if digits.isdigit():
+        return int(digits)
 
-def extract_cities(url: str) -> list[str]:
-    r = requests.get(url)
-    soup = BeautifulSoup(r.text, "html.parser")
-    cities = []
 
-    for thead in soup.find_all("thead"):
-        thead.decompose()
+def population_column(table: BeautifulSoup) -> int:
+    # the first column whose header is a population, not its year or date
+    for tr in table.find_all("tr"):
+        headers = tr.find_all("th")
+        if not headers:
+            continue
+
+        for i, th in enumerate(tr.find_all(["th", "td"])):
+            header = th.text.strip().lower()
+            if "population" in header and not re.search(r"year|date", header):
+                return i
+        return None
+
+
+def extract_cities(html: str) -> list[str]:
+    soup = BeautifulSoup(html, "html.parser")
+    cities = []
 
     while table := soup.find("table", {"class": "wikitable"}):
+        # the tables are grouped by country, under its heading
+        heading = table.find_previous(["h2", "h3"])
+        country = heading.text.replace("[edit]", "").strip().lower() if heading else ""
+        # the categories are separated by commas
+        country = country.replace(",", "")
+        column = population_column(table)
+
         for tr in table.find_all("tr"):
-            td = tr.find("td")
-            if not td:
+            tds = tr.find_all("td")
+            if not tds:
                 continue
 
-            cities.append(td.text.strip())
+            population = None
+            cells = tr.find_all(["th", "td"])
+            if column is not None and column < len(cells):
+                population = parse_population(cells[column].text)
+
+            # the columns are used as weight and category of the city
+            weight = population or MIN_POPULATION
+            cities.append(f"{tds[0].text.strip()}\t{weight}\t{country}")
         table.decompose()
 
     return cities
 
 
 def main() -> None:
+    args = parse_args("Scrape the cities from Wikipedia.")
     urls = [
         "https://en.wikipedia.org/wiki/List_of_towns_and_cities_with_"
         "100,000_or_more_inhabitants/country:_A-B",
         "https://en.wikipedia.org/wiki/List_of_towns_and_cities_with_"
-        "100,000_or_more_inhabitants/country:_C-D-E-F"
+        "100,000_or_more_inhabitants/country:_C-D-E-F",
         "https://en.wikipedia.org/wiki/List_of_towns_and_cities_with_"
         "100,000_or_more_inhabitants/country:_G-H-I-J-K",
         "https://en.wikipedia.org/wiki/List_of_towns_and_cities_with_"
@@ -39,8 +79,8 @@ def main() -> None:
     ]
 
     cities = []
-    for url in urls:
-        cities.extend(extract_cities(url))
+    for html in fetch_pages(urls, **scraper_options(args)):
+        cities.extend(extract_cities(html))
 
     cities.sort()
 
@@ -1,5 +1,6 @@
 from bs4 import BeautifulSoup
-import requests
+
+from scraping import fetch_pages, parse_args, scraper_options
 
 
 def td_to_names(elements: list[BeautifulSoup]) -> list[str]:
@@ -14,9 +15,8 @@ def td_to_names(elements: list[BeautifulSoup]) -> list[str]:
     return names
 
 
-def extract_names(url: str) -> tuple[list[str], list[str]]:
-    r = requests.get(url)
-    soup = BeautifulSoup(r.text, "html.parser")
+def extract_names(html: str) -> tuple[list[str], list[str]]:
+    soup = BeautifulSoup(html, "html.parser")
     for sup in soup.find_all("sup"):
         sup.decompose()
 
@@ -38,6 +38,7 @@ def extract_names(url: str) -> tuple[list[str], list[str]]:
 
 
 def main() -> None:
+    args = parse_args("Scrape the Italian names from Wikipedia.")
     names = {
         "m": [],
         "f": [],
@@ -47,8 +48,8 @@ def main() -> None:
         "https://it.wikipedia.org/wiki/Prenomi_italiani_(M-Z)",
     ]
 
-    for u in urls:
-        male, female = extract_names(u)
+    for html in fetch_pages(urls, **scraper_options(args)):
+        male, female = extract_names(html)
         names["m"].extend(male)
         names["f"].extend(female)
 
@@ -0,0 +1,196 @@
+"""Shared HTTP client of the scrapers.
+
+Pages are downloaded concurrently through a single connection pool, with a
+limit on the concurrent requests and on the request rate of each host.
+Every response is cached on disk together with its ETag and Last-Modified
+headers: cached pages are revalidated with a conditional request, and in
+offline mode they are used as they are, so a full refresh of the corpora
+can be repeated without any network access.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache")
+
+
+class ScrapingError(Exception):
+    pass
+
+
+class Scraper:
+    def __init__(
+        self,
+        cache_folder: str = CACHE_FOLDER,
+        offline: bool = False,
+        max_age: float = 0,
+        max_per_host: int = 4,
+        min_interval: float = 0.25,
+        timeout: float = 30,
+    ) -> None:
+        self._cache_folder = cache_folder
+        self._offline = offline
+        self._max_age = max_age
+        self._max_per_host = max_per_host
+        self._min_interval = min_interval
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = None
+        self._semaphores = {}
+        self._locks = {}
+        self._next_request = {}
+        os.makedirs(cache_folder, exist_ok=True)
+
+    async def __aenter__(self) -> Scraper:
+        if not self._offline:
+            connector = aiohttp.TCPConnector(limit_per_host=self._max_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout,
+                headers={"User-Agent": "saint-of-the-day scraper"},
+            )
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _cache_paths(self, url: str) -> tuple[str, str]:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self._cache_folder, key)
+        return f"{base}.html", f"{base}.json"
+
+    def _load_cached(self, url: str) -> tuple[bytes, dict]:
+        body_path, meta_path = self._cache_paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                return f.read(), meta
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+
+    def _store(self, url: str, body: bytes, meta: dict) -> None:
+        body_path, meta_path = self._cache_paths(url)
+        # the body is replaced first, the metadata marks the entry as complete
+        for path, data, mode in ((body_path, body, "wb"), (meta_path, None, "w")):
+            temp_path = f"{path}.part"
+            with open(temp_path, mode) as f:
+                if data is None:
+                    json.dump(meta, f)
+                else:
+                    f.write(data)
+            os.replace(temp_path, path)
+
+    async def _wait_turn(self, host: str) -> None:
+        # requests to the same host start at least min_interval seconds apart
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            delay = self._next_request.get(host, 0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_request[host] = time.monotonic() + self._min_interval
+
+    async def fetch(self, url: str) -> str:
+        body, meta = self._load_cached(url)
+
+        if self._offline:
+            if body is None:
+                raise ScrapingError(f"{url} is not cached")
+            return body.decode(meta["charset"])
+
+        if body is not None and time.time() - meta["fetched"] < self._max_age:
+            return body.decode(meta["charset"])
+
+        headers = {}
+        if body is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        host = urlsplit(url).netloc
+        semaphore = self._semaphores.setdefault(
+            host, asyncio.Semaphore(self._max_per_host)
+        )
+        async with semaphore:
+            await self._wait_turn(host)
+            async with self._session.get(url, headers=headers) as response:
+                if response.status == 304 and body is not None:
+                    meta["fetched"] = time.time()
+                    self._store(url, body, meta)
+                    return body.decode(meta["charset"])
+
+                if response.status >= 400:
+                    raise ScrapingError(f"{url} returned {response.status}")
+
+                body = await response.read()
+                meta = {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "charset": response.charset or "utf-8",
+                    "fetched": time.time(),
+                }
+
+        self._store(url, body, meta)
+        return body.decode(meta["charset"])
+
+    async def fetch_all(
+        self, urls: list[str], return_exceptions: bool = False
+    ) -> list[str]:
+        return await asyncio.gather(
+            *(self.fetch(url) for url in urls), return_exceptions=return_exceptions
+        )
+
+
+def fetch_pages(
+    urls: list[str], return_exceptions: bool = False, **kwargs
+) -> list[str]:
+    async def run() -> list[str]:
+        async with Scraper(**kwargs) as scraper:
+            return await scraper.fetch_all(urls, return_exceptions=return_exceptions)
+
+    return asyncio.run(run())
+
+
+def scraper_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="only use the cached pages, without any network access",
+    )
+    parser.add_argument(
+        "--cache", default=CACHE_FOLDER, help="folder of the cached pages"
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=0,
+        help="seconds during which a cached page is used without revalidation",
+    )
+    return parser
+
+
+def parse_args(description: str) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=description, parents=[scraper_parser()]
+    )
+    return parser.parse_args()
+
+
+def scraper_options(args: argparse.Namespace) -> dict:
+    return {
+        "offline": args.offline,
+        "cache_folder": args.cache,
+        "max_age": args.max_age,
+    }
@@ -0,0 +1,111 @@
+"""Module containing a fake images API, used to test the image client."""
+from __future__ import annotations
+
+import asyncio
+import threading
+
+from aiohttp import web
+
+
+class FakeImageServer:
+    """Class running a stub of the images API and of its CDN in a thread.
+
+    The generation endpoint answers with the URL of an image served by the
+    same server, in chunks. The server can answer with an error status,
+    stall in the middle of a download, and it records the highest number of
+    generation requests handled at the same time.
+    """
+
+    def __init__(self, image: bytes = b"\x89PNG" + bytes(256 * 1024)) -> None:
+        """Initialize the server, without starting it.
+
+        Args:
+            image (bytes, optional): Content of the served images.
+                Defaults to a fake PNG of about 256 KB.
+        """
+        self.image = image
+        self.port = None
+        self.generation_status = 200
+        self.download_status = 200
+        self.generation_delay = 0
+        self.stall = None
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompts = []
+        self._loop = asyncio.new_event_loop()
+        self._runner = None
+        self._thread = None
+
+    def __enter__(self) -> FakeImageServer:
+        """Start the server."""
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Stop the server."""
+        self.stop()
+
+    @property
+    def api_base(self) -> str:
+        """Base URL of the API."""
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def start(self) -> None:
+        """Start the server on a free port of localhost."""
+        started = threading.Event()
+        app = web.Application()
+        app.router.add_post("/v1/images/generations", self._generate)
+        app.router.add_get("/cdn/{name}", self._download)
+
+        def run() -> None:
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(app)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            self._loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    async def _generate(self, request: web.Request) -> web.Response:
+        data = await request.json()
+        self.prompts.append(data["prompt"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.generation_delay)
+        finally:
+            self.in_flight -= 1
+
+        if self.generation_status != 200:
+            return web.Response(status=self.generation_status, text="error")
+
+        url = f"http://127.0.0.1:{self.port}/cdn/{len(self.prompts)}.png"
+        return web.json_response({"data": [{"url": url}]})
+
+    async def _download(self, request: web.Request) -> web.StreamResponse:
+        if self.download_status != 200:
+            return web.Response(status=self.download_status)
+
+        response = web.StreamResponse()
+        response.content_length = len(self.image)
+        await response.prepare(request)
+
+        half = len(self.image) // 2
+        await response.write(self.image[:half])
+        if self.stall is not None:
+            # the rest arrives after the read timeout of the client
+            await asyncio.sleep(self.stall)
+        await response.write(self.image[half:])
+        await response.write_eof()
+        return response
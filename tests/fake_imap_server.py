@@ -0,0 +1,186 @@
+"""Module containing a fake IMAP server, used to test the email client."""
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import re
+import threading
+import time
+
+
+class FakeIMAPServer:
+    """Class running a minimal IMAP server in a background thread.
+
+    The server supports the commands used by EmailClient (CAPABILITY,
+    LOGIN, SELECT, NOOP, UID SEARCH, UID FETCH, IDLE and LOGOUT) over plain
+    TCP. Emails added while a client is idling are announced with an untagged
+    EXISTS response, either in a packet of its own or, for mails queued with
+    `queueForIdle`, in the same packet as the IDLE continuation.
+    """
+
+    def __init__(self, sender: str = "security@mail.instagram.com") -> None:
+        """Initialize the server, without starting it.
+
+        Args:
+            sender (str, optional): Sender of the emails.
+                Defaults to "security@mail.instagram.com".
+        """
+        self.sender = sender
+        self.mails = []
+        self.log = []
+        self.port = None
+        self.refuse_login = False
+        self.refuse_idle = False
+        self._idlers = []
+        self._queued = []
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self) -> FakeIMAPServer:
+        """Start the server."""
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Stop the server."""
+        self.stop()
+
+    def start(self) -> None:
+        """Start the server on a free port of localhost."""
+        started = threading.Event()
+
+        def run() -> None:
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, "127.0.0.1", 0)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self) -> None:
+        """Stop the server."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def _message(self, code: str, when: float) -> tuple[bytes, bytes]:
+        """Create the header and the text of an email with a code."""
+        header = (
+            f"From: {self.sender}\r\n"
+            "Subject: Verify your account\r\n"
+            f"Date: {email.utils.formatdate(when, localtime=True)}\r\n"
+            "MIME-Version: 1.0\r\n"
+            "Content-Type: text/html; charset=utf-8\r\n\r\n"
+        ).encode()
+        text = f"<p>Your code is <b>{code}</b></p>\r\n".encode()
+        return header, text
+
+    def _store(self, code: str, minutes_ago: float) -> int:
+        """Store an email, returning its sequence number."""
+        when = time.time() - minutes_ago * 60
+        self.mails.append((len(self.mails) + 1, when, *self._message(code, when)))
+        return len(self.mails)
+
+    def addMail(self, code: str, minutes_ago: float = 0, delay: float = 0) -> None:
+        """Add an email, announcing it to the idling clients.
+
+        Args:
+            code (str): Security code in the email.
+            minutes_ago (float, optional): Age of the email. Defaults to 0.
+            delay (float, optional): Seconds to wait before adding it.
+                Defaults to 0.
+        """
+
+        def add() -> None:
+            exists = self._store(code, minutes_ago)
+            for writer in self._idlers:
+                writer.write(f"* {exists} EXISTS\r\n".encode())
+
+        self._loop.call_soon_threadsafe(self._loop.call_later, delay, add)
+
+    def queueForIdle(self, code: str) -> None:
+        """Add an email when the next IDLE starts.
+
+        The EXISTS response is sent in the same packet as the continuation
+        of the IDLE command.
+
+        Args:
+            code (str): Security code in the email.
+        """
+        self._queued.append(code)
+
+    @staticmethod
+    def _date(when: float) -> str:
+        return time.strftime('"%d-%b-%Y %H:%M:%S +0000"', time.gmtime(when))
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        writer.write(b"* OK fake server ready\r\n")
+        while line := await reader.readline():
+            line = line.decode().strip()
+            self.log.append(line)
+            tag, _, rest = line.partition(" ")
+            command = rest.upper()
+
+            if command.startswith("CAPABILITY"):
+                writer.write(b"* CAPABILITY IMAP4rev1 IDLE\r\n")
+            elif command.startswith("SELECT"):
+                writer.write(f"* {len(self.mails)} EXISTS\r\n".encode())
+            elif command.startswith("UID SEARCH"):
+                uids = " ".join(str(m[0]) for m in self.mails)
+                writer.write(f"* SEARCH {uids}\r\n".encode())
+            elif command.startswith("UID FETCH"):
+                uids = {int(u) for u in re.split(r"[ ,]", rest)[2:] if u.isdigit()}
+                for seq, (uid, when, header, text) in enumerate(self.mails, 1):
+                    if uid not in uids:
+                        continue
+                    if "HEADER" in command:
+                        writer.write(
+                            f"* {seq} FETCH (UID {uid} INTERNALDATE "
+                            f"{self._date(when)} BODY[HEADER] {{{len(header)}}}\r\n".encode()
+                            + header
+                            + b")\r\n"
+                        )
+                    else:
+                        writer.write(
+                            f"* {seq} FETCH (UID {uid} BODY[TEXT] {{{len(text)}}}\r\n".encode()
+                            + text
+                            + b")\r\n"
+                        )
+            elif command.startswith("IDLE") and self.refuse_idle:
+                writer.write(f"{tag} NO IDLE not allowed now\r\n".encode())
+                await writer.drain()
+                continue
+            elif command.startswith("IDLE"):
+                response = b"+ idling\r\n"
+                while self._queued:
+                    exists = self._store(self._queued.pop(0), 0)
+                    response += f"* {exists} EXISTS\r\n".encode()
+                # a single write, so everything arrives in the same packet
+                writer.write(response)
+                self._idlers.append(writer)
+                await writer.drain()
+                self.log.append((await reader.readline()).decode().strip())
+                self._idlers.remove(writer)
+            elif command.startswith("LOGIN") and self.refuse_login:
+                writer.write(f"{tag} NO [AUTHENTICATIONFAILED] invalid\r\n".encode())
+                await writer.drain()
+                continue
+            elif command.startswith("LOGOUT"):
+                writer.write(f"* BYE\r\n{tag} OK bye\r\n".encode())
+                await writer.drain()
+                writer.close()
+                return
+            elif not command.startswith(("LOGIN", "NOOP")):
+                writer.write(f"{tag} BAD unknown command\r\n".encode())
+                await writer.drain()
+                continue
+
+            writer.write(f"{tag} OK done\r\n".encode())
+            await writer.drain()
@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from modules.artifact_store import ArtifactStore, ArtifactStoreException
+
+DAY = date(2025, 6, 1)
+
+
+class FakeFactory:
+    """Factory publishing a string as saint, after a delay."""
+
+    def __init__(self, folder: str, delay: float = 0) -> None:
+        self.folder = folder
+        self.delay = delay
+        self.generated = []
+
+    def lockFilename(self, day: date) -> str:
+        return os.path.join(self.folder, f"{day:%Y%m%d}.lock")
+
+    def _saintFilename(self, day: date) -> str:
+        return os.path.join(self.folder, f"{day:%Y%m%d}.toml")
+
+    def isGenerated(self, day: date) -> bool:
+        return os.path.isfile(self._saintFilename(day))
+
+    def loadSaint(self, day: date) -> str:
+        with open(self._saintFilename(day)) as f:
+            return f.read()
+
+    def generateSaint(self, offline: bool, force_generation: bool, day: date) -> str:
+        time.sleep(self.delay)
+        self.generated.append(day)
+        with open(self._saintFilename(day), "w") as f:
+            f.write(f"saint of {day}")
+        return f"saint of {day}"
+
+
+def test_publish_removes_the_lock(tmp_path: str) -> None:
+    factory = FakeFactory(tmp_path)
+    store = ArtifactStore(factory)
+    assert store.publish(DAY) == "saint of 2025-06-01"
+    assert store.publish(DAY) == "saint of 2025-06-01"
+    assert store.load(DAY) == "saint of 2025-06-01"
+    assert factory.generated == [DAY]
+    assert os.listdir(tmp_path) == ["20250601.toml"]
+
+
+def test_load_waits_for_the_render(tmp_path: str) -> None:
+    factory = FakeFactory(tmp_path, delay=0.5)
+    store = ArtifactStore(factory)
+    store._poll_interval = 0.05
+    producer = threading.Thread(target=store.publish, args=(DAY,))
+    producer.start()
+    time.sleep(0.1)
+
+    # the consumers wait on the lock file removed by the producer
+    results = []
+    consumers = [
+        threading.Thread(target=lambda: results.append(store.load(DAY, timeout=5)))
+        for _ in range(3)
+    ]
+    for thread in consumers:
+        thread.start()
+    for thread in [producer, *consumers]:
+        thread.join()
+
+    assert results == ["saint of 2025-06-01"] * 3
+    assert factory.generated == [DAY]
+    assert os.listdir(tmp_path) == ["20250601.toml"]
+
+
+def test_load_timeout(tmp_path: str) -> None:
+    factory = FakeFactory(tmp_path, delay=0.5)
+    store = ArtifactStore(factory)
+    store._poll_interval = 0.05
+    producer = threading.Thread(target=store.publish, args=(DAY,))
+    producer.start()
+    time.sleep(0.1)
+
+    with pytest.raises(ArtifactStoreException):
+        store.load(DAY, timeout=0.1)
+    producer.join()
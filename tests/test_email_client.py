@@ -0,0 +1,119 @@
+import imaplib
+import time
+
+import pytest
+from fake_imap_server import FakeIMAPServer
+
+from modules.email_client import EmailClient
+
+IDLE_TIMEOUT = 8
+
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> FakeIMAPServer:
+    with FakeIMAPServer() as server:
+        monkeypatch.setattr(
+            imaplib,
+            "IMAP4_SSL",
+            lambda host, timeout=None: imaplib.IMAP4(
+                host, server.port, timeout=timeout
+            ),
+        )
+        monkeypatch.setattr(
+            EmailClient,
+            "_loadSettings",
+            lambda self, path: {
+                "imap_server": "127.0.0.1",
+                "sender": server.sender,
+                "username": "user",
+                "password": "password",
+                "idle_timeout": IDLE_TIMEOUT,
+            },
+        )
+        yield server
+
+
+def test_code_already_in_inbox(server: FakeIMAPServer) -> None:
+    server.addMail("123456", minutes_ago=1)
+    time.sleep(0.1)
+    with EmailClient() as client:
+        assert client.waitForInstagramSecurityCode(timeout=5) == "123456"
+    assert not any(line.endswith("IDLE") for line in server.log)
+
+
+def test_old_code_is_ignored(server: FakeIMAPServer) -> None:
+    server.addMail("111111", minutes_ago=30)
+    time.sleep(0.1)
+    start = time.monotonic()
+    with EmailClient() as client:
+        code = client.waitForInstagramSecurityCode(timeout=1, since=time.time() - 60)
+    assert code is None
+    assert time.monotonic() - start < IDLE_TIMEOUT
+
+
+def test_wakes_on_new_mail(server: FakeIMAPServer) -> None:
+    server.addMail("222222", delay=1)
+    start = time.monotonic()
+    with EmailClient() as client:
+        code = client.waitForInstagramSecurityCode(timeout=20, since=time.time() - 60)
+    assert code == "222222"
+    assert time.monotonic() - start < IDLE_TIMEOUT / 2
+
+
+def test_wakes_on_exists_in_continuation_packet(server: FakeIMAPServer) -> None:
+    # "+ idling" and "* 1 EXISTS" arrive together, so the EXISTS line is
+    # already in the buffer of imaplib when the client starts waiting
+    server.queueForIdle("333333")
+    start = time.monotonic()
+    with EmailClient() as client:
+        code = client.waitForInstagramSecurityCode(timeout=20, since=time.time() - 60)
+    assert code == "333333"
+    assert time.monotonic() - start < IDLE_TIMEOUT / 2
+
+
+def test_refused_idle_falls_back_to_polling(
+    server: FakeIMAPServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    server.refuse_idle = True
+    server.addMail("555555", delay=0.5)
+    monkeypatch.setattr(EmailClient, "_poll_interval", 0.2)
+    with EmailClient() as client:
+        code = client.waitForInstagramSecurityCode(timeout=5, since=time.time() - 60)
+    assert code == "555555"
+    assert any(line.endswith("IDLE") for line in server.log)
+
+
+def test_reconnects_after_drop(server: FakeIMAPServer) -> None:
+    with EmailClient() as client:
+        assert client.getInstagramSecurityCode() is None
+        client._client.shutdown()
+        server.addMail("444444", delay=0.5)
+        code = client.waitForInstagramSecurityCode(timeout=10, since=time.time() - 60)
+    assert code == "444444"
+    assert sum(" LOGIN user " in line for line in server.log) == 2
+
+
+def test_refused_login_is_fatal(server: FakeIMAPServer) -> None:
+    server.refuse_login = True
+    start = time.monotonic()
+    with EmailClient() as client:
+        assert client.waitForInstagramSecurityCode(timeout=10) is None
+    assert time.monotonic() - start < 1
+    assert sum(" LOGIN user " in line for line in server.log) == 1
+
+
+def test_unreachable_server_is_retried(
+    server: FakeIMAPServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    attempts = []
+
+    def unreachable(host: str, timeout: float = None) -> imaplib.IMAP4:
+        attempts.append(time.monotonic())
+        raise ConnectionRefusedError("connection refused")
+
+    monkeypatch.setattr(imaplib, "IMAP4_SSL", unreachable)
+    with EmailClient() as client:
+        assert client.waitForInstagramSecurityCode(timeout=4) is None
+    # retried with backoff, until the deadline
+    assert 2 <= len(attempts) <= 4
+    assert attempts[-1] - attempts[0] < 4
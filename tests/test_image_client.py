@@ -0,0 +1,84 @@
+import asyncio
+import os
+from datetime import date
+
+import pytest
+from fake_image_server import FakeImageServer
+
+from modules.image_client import ImageClient, ImageClientException
+from modules.portrait_cache import PortraitCache
+from modules.saint_factory import SaintFactory
+
+
+@pytest.fixture
+def server() -> FakeImageServer:
+    with FakeImageServer() as server:
+        yield server
+
+
+def create_client(server: FakeImageServer, **kwargs) -> ImageClient:
+    return ImageClient("key", api_base=server.api_base, **kwargs)
+
+
+def test_download(server: FakeImageServer, tmp_path: str) -> None:
+    path = os.path.join(tmp_path, "saint.png")
+    client = create_client(server)
+    assert asyncio.run(client.fetch("a saint", path)) == path
+    with open(path, "rb") as f:
+        assert f.read() == server.image
+    assert os.listdir(tmp_path) == ["saint.png"]
+    assert server.prompts == ["a saint"]
+
+
+def test_read_timeout_leaves_no_file(server: FakeImageServer, tmp_path: str) -> None:
+    server.stall = 3
+    path = os.path.join(tmp_path, "saint.png")
+    client = create_client(server, read_timeout=0.5)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client.fetch("a saint", path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_generation_error(server: FakeImageServer, tmp_path: str) -> None:
+    server.generation_status = 500
+    client = create_client(server)
+    with pytest.raises(ImageClientException, match="500"):
+        asyncio.run(client.fetch("a saint", os.path.join(tmp_path, "saint.png")))
+    assert os.listdir(tmp_path) == []
+
+
+def test_download_error(server: FakeImageServer, tmp_path: str) -> None:
+    server.download_status = 404
+    client = create_client(server)
+    with pytest.raises(ImageClientException, match="404"):
+        asyncio.run(client.fetch("a saint", os.path.join(tmp_path, "saint.png")))
+    assert os.listdir(tmp_path) == []
+
+
+def test_concurrency_limit(server: FakeImageServer, tmp_path: str) -> None:
+    server.generation_delay = 0.2
+    requests = [(f"saint {i}", os.path.join(tmp_path, f"{i}.png")) for i in range(10)]
+    client = create_client(server, max_concurrency=3)
+    results = asyncio.run(client.fetchMany(requests))
+    assert results == [path for _, path in requests]
+    assert server.max_in_flight == 3
+
+
+def test_factory_fetches_inside_a_running_loop(
+    server: FakeImageServer, tmp_path: str
+) -> None:
+    # only the attributes used by the download
+    factory = SaintFactory.__new__(SaintFactory)
+    factory._settings = {"openai_folder": f"{tmp_path}/"}
+    factory._image_client = create_client(server)
+    factory._portraits = PortraitCache(os.path.join(tmp_path, "cache"))
+
+    async def generate() -> str:
+        return await factory.fetchAIImage("a saint", date(2000, 1, 1))
+
+    path = asyncio.run(generate())
+    assert path == os.path.join(tmp_path, "20000101.png")
+    # the second time it comes from the portrait cache
+    os.remove(path)
+    assert asyncio.run(generate()) == path
+    assert server.prompts == ["a saint"]
@@ -0,0 +1,115 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+import pytz
+
+from modules.scheduler import Clock, Scheduler
+
+ROME = pytz.timezone("Europe/Rome")
+
+
+class FakeClock(Clock):
+    """Clock jumping straight to the deadlines, optionally suspended once."""
+
+    def __init__(self, start: datetime) -> None:
+        self.current = start
+        self.suspend_at = None
+        self.suspend_for = None
+
+    def now(self) -> datetime:
+        return self.current
+
+    def sleepUntil(self, deadline: datetime) -> None:
+        self.current = max(self.current, deadline)
+        if self.suspend_at is not None and self.current >= self.suspend_at:
+            # the machine is asleep, the deadline might pass meanwhile
+            self.current = max(self.current, self.suspend_at + self.suspend_for)
+            self.suspend_at = None
+
+
+def local(*args: int) -> datetime:
+    return ROME.localize(datetime(*args))
+
+
+def create_scheduler(
+    monkeypatch: pytest.MonkeyPatch, clock: FakeClock, **settings
+) -> Scheduler:
+    settings = {"morning": "08:30", "night": "02:30", **settings}
+    monkeypatch.setattr(Scheduler, "_loadSettings", lambda self: settings)
+    return Scheduler(clock)
+
+
+def test_one_run_per_day_for_a_year(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = FakeClock(local(2025, 1, 1, 0, 0))
+    scheduler = create_scheduler(monkeypatch, clock)
+    runs = {"morning": [], "night": []}
+    for key, times in runs.items():
+        scheduler._schedule(key, lambda times=times: times.append(clock.now()))
+
+    scheduler.run(until=local(2026, 1, 1, 0, 0))
+
+    days = [date(2025, 1, 1) + timedelta(days=i) for i in range(365)]
+    for key, times in runs.items():
+        assert [t.astimezone(ROME).date() for t in times] == days
+
+    assert {t.astimezone(ROME).strftime("%H:%M") for t in runs["morning"]} == {"08:30"}
+    # 02:30 doesn't exist on the day DST starts, it's moved to 03:30
+    night = {t.astimezone(ROME).date(): t.astimezone(ROME) for t in runs["night"]}
+    assert night[date(2025, 3, 30)].strftime("%H:%M") == "03:30"
+    assert night[date(2025, 3, 31)].strftime("%H:%M") == "02:30"
+    # 02:30 happens twice on the day DST ends, the job runs once
+    assert night[date(2025, 10, 26)].strftime("%H:%M %Z") == "02:30 CET"
+    assert night[date(2025, 10, 27)].strftime("%H:%M") == "02:30"
+
+
+@pytest.mark.parametrize("catch_up", [True, False])
+def test_suspend(monkeypatch: pytest.MonkeyPatch, catch_up: bool) -> None:
+    clock = FakeClock(local(2025, 6, 1, 0, 0))
+    scheduler = create_scheduler(monkeypatch, clock, catch_up=catch_up)
+    runs = []
+    scheduler._schedule("morning", lambda: runs.append(clock.now()))
+
+    # asleep from 07:00 to 13:00 of the second day
+    clock.suspend_at = local(2025, 6, 2, 7, 0)
+    clock.suspend_for = timedelta(hours=6)
+    scheduler.run(until=local(2025, 6, 4, 0, 0))
+
+    late = [local(2025, 6, 2, 13, 0)] if catch_up else []
+    assert runs == [
+        local(2025, 6, 1, 8, 30),
+        *late,
+        local(2025, 6, 3, 8, 30),
+    ]
+
+
+def test_short_delay_within_grace(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = FakeClock(local(2025, 6, 1, 0, 0))
+    scheduler = create_scheduler(monkeypatch, clock, catch_up=False)
+    runs = []
+    scheduler._schedule("morning", lambda: runs.append(clock.now()))
+
+    clock.suspend_at = local(2025, 6, 1, 8, 30)
+    clock.suspend_for = timedelta(minutes=2)
+    scheduler.run(until=local(2025, 6, 2, 0, 0))
+
+    assert runs == [local(2025, 6, 1, 8, 32)]
+
+
+def test_retry_metrics(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = FakeClock(local(2025, 6, 1, 0, 0))
+    scheduler = create_scheduler(monkeypatch, clock, max_tries=3, retry_delay=0.01)
+    failures = [OSError("first"), OSError("second")]
+
+    def post() -> None:
+        if failures:
+            raise failures.pop(0)
+
+    assert scheduler.tryFunction(post)
+    stats = scheduler._retry_metrics.snapshot()["post"]
+    assert stats["attempts"] == 3
+    assert stats["retries"] == 2
+    assert stats["failures"] == 2
+    assert stats["successes"] == 1
+    assert scheduler._retry_metrics.summary("post").startswith(
+        "post: 3 attempts, 2 retries, 2 failures"
+    )